@@ -0,0 +1,349 @@
+"""
+Benchmarks des chemins critiques (simulation, fiscalité, indicateurs, optimiseur, backtest)
+Données synthétiques hors ligne, mesure façon timeit (meilleur temps sur
+plusieurs répétitions) et comparaison à une référence JSON stockée.
+
+    python benchmarks/run_benchmarks.py                 # compare à baseline.json
+    python benchmarks/run_benchmarks.py --save          # enregistre la référence
+    python benchmarks/run_benchmarks.py -k monte_carlo  # filtre par nom
+"""
+
+import argparse
+import ast
+import atexit
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import textwrap
+import timeit
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+NOTEBOOK_DIR = os.path.join(ROOT, "Notebook")
+TOLERANCE = 0.25  # Ralentissement toléré avant de signaler une régression
+MIN_DELTA = 10e-6  # Écart absolu (secondes) sous lequel un ralentissement est du bruit de mesure
+REPEAT = 5
+MIN_TIME = 0.2    # Durée minimale d'une répétition (secondes)
+
+BENCHMARKS = []
+
+
+def benchmark(name, **params):
+    """Enregistre une fonction de préparation ; elle renvoie la fonction à chronométrer"""
+    def register(setup):
+        grid = [dict(zip(params, values)) for values in zip(*params.values())] if params else [{}]
+        for case in grid:
+            label = name + "".join(f"[{key}={value}]" for key, value in case.items())
+            BENCHMARKS.append((label, setup, case))
+        return setup
+    return register
+
+
+# ==============================
+# Code des notebooks
+# ==============================
+def load_notebook_functions(notebook, names, namespace):
+    """Extrait des fonctions (ou méthodes) d'un notebook sans exécuter ses cellules"""
+    with open(os.path.join(NOTEBOOK_DIR, notebook), encoding="utf-8") as f:
+        cells = json.load(f)["cells"]
+
+    for cell in cells:
+        if cell["cell_type"] != "code":
+            continue
+        source = "".join(cell["source"])
+        for node in ast.walk(ast.parse(source)):
+            if isinstance(node, ast.FunctionDef) and node.name in names:
+                code = textwrap.dedent(ast.get_source_segment(source, node))
+                exec(compile(code, notebook, "exec"), namespace)
+    missing = [name for name in names if name not in namespace]
+    if missing:
+        raise LookupError(f"{', '.join(missing)} introuvable(s) dans {notebook}")
+    return namespace
+
+
+def notebook_namespace():
+    import backtest
+    return {'np': np, 'pd': pd, 'datetime': datetime, 'timedelta': timedelta, 'backtest': backtest,
+            'print': lambda *args, **kwargs: None}
+
+
+# ==============================
+# Données synthétiques
+# ==============================
+@lru_cache(maxsize=1)
+def sample_prices():
+    """Données de create_sample_data_fixed (notebook 04), seed 42"""
+    namespace = load_notebook_functions("04_Portfolio_Optimization.ipynb",
+                                        ["create_sample_data_fixed"], notebook_namespace())
+    return namespace["create_sample_data_fixed"]()
+
+
+def temporary_directory(prefix):
+    """Dossier temporaire supprimé à la fin du processus (les cas chronométrés l'utilisent jusque-là)"""
+    directory = tempfile.mkdtemp(prefix=prefix)
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    return directory
+
+
+def long_history(n_days, seed=42):
+    """Historique OHLCV quotidien synthétique de n_days jours"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0.0003, 0.015, n_days))
+    index = pd.bdate_range("2000-01-03", periods=n_days)
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.002, n_days)),
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': rng.integers(1_000, 1_000_000, n_days)
+    }, index=index)
+
+
+def simulator():
+    """Simulateur avancé sans fenêtre Tk (seules ses méthodes de calcul sont utilisées)"""
+    from simulateur_actions_avance import AdvancedStockSimulator
+    return AdvancedStockSimulator.__new__(AdvancedStockSimulator)
+
+
+SIMULATION_PARAMS = {
+    'ticker': 'AAPL', 'initial_price': 150.0, 'initial_investment': 10000.0,
+    'monthly_investment': 500.0, 'years': 10, 'annual_return': 8.0, 'volatility': 20.0,
+    'dividend_yield': 1.5, 'tax_scenario': 'current', 'inflation_rate': 2.0
+}
+
+
+# ==============================
+# Cas mesurés
+# ==============================
+@benchmark("simulate_price_path", years=(10, 30))
+def bench_simulate_price_path(years):
+    app = simulator()
+    return lambda: app.simulate_price_path(150.0, years, 8.0, 20.0, 1.5, random_seed=0)
+
+
+@benchmark("calculate_portfolio_value", years=(10, 30))
+def bench_calculate_portfolio_value(years):
+    app = simulator()
+    path = app.simulate_price_path(150.0, years, 8.0, 20.0, 1.5, random_seed=0)
+    return lambda: app.calculate_portfolio_value(path, 10000.0, 500.0, years)
+
+
+@benchmark("apply_taxation", account=("PEA", "CTO"))
+def bench_apply_taxation(account):
+    app = simulator()
+    path = app.simulate_price_path(150.0, 10, 8.0, 20.0, 1.5, random_seed=0)
+    portfolio = app.calculate_portfolio_value(path, 10000.0, 500.0, 10)
+    return lambda: app.apply_taxation(portfolio, account, 10, "current")
+
+
+@benchmark("run_monte_carlo", n_simulations=(100, 1000))
+def bench_run_monte_carlo(n_simulations):
+    app = simulator()
+    return lambda: app.compute_monte_carlo(SIMULATION_PARAMS, n_simulations)
+
+
+@benchmark("simulate_gross", n_paths=(1_000, 10_000))
+def bench_simulate_gross(n_paths):
+    from moteur_simulation import simulate_gross
+    return lambda: simulate_gross(SIMULATION_PARAMS, n_paths)
+
+
+@benchmark("simulate_gross_compact", n_paths=(10_000, 100_000))
+def bench_simulate_gross_compact(n_paths):
+    from moteur_simulation import COMPACT_DTYPE, simulate_gross
+    return lambda: simulate_gross(SIMULATION_PARAMS, n_paths, dtype=COMPACT_DTYPE)
+
+
+@benchmark("evaluate_scenarios", n_paths=(10_000, 100_000))
+def bench_evaluate_scenarios(n_paths):
+    from moteur_simulation import evaluate_scenarios, simulate_gross
+    gross = simulate_gross(SIMULATION_PARAMS, n_paths, keep_paths=False)
+    return lambda: evaluate_scenarios(gross['final_values'], gross['invested'], 10, inflation_rates=(0.0, 2.0))
+
+
+@benchmark("path_risk_metrics", n_paths=(10_000, 100_000))
+def bench_path_risk_metrics(n_paths):
+    from mesures_risque import path_risk_metrics
+    from moteur_simulation import COMPACT_DTYPE, simulate_gross
+    values = simulate_gross(SIMULATION_PARAMS, n_paths, dtype=COMPACT_DTYPE)['value_history']
+    return lambda: path_risk_metrics(values, 10000.0, 500.0)
+
+
+@benchmark("goal_solver", variable=("monthly_investment", "years"))
+def bench_goal_solver(variable):
+    from objectifs import GoalSolver
+    solver = GoalSolver(SIMULATION_PARAMS, n_paths=10_000, max_years=40)
+    return lambda: solver.solve(200_000, 90, variable)
+
+
+@benchmark("decumulation", n_paths=(10_000, 100_000), strategy=("fixed", "guardrail"))
+def bench_decumulation(n_paths, strategy):
+    from retraits import simulate_retirement
+    start_values = np.full(n_paths, 300_000.0)
+    return lambda: simulate_retirement(SIMULATION_PARAMS, n_paths, 40, strategy, 12_000.0, 4.0, "CTO",
+                                       start_values=start_values, cost_basis=150_000.0)
+
+
+@benchmark("path_archive_write", n_paths=(100_000,))
+def bench_path_archive_write(n_paths):
+    from trajectoires_disque import simulate_to_archive
+    directory = temporary_directory("bench_trajectoires_")
+    return lambda: simulate_to_archive(SIMULATION_PARAMS, n_paths, directory)
+
+
+@benchmark("path_archive_query", n_paths=(100_000,))
+def bench_path_archive_query(n_paths):
+    from trajectoires_disque import simulate_to_archive
+    archive = simulate_to_archive(SIMULATION_PARAMS, n_paths, temporary_directory("bench_trajectoires_"))
+    return lambda: (archive.percentile_bands(), archive.max_drawdowns())
+
+
+@benchmark("compute_rsi", n_days=(10_000, 100_000))
+def bench_compute_rsi(n_days):
+    from stock_vizualiser import compute_rsi
+    close = long_history(n_days)['Close']
+    return lambda: compute_rsi(close)
+
+
+@benchmark("calculate_indicators", n_days=(10_000, 100_000))
+def bench_calculate_indicators(n_days):
+    namespace = load_notebook_functions("03_Technical_Analysis.ipynb",
+                                        ["calculate_indicators"], notebook_namespace())
+    calculate_indicators = namespace["calculate_indicators"]
+    df = long_history(n_days)
+    return lambda: calculate_indicators(None, df)
+
+
+@benchmark("generate_random_portfolios", n_portfolios=(10_000, 200_000))
+def bench_generate_random_portfolios(n_portfolios):
+    from portefeuille import generate_random_portfolios
+    returns = sample_prices().pct_change().dropna()
+    annual_returns, cov = returns.mean().values * 252, returns.cov().values * 252
+    return lambda: generate_random_portfolios(annual_returns, cov, n_portfolios, seed=0)
+
+
+@benchmark("backtest_strategy")
+def bench_backtest_strategy():
+    namespace = load_notebook_functions("04_Portfolio_Optimization.ipynb",
+                                        ["_strategy_result", "backtest_strategy"], notebook_namespace())
+    backtest_strategy = namespace["backtest_strategy"]
+    prices = sample_prices()
+    weights = np.ones(prices.shape[1]) / prices.shape[1]
+    return lambda: backtest_strategy(prices, weights, 10000, "Equal Weight")
+
+
+@benchmark("backtest_batch", n_strategies=(1_000, 10_000))
+def bench_backtest_batch(n_strategies):
+    from backtest import backtest_batch
+    prices = sample_prices().values
+    weights = np.random.default_rng(0).dirichlet(np.ones(prices.shape[1]), n_strategies)
+    return lambda: backtest_batch(prices, weights, keep_values=False)
+
+
+# ==============================
+# Exécution
+# ==============================
+def time_case(func, repeat=REPEAT, min_time=MIN_TIME):
+    """Meilleur temps par appel (secondes) sur `repeat` répétitions"""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    data = {
+        'created': datetime.now().isoformat(timespec="seconds"),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.processor(), 'numpy': np.__version__, 'pandas': pd.__version__},
+        'results': results
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def run(selection=None, repeat=REPEAT, tolerance=TOLERANCE, baseline_path=BASELINE_PATH, min_delta=MIN_DELTA):
+    """Exécute les benchmarks ; renvoie (résultats, régressions)
+
+    Une régression dépasse à la fois la tolérance relative et l'écart
+    absolu min_delta : les cas de quelques microsecondes ne sont pas
+    signalés sur du bruit de chronométrage.
+    """
+    baseline = load_baseline(baseline_path)
+    results, regressions = {}, []
+
+    for label, setup, params in BENCHMARKS:
+        if selection and selection not in label:
+            continue
+        seconds = time_case(setup(**params), repeat)
+        results[label] = seconds
+
+        line = f"{label:<50} {format_time(seconds)}"
+        if label in baseline:
+            ratio = seconds / baseline[label]
+            line += f"   x{ratio:5.2f}"
+            if ratio > 1 + tolerance and seconds - baseline[label] > min_delta:
+                regressions.append(label)
+                line += "   ⚠️ RÉGRESSION"
+        print(line, flush=True)
+
+    return results, regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins critiques")
+    parser.add_argument("-k", "--filter", help="n'exécuter que les cas dont le nom contient ce texte")
+    parser.add_argument("--save", action="store_true", help="enregistrer les résultats comme référence")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="fichier de référence JSON")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="nombre de répétitions")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="ralentissement toléré (0.25 = +25 %%)")
+    parser.add_argument("--min-delta", type=float, default=MIN_DELTA,
+                        help="écart absolu ignoré, en secondes (défaut : 10 µs)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results, regressions = run(args.filter, args.repeat, args.tolerance, args.baseline, args.min_delta)
+
+    if args.save:
+        # Un filtre ne met à jour que les cas exécutés
+        save_baseline({**load_baseline(args.baseline), **results}, args.baseline)
+        print(f"\n💾 Référence enregistrée : {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n⚠️ {len(regressions)} régression(s) au-delà de +{args.tolerance:.0%} : {', '.join(regressions)}")
+        return 1
+    print("\n✅ Aucune régression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Backtests vectorisés
+- backtest_batch : achat-conservation à poids initiaux fixes ; une matrice de
+  poids (stratégies x actifs) est évaluée en un seul passage NumPy
+- walk_forward_backtest : réoptimisation et rééquilibrage périodiques avec
+  frais proportionnels et fiscalité PEA/CTO sur les plus-values réalisées
+"""
+
+import numpy as np
+
+from covariance import TRADING_DAYS, RollingCovariance
+from fiscalite import scenario_rates, tax_rate
+from frontiere_efficiente import min_variance_portfolio
+
+
+def _curve_metrics(values, initial_capital):
+    """Rendement, volatilité, Sharpe et drawdown maximal de courbes de valeur (jours x stratégies)"""
+    returns = values[1:] / values[:-1] - 1
+
+    total_return = values[-1] / initial_capital - 1
+    annual_return = (1 + total_return) ** (TRADING_DAYS / len(returns)) - 1
+    annual_vol = returns.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(annual_vol > 0, annual_return / annual_vol, 0.0)
+
+    # Drawdown sur la valeur cumulée à partir du premier rendement
+    cumulative = values[1:]
+    running_max = np.maximum.accumulate(cumulative, axis=0)
+    max_drawdown = (cumulative / running_max - 1).min(axis=0)
+
+    return {
+        'total_return': total_return,
+        'annual_return': annual_return,
+        'annual_volatility': annual_vol,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': max_drawdown,
+        'final_value': values[-1]
+    }
+
+
+def backtest_batch(prices, weights, initial_capital=10000, chunk_size=2000, keep_values=True):
+    """Backtest de toutes les lignes de `weights` sur `prices` (jours x actifs)
+
+    Renvoie un dict de tableaux indexés par stratégie ; 'portfolio_values'
+    (jours x stratégies) n'est conservé que si keep_values=True. Les
+    stratégies sont traitées par blocs de chunk_size pour borner la mémoire.
+    """
+    prices = np.asarray(prices, dtype=float)
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    weights = weights / weights.sum(axis=1, keepdims=True)
+
+    n_strategies = len(weights)
+    relative = prices / prices[0]
+
+    metrics = {name: np.empty(n_strategies) for name in
+               ['total_return', 'annual_return', 'annual_volatility', 'sharpe_ratio',
+                'max_drawdown', 'final_value']}
+    values_all = np.empty((len(prices), n_strategies)) if keep_values else None
+
+    for start in range(0, n_strategies, chunk_size):
+        stop = min(start + chunk_size, n_strategies)
+
+        values = initial_capital * relative @ weights[start:stop].T
+        for name, value in _curve_metrics(values, initial_capital).items():
+            metrics[name][start:stop] = value
+
+        if keep_values:
+            values_all[:, start:stop] = values
+
+    metrics['weights'] = weights
+    metrics['portfolio_values'] = values_all
+    return metrics
+
+
+def equal_weight_optimizer(annual_returns, cov_matrix, previous_weights, bounds):
+    """Poids égaux à chaque rééquilibrage"""
+    return np.ones(len(cov_matrix)) / len(cov_matrix)
+
+
+def min_variance_optimizer(annual_returns, cov_matrix, previous_weights, bounds):
+    """Variance minimale, démarrée à chaud depuis les poids précédents"""
+    weights = min_variance_portfolio(cov_matrix, bounds, x0=previous_weights)
+    if weights is None:
+        # Échec : on conserve l'allocation précédente (poids égaux au départ)
+        if previous_weights is not None:
+            return previous_weights
+        return equal_weight_optimizer(annual_returns, cov_matrix, previous_weights, bounds)
+    weights = np.clip(weights, 0, None)
+    return weights / weights.sum()
+
+
+OPTIMIZERS = {
+    'equal_weight': equal_weight_optimizer,
+    'min_variance': min_variance_optimizer
+}
+
+
+def walk_forward_backtest(prices, optimizer='min_variance', rebalance_every=21, lookback=252,
+                          cost_rate=0.001, account_type="CTO", tax_scenario="current",
+                          initial_capital=10000, bounds=(0.0, 1.0)):
+    """Backtest glissant : réestimation, réoptimisation et rééquilibrage tous les rebalance_every jours
+
+    La covariance (et la moyenne) des `lookback` derniers rendements est tenue à
+    jour incrémentalement chaque jour. `optimizer` est un nom de OPTIMIZERS ou
+    une fonction (rendements annuels, covariance, poids précédents, bornes) -> poids.
+    Chaque rééquilibrage paie cost_rate sur le montant échangé. Fiscalité, avec
+    les mêmes taux que apply_taxation :
+    - CTO : plus-values réalisées (prix de revient moyen pondéré) imposées chaque
+      année, moins-values reportées ; plus-values latentes imposées à la sortie
+    - PEA : aucun impôt en cours de route, gain total imposé à la sortie
+    """
+    prices = np.asarray(prices, dtype=float)
+    n_days, n_assets = prices.shape
+    if not 1 < lookback < n_days - 1:
+        raise ValueError(f"Fenêtre de {lookback} jours incompatible avec {n_days} jours de prix")
+    if account_type not in ("PEA", "CTO"):
+        raise ValueError(f"Type de compte inconnu : {account_type}")
+    if isinstance(optimizer, str):
+        optimizer = OPTIMIZERS[optimizer]
+
+    returns = prices[1:] / prices[:-1] - 1
+    rolling = RollingCovariance(returns[:lookback])
+
+    cto_rate = scenario_rates(tax_scenario)["CTO"]
+    shares = np.zeros(n_assets)
+    cost_basis = np.zeros(n_assets)  # Prix de revient total par actif
+    cash = float(initial_capital)
+    weights = None
+
+    values = np.empty(n_days - lookback)
+    weights_history = []
+    rebalance_days = []
+    costs_paid = taxes_paid = turnover = 0.0
+    year_gain = loss_carry = 0.0
+
+    for step, t in enumerate(range(lookback, n_days)):
+        if step:
+            rolling.update(returns[t - 1])
+        price = prices[t]
+
+        # Imposition annuelle des plus-values nettes réalisées sur le CTO
+        if account_type == "CTO" and step and step % TRADING_DAYS == 0:
+            taxable = year_gain + loss_carry
+            tax = max(taxable, 0.0) * cto_rate
+            cash -= tax
+            taxes_paid += tax
+            loss_carry = min(taxable, 0.0)
+            year_gain = 0.0
+
+        if step % rebalance_every == 0:
+            mean_returns = rolling.total / len(rolling.buffer) * TRADING_DAYS
+            weights = optimizer(mean_returns, rolling.covariance(), weights, bounds)
+
+            holdings = shares * price
+            value = holdings.sum() + cash
+            # Frais estimés sur l'écart à la cible, puis cible nette de frais
+            cost = cost_rate * np.abs(weights * value - holdings).sum()
+            target = weights * (value - cost)
+            trade = target - holdings
+
+            sold = np.maximum(-trade, 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                sell_fraction = np.where(holdings > 0, sold / holdings, 0.0)
+            year_gain += (sold - cost_basis * sell_fraction).sum()
+            cost_basis = cost_basis * (1 - sell_fraction) + np.maximum(trade, 0)
+
+            shares = target / price
+            cash = value - target.sum() - cost
+            costs_paid += cost
+            turnover += np.abs(trade).sum() / value
+            weights_history.append(weights)
+            rebalance_days.append(t)
+
+        values[step] = shares @ price + cash
+
+    # Sortie : mêmes taux que apply_taxation
+    years = (n_days - 1 - lookback) / TRADING_DAYS
+    exit_rate = tax_rate(account_type, years, tax_scenario, pea_early_penalty=False)
+    if account_type == "CTO":
+        exit_gain = year_gain + (shares @ prices[-1] - cost_basis.sum()) + loss_carry
+    else:
+        exit_gain = values[-1] - initial_capital
+    exit_tax = max(exit_gain, 0.0) * exit_rate
+
+    result = {name: float(value[0]) for name, value in
+              _curve_metrics(values[:, None], initial_capital).items()}
+    result.update({
+        'portfolio_values': values,
+        'start_day': lookback,
+        'rebalance_days': np.array(rebalance_days),
+        'weights_history': np.array(weights_history),
+        'costs_paid': float(costs_paid),
+        'taxes_paid': float(taxes_paid + exit_tax),
+        'exit_tax': float(exit_tax),
+        'turnover': float(turnover),
+        'final_value_net': float(values[-1] - exit_tax),
+        'account_type': account_type
+    })
+    return result
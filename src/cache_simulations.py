@@ -0,0 +1,169 @@
+"""
+Cache des sorties de simulation (avant fiscalité)
+Clé : paramètres de simulation, seed et version du moteur ; les paramètres
+appliqués après la simulation (scénario fiscal, inflation) sont exclus, si bien
+qu'un changement de scénario réutilise les trajectoires et ne refait que la fiscalité.
+
+- mémoire : LRU bornée en nombre d'entrées et en octets
+- disque (optionnel) : un fichier .npz par entrée, éviction LRU par date d'accès
+
+Variable d'environnement :
+- SIMULATION_CACHE_DIR : dossier du cache disque (désactivé si absente)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from moteur_simulation import ENGINE_VERSION
+from stockage_resultats import param_hash
+
+CACHE_DIR_ENV = "SIMULATION_CACHE_DIR"
+
+# Paramètres sans effet sur les trajectoires ni sur la valeur avant impôts
+POST_SIMULATION_PARAMS = ('tax_scenario', 'inflation_rate')
+
+
+def _entry_size(value):
+    """Taille approximative (octets) d'une entrée nom -> tableau ou scalaire"""
+    return sum(np.asarray(item).nbytes for item in value.values())
+
+
+class SimulationCache:
+    """Cache LRU (mémoire + disque optionnel) de dicts nom -> tableau/scalaire"""
+
+    def __init__(self, max_entries=32, max_bytes=256 * 2 ** 20, disk_dir=None, max_disk_bytes=2 ** 30):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.disk_hits = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def key(params, seed, **extra):
+        """Clé de cache : paramètres de simulation, seed, options et version du moteur"""
+        simulation_params = {name: value for name, value in params.items()
+                             if name not in POST_SIMULATION_PARAMS}
+        return param_hash(simulation_params, seed=seed, engine_version=ENGINE_VERSION, **extra)
+
+    @property
+    def size_bytes(self):
+        return sum(self._sizes.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries or (self.disk_dir is not None and os.path.exists(self._disk_path(key)))
+
+    def get(self, key):
+        """Entrée en cache (promue en tête de LRU) ou None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        value = self._read_disk(key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+        self._store(key, value)
+        return value
+
+    def put(self, key, value):
+        """Ajoute une entrée (mémoire et disque) ; les plus anciennes sont évincées"""
+        self._store(key, value)
+        self._write_disk(key, value)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+        if disk and self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+    def stats(self):
+        return {'entries': len(self), 'bytes': self.size_bytes, 'hits': self.hits,
+                'misses': self.misses, 'disk_hits': self.disk_hits}
+
+    # ==============================
+    # Mémoire
+    # ==============================
+    def _store(self, key, value):
+        size = _entry_size(value)
+        with self._lock:
+            if size > self.max_bytes:
+                return  # Trop volumineuse pour la mémoire (reste disponible sur disque)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                evicted, _ = self._entries.popitem(last=False)
+                del self._sizes[evicted]
+
+    # ==============================
+    # Disque
+    # ==============================
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.npz")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                value = {name: data[name].item() if data[name].ndim == 0 else data[name]
+                         for name in data.files}
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # Date d'accès pour l'éviction LRU
+        return value
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **{name: np.asarray(item) for name, item in value.items()})
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".npz"):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(os.path.join(self.disk_dir, name))
+            total -= size
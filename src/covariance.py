@@ -0,0 +1,172 @@
+"""
+Estimateurs de covariance interchangeables
+Échantillon, Ledoit-Wolf, EWMA et modèle factoriel, mémoïsés par
+(tickers, fenêtre, estimateur, empreinte des données), avec mises à jour
+incrémentales jour par jour.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+CACHE_SIZE = 128
+EWMA_LAMBDA = 0.94  # RiskMetrics, données quotidiennes
+
+
+def sample_covariance(returns):
+    """Covariance d'échantillon (ddof=1, comme DataFrame.cov)"""
+    return np.cov(returns, rowvar=False, ddof=1)
+
+
+def ledoit_wolf_covariance(returns):
+    """Rétrécissement de Ledoit-Wolf vers une matrice diagonale constante"""
+    from sklearn.covariance import LedoitWolf
+    return LedoitWolf().fit(returns).covariance_
+
+
+def ewma_covariance(returns, lam=EWMA_LAMBDA):
+    """Covariance à pondération exponentielle (observations récentes favorisées)"""
+    returns = np.asarray(returns, dtype=float)
+    weights = lam ** np.arange(len(returns))[::-1]
+    weights /= weights.sum()
+
+    centered = returns - weights @ returns
+    return (centered * weights[:, None]).T @ centered
+
+
+def factor_covariance(returns, n_factors=3):
+    """Modèle factoriel statistique : k premiers facteurs (ACP) + risque spécifique diagonal"""
+    cov = sample_covariance(returns)
+    n_factors = min(n_factors, len(cov))
+
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    top = np.argsort(eigenvalues)[::-1][:n_factors]
+    loadings = eigenvectors[:, top] * np.sqrt(eigenvalues[top])
+
+    factor_part = loadings @ loadings.T
+    specific = np.clip(np.diag(cov) - np.diag(factor_part), 0, None)
+    return factor_part + np.diag(specific)
+
+
+ESTIMATORS = {
+    'sample': sample_covariance,
+    'ledoit_wolf': ledoit_wolf_covariance,
+    'ewma': ewma_covariance,
+    'factor': factor_covariance
+}
+
+_cache = OrderedDict()
+
+
+def estimate_covariance(returns, estimator='sample', window=None, annualize=True, **kwargs):
+    """Covariance (DataFrame) des `window` derniers rendements, mémoïsée
+
+    La clé de cache est (tickers, fenêtre, estimateur) complétée par une
+    empreinte SHA-1 des rendements de la fenêtre et par les paramètres de
+    l'estimateur : des données modifiées (mêmes dates, autres valeurs)
+    donnent une nouvelle matrice.
+    """
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Estimateur inconnu : {estimator} (choix : {', '.join(ESTIMATORS)})")
+
+    tickers = tuple(returns.columns)
+    data = np.ascontiguousarray(returns.values[-window:] if window else returns.values, dtype=float)
+    key = (tickers, window, estimator, data.shape, hashlib.sha1(data.tobytes()).hexdigest(), annualize,
+           tuple(sorted(kwargs.items())))
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    cov = ESTIMATORS[estimator](data, **kwargs)
+    if annualize:
+        cov = cov * TRADING_DAYS
+
+    result = pd.DataFrame(cov, index=tickers, columns=tickers)
+    _cache[key] = result
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
+
+
+def clear_cache():
+    """Vide le cache des covariances"""
+    _cache.clear()
+
+
+class RollingCovariance:
+    """Covariance d'échantillon sur fenêtre glissante, mise à jour en O(n²) par jour
+
+    Les sommes et produits croisés sont ajustés à chaque nouvelle observation
+    (ajout de la plus récente, retrait de la plus ancienne) ; ils sont
+    recalculés entièrement une fois par fenêtre pour éviter la dérive numérique.
+    """
+
+    def __init__(self, initial_returns, window=None):
+        initial_returns = np.asarray(initial_returns, dtype=float)
+        self.window = window or len(initial_returns)
+        self.buffer = initial_returns[-self.window:].copy()
+        self.position = 0  # Index de la plus ancienne observation dans le tampon circulaire
+        self.updates = 0
+        self._recompute()
+
+    def _recompute(self):
+        self.total = self.buffer.sum(axis=0)
+        self.cross = self.buffer.T @ self.buffer
+
+    def update(self, new_returns):
+        """Intègre une nouvelle journée de rendements (vecteur n_actifs)"""
+        new_returns = np.asarray(new_returns, dtype=float)
+
+        if len(self.buffer) < self.window:
+            self.buffer = np.vstack([self.buffer, new_returns])
+            self._recompute()
+            return self
+
+        oldest = self.buffer[self.position].copy()
+        self.buffer[self.position] = new_returns
+        self.position = (self.position + 1) % self.window
+
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self._recompute()
+        else:
+            self.total += new_returns - oldest
+            self.cross += np.outer(new_returns, new_returns) - np.outer(oldest, oldest)
+        return self
+
+    def covariance(self, annualize=True):
+        n = len(self.buffer)
+        cov = (self.cross - np.outer(self.total, self.total) / n) / (n - 1)
+        return cov * TRADING_DAYS if annualize else cov
+
+
+class EWMACovariance:
+    """Covariance EWMA mise à jour récursivement : C = λC + (1-λ) x x'"""
+
+    def __init__(self, initial_returns, lam=EWMA_LAMBDA):
+        self.lam = lam
+        self.cov = ewma_covariance(initial_returns, lam)
+
+    def update(self, new_returns):
+        new_returns = np.asarray(new_returns, dtype=float)
+        self.cov = self.lam * self.cov + (1 - self.lam) * np.outer(new_returns, new_returns)
+        return self
+
+    def covariance(self, annualize=True):
+        return self.cov * TRADING_DAYS if annualize else self.cov
+
+
+if __name__ == "__main__":
+    # Contrôle du cache : mêmes dates et colonnes, valeurs différentes -> nouvelle matrice
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2024-01-01", periods=500)
+    returns = pd.DataFrame(rng.normal(0, 0.01, (500, 3)), index=dates, columns=["A", "B", "C"])
+
+    first = estimate_covariance(returns)
+    assert estimate_covariance(returns) is first
+    scaled = estimate_covariance(returns * 3)
+    assert np.allclose(scaled.values, first.values * 9), "matrice resservie pour des données modifiées"
+    print(f"Cache covariance : OK ({first.iloc[0, 0]:.4f} puis {scaled.iloc[0, 0]:.4f})")
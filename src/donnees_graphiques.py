@@ -0,0 +1,89 @@
+"""
+Couche de données des graphiques Monte Carlo
+Les trajectoires sont résumées une seule fois (bandes de percentiles par mois,
+échantillon fixe de chemins représentatifs, histogrammes pré-agrégés) :
+le coût du tracé reste constant quel que soit le nombre de simulations.
+"""
+
+import numpy as np
+
+# Percentiles tracés sous forme de bandes (5-95, 25-75, médiane)
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class ReservoirSampler:
+    """Échantillon uniforme de taille fixe sur un flux de trajectoires (algorithme R)"""
+
+    def __init__(self, size=20, seed=0):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.sample = None
+        self.seen = 0
+
+    def add(self, paths):
+        """Ajoute un bloc de trajectoires (n_chemins x n_pas)"""
+        paths = np.atleast_2d(np.asarray(paths))
+        n = len(paths)
+        if n == 0:
+            return
+
+        if self.sample is None:
+            self.sample = np.empty((0, paths.shape[1]), dtype=paths.dtype)
+
+        # Remplissage initial du réservoir
+        n_fill = min(self.size - len(self.sample), n)
+        if n_fill > 0:
+            self.sample = np.vstack([self.sample, paths[:n_fill]])
+
+        # Remplacements : l'élément d'indice global t remplace une case
+        # tirée dans [0, t] si celle-ci est dans le réservoir
+        rest = paths[n_fill:]
+        if len(rest):
+            t = self.seen + n_fill + np.arange(len(rest))
+            slots = (self.rng.random(len(rest)) * (t + 1)).astype(np.int64)
+            keep = slots < self.size
+            slots, rows = slots[keep], np.flatnonzero(keep)
+
+            # Seul le dernier remplaçant de chaque case compte
+            last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+            self.sample[slots[last]] = rest[rows[last]]
+
+        self.seen += n
+
+
+def percentile_bands(paths, percentiles=PERCENTILES):
+    """Percentiles par pas de temps (len(percentiles) x n_pas)"""
+    return np.percentile(np.asarray(paths), percentiles, axis=0)
+
+
+def histogram_counts(values, bins=50):
+    """Histogramme pré-agrégé : (effectifs, bornes)"""
+    return np.histogram(np.asarray(values), bins=max(int(bins), 1))
+
+
+def box_stats(values, label):
+    """Statistiques de boîte à moustaches pour ax.bxp (moustaches 5e-95e percentile)"""
+    p5, p25, p50, p75, p95 = np.percentile(values, PERCENTILES)
+    return {
+        'label': label,
+        'whislo': p5,
+        'q1': p25,
+        'med': p50,
+        'q3': p75,
+        'whishi': p95,
+        'mean': float(np.mean(values)),
+        'fliers': []
+    }
+
+
+def summarize_paths(paths, n_samples=20, percentiles=PERCENTILES, seed=0):
+    """Résume une matrice de trajectoires pour le tracé en éventail"""
+    sampler = ReservoirSampler(n_samples, seed)
+    sampler.add(paths)
+
+    return {
+        'percentiles': percentiles,
+        'bands': percentile_bands(paths, percentiles),
+        'sample': sampler.sample,
+        'n_paths': sampler.seen
+    }
@@ -0,0 +1,324 @@
+"""
+Fournisseurs de données de marché interchangeables
+- YahooProvider / TwelveDataProvider : données en ligne (imports paresseux)
+- ReplayProvider : rejoue des fichiers de fixtures (OHLCV .csv, info .json) ou
+  génère un historique synthétique déterministe, avec latence et pannes simulées
+Le fournisseur par défaut se choisit par la variable d'environnement
+MARKET_DATA_PROVIDER ("replay" pour travailler hors ligne) ou set_provider().
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+PROVIDER_ENV = "MARKET_DATA_PROVIDER"
+FIXTURES_ENV = "MARKET_DATA_FIXTURES"
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Nombre approximatif de séances par période Yahoo Finance
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126,
+    "1y": 252, "2y": 504, "5y": 1260, "10y": 2520, "max": None
+}
+
+# Rééchantillonnage des intervalles supérieurs à la journée
+# (fin de mois : alias "ME" depuis pandas 2.2, "M" auparavant)
+_MONTH_END = "ME" if tuple(int(part) for part in pd.__version__.split(".")[:2]) >= (2, 2) else "M"
+RESAMPLE_RULES = {"1d": None, "1wk": "W-FRI", "1mo": _MONTH_END}
+
+
+class ProviderError(ConnectionError):
+    """Données indisponibles (panne réelle ou simulée)"""
+
+
+def _normalize_ohlcv(df, ticker):
+    """Colonnes OHLCV à plat, quelle que soit la forme renvoyée par yfinance"""
+    if isinstance(df.columns, pd.MultiIndex):
+        # (Ticker, Price) ou (Price, Ticker) selon group_by
+        level = 1 if set(OHLCV_COLUMNS) & set(df.columns.get_level_values(1)) else 0
+        df.columns = df.columns.get_level_values(level)
+    elif "Close" not in df.columns and ticker in df.columns:
+        # yfinance ne renvoie parfois que le prix de clôture
+        df = df.rename(columns={ticker: "Close"})
+    if "Close" in df.columns:
+        for col in ("Open", "High", "Low"):
+            if col not in df.columns:
+                df[col] = df["Close"]
+        if "Volume" not in df.columns:
+            df["Volume"] = 0
+    return df
+
+
+def _slice_history(df, period=None, start=None, end=None):
+    """Restreint un historique quotidien à une période ou à des dates"""
+    if start is not None or end is not None:
+        return df.loc[start:end]
+    if period == "ytd":
+        return df[df.index >= pd.Timestamp(df.index[-1].year, 1, 1)]
+    if period is not None:
+        if period not in PERIOD_DAYS:
+            raise ValueError(f"Période inconnue : {period}")
+        if PERIOD_DAYS[period] is not None:
+            return df.iloc[-PERIOD_DAYS[period]:]
+    return df
+
+
+def _resample(df, interval):
+    if interval not in RESAMPLE_RULES:
+        raise ValueError(f"Intervalle non disponible hors ligne : {interval}")
+    rule = RESAMPLE_RULES[interval]
+    if rule is None:
+        return df
+    return df.resample(rule).agg({'Open': 'first', 'High': 'max', 'Low': 'min',
+                                  'Close': 'last', 'Volume': 'sum'}).dropna(subset=["Close"])
+
+
+class MarketDataProvider:
+    """Interface commune : historique OHLCV, infos société et clôtures alignées"""
+
+    def history(self, ticker, period="6mo", interval="1d", start=None, end=None, auto_adjust=False,
+                outputsize=None):
+        """DataFrame OHLCV indexé par date (vide si aucune donnée), limité aux outputsize dernières barres"""
+        raise NotImplementedError
+
+    def info(self, ticker):
+        """Dictionnaire d'informations (longName, dividendYield, 52WeekChange...)"""
+        return {}
+
+    def download_close(self, tickers, start=None, end=None, period=None):
+        """Clôtures de plusieurs tickers, alignées sur leurs dates communes"""
+        closes = {ticker: self.history(ticker, period=period, start=start, end=end)["Close"]
+                  for ticker in tickers}
+        return pd.DataFrame(closes).dropna()
+
+
+class YahooProvider(MarketDataProvider):
+    """Yahoo Finance via yfinance"""
+
+    def history(self, ticker, period="6mo", interval="1d", start=None, end=None, auto_adjust=False,
+                outputsize=None):
+        import yfinance as yf
+
+        if start is not None or end is not None:
+            period = None
+        df = yf.download(ticker, period=period, interval=interval, start=start, end=end,
+                         group_by="ticker", auto_adjust=auto_adjust, progress=False)
+        if df.empty:
+            return df
+        df = _normalize_ohlcv(df, ticker)
+        return df.tail(outputsize) if outputsize else df
+
+    def info(self, ticker):
+        import yfinance as yf
+        return yf.Ticker(ticker).info
+
+    def download_close(self, tickers, start=None, end=None, period=None):
+        import yfinance as yf
+
+        # Un seul appel groupé pour tous les tickers
+        data = yf.download(list(tickers), start=start, end=end, period=period,
+                           progress=False, group_by="ticker")
+        if data.empty:
+            return pd.DataFrame()
+
+        closes = pd.DataFrame()
+        for ticker in tickers:
+            if ticker in data.columns.get_level_values(0):
+                closes[ticker] = data[ticker]["Close"]
+            elif "Close" in data.columns:
+                closes[ticker] = data["Close"]
+        return closes.dropna()
+
+
+class TwelveDataProvider(MarketDataProvider):
+    """Twelve Data (clé API passée ou lue dans TWELVEDATA_API_KEY)"""
+
+    API_KEY_ENV = "TWELVEDATA_API_KEY"
+    INTERVALS = {"1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min", "1h": "1h",
+                 "1d": "1day", "1wk": "1week", "1mo": "1month"}
+
+    def __init__(self, api_key=None):
+        api_key = api_key or os.environ.get(self.API_KEY_ENV)
+        if not api_key:
+            raise RuntimeError(f"Clé Twelve Data manquante : définissez la variable {self.API_KEY_ENV}")
+
+        from twelvedata import TDClient
+        self.client = TDClient(apikey=api_key)
+
+    def history(self, ticker, period="6mo", interval="1d", start=None, end=None, auto_adjust=False,
+                outputsize=None):
+        if outputsize is None:
+            outputsize = PERIOD_DAYS.get(period) or 5000
+        ts = self.client.time_series(symbol=ticker, interval=self.INTERVALS.get(interval, interval),
+                                     outputsize=outputsize, start_date=start, end_date=end)
+        df = ts.as_pandas().sort_index()
+        return df.rename(columns={"open": "Open", "high": "High", "low": "Low",
+                                  "close": "Close", "volume": "Volume"})
+
+
+class ReplayProvider(MarketDataProvider):
+    """Rejoue des données locales, sans réseau
+
+    Pour chaque ticker, fixture_dir/<TICKER>.csv (OHLCV indexé par date) et
+    fixture_dir/<TICKER>.json (infos) sont servis s'ils existent ; sinon, si
+    synthetic=True, un historique quotidien déterministe (graine dérivée du
+    ticker) est généré sur synthetic_years années jusqu'à end_date.
+    latency : délai par appel en secondes, fixe ou (min, max) tiré au hasard.
+    failure_rate : probabilité qu'un appel lève ProviderError ; les tickers de
+    fail_tickers échouent toujours. Utilisable depuis plusieurs threads.
+    """
+
+    def __init__(self, fixture_dir=None, latency=0.0, failure_rate=0.0, fail_tickers=(),
+                 synthetic=True, end_date="2024-12-31", synthetic_years=10, seed=None):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_tickers = set(fail_tickers)
+        self.synthetic = synthetic
+        self.end_date = pd.Timestamp(end_date)
+        self.synthetic_years = synthetic_years
+
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._frames = {}
+
+    # --- Simulation du réseau
+    def _simulate_network(self, kind, ticker):
+        with self._lock:
+            self.calls[kind] += 1
+            delay = self.latency if np.isscalar(self.latency) else self._random.uniform(*self.latency)
+            failed = ticker in self.fail_tickers or self._random.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            with self._lock:
+                self.calls["failures"] += 1
+            raise ProviderError(f"Panne simulée pour {ticker}")
+
+    # --- Données
+    def _fixture_path(self, ticker, extension):
+        if self.fixture_dir is None:
+            return None
+        path = os.path.join(self.fixture_dir, f"{ticker}.{extension}")
+        return path if os.path.exists(path) else None
+
+    def _synthetic_history(self, ticker):
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        dates = pd.bdate_range(end=self.end_date, periods=252 * self.synthetic_years)
+        n_days = len(dates)
+
+        close = rng.uniform(20, 500) * np.cumprod(1 + rng.normal(0.07 / 252, 0.25 / np.sqrt(252), n_days))
+        open_ = close * (1 + rng.normal(0, 0.005, n_days))
+        spread = np.abs(rng.normal(0, 0.01, n_days))
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + spread),
+            'Low': np.minimum(open_, close) * (1 - spread),
+            'Close': close,
+            'Volume': rng.integers(100_000, 10_000_000, n_days)
+        }, index=pd.DatetimeIndex(dates, name="Date"))
+
+    def _load_history(self, ticker):
+        with self._lock:
+            if ticker in self._frames:
+                return self._frames[ticker]
+
+        path = self._fixture_path(ticker, "csv")
+        if path is not None:
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+        elif self.synthetic:
+            df = self._synthetic_history(ticker)
+        else:
+            df = pd.DataFrame(columns=OHLCV_COLUMNS)
+
+        with self._lock:
+            self._frames[ticker] = df
+        return df
+
+    def history(self, ticker, period="6mo", interval="1d", start=None, end=None, auto_adjust=False,
+                outputsize=None):
+        self._simulate_network("history", ticker)
+        df = self._load_history(ticker)
+        if df.empty:
+            return df.copy()
+        df = _resample(_slice_history(df, period, start, end), interval)
+        return (df.tail(outputsize) if outputsize else df).copy()
+
+    def info(self, ticker):
+        self._simulate_network("info", ticker)
+
+        path = self._fixture_path(ticker, "json")
+        if path is not None:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        if not self.synthetic:
+            return {}
+
+        close = self._load_history(ticker)["Close"]
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()) + 1)
+        return {
+            'symbol': ticker,
+            'longName': f"{ticker} (données synthétiques)",
+            'currency': "EUR" if "." in ticker else "USD",
+            'regularMarketPrice': float(close.iloc[-1]),
+            'dividendYield': round(float(rng.uniform(0.005, 0.04)), 4),
+            '52WeekChange': float(close.iloc[-1] / close.iloc[-min(252, len(close))] - 1)
+        }
+
+
+def record_fixtures(tickers, fixture_dir, provider=None, period="max", interval="1d"):
+    """Enregistre historiques et infos d'un fournisseur (en ligne) comme fixtures"""
+    provider = provider or YahooProvider()
+    os.makedirs(fixture_dir, exist_ok=True)
+
+    for ticker in tickers:
+        provider.history(ticker, period=period, interval=interval).to_csv(
+            os.path.join(fixture_dir, f"{ticker}.csv"))
+        with open(os.path.join(fixture_dir, f"{ticker}.json"), "w", encoding="utf-8") as f:
+            json.dump(provider.info(ticker), f, indent=2, default=str)
+
+
+# ==============================
+# Fournisseur actif
+# ==============================
+PROVIDERS = {
+    'yahoo': YahooProvider,
+    'twelvedata': TwelveDataProvider
+}
+
+_active = {}
+
+
+def set_provider(provider, source=None):
+    """Remplace le fournisseur d'une source ("yahoo", "twelvedata") ou de toutes (source=None)"""
+    _active["*" if source is None else source] = provider
+
+
+def reset_provider():
+    """Revient aux fournisseurs par défaut"""
+    _active.clear()
+
+
+def get_provider(source="yahoo", **kwargs):
+    """Fournisseur actif pour une source ; hors ligne si MARKET_DATA_PROVIDER=replay"""
+    if source in _active:
+        return _active[source]
+    if "*" in _active:
+        return _active["*"]
+
+    if os.environ.get(PROVIDER_ENV, "").lower() == "replay":
+        _active["*"] = ReplayProvider(os.environ.get(FIXTURES_ENV))
+        return _active["*"]
+
+    if source not in PROVIDERS:
+        raise ValueError(f"Source inconnue : {source} (choix : {', '.join(PROVIDERS)})")
+    return PROVIDERS[source](**kwargs)
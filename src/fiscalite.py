@@ -0,0 +1,103 @@
+"""
+Règles fiscales PEA / CTO partagées par les simulateurs
+"""
+
+import numpy as np
+
+# Taux sur les plus-values par scénario fiscal
+TAX_RATES = {
+    "current": {"PEA": 0.172, "CTO": 0.30},
+    "optimistic": {"PEA": 0.15, "CTO": 0.25},     # Baisse hypothétique
+    "pessimistic": {"PEA": 0.20, "CTO": 0.35}     # Hausse hypothétique
+}
+
+# Durée de détention ouvrant droit à l'avantage fiscal du PEA
+PEA_MIN_YEARS = 5
+
+
+def scenario_rates(tax_scenario="current"):
+    """Taux PEA/CTO du scénario (scénario actuel par défaut)"""
+    return TAX_RATES.get(tax_scenario, TAX_RATES["current"])
+
+
+def tax_rate(account_type, years, tax_scenario="current", pea_early_penalty=True):
+    """Taux appliqué aux plus-values selon le compte et la durée de détention
+
+    Avant 5 ans, un retrait du PEA entraîne sa clôture et les gains sont
+    imposés au PFU comme sur un CTO (pea_early_penalty=True).
+    """
+    rates = scenario_rates(tax_scenario)
+
+    if account_type == "PEA":
+        if years >= PEA_MIN_YEARS:
+            return rates["PEA"]
+        return rates["CTO"] if pea_early_penalty else 0.0
+    return rates["CTO"]
+
+
+def tax_on_gains(gains, rate):
+    """Impôt sur les plus-values (aucun impôt sur les moins-values)"""
+    return np.maximum(gains, 0) * rate
+
+
+def tax_rates(account_type, years, tax_scenario="current", pea_early_penalty=True):
+    """Version vectorisée de tax_rate pour un tableau de durées de détention"""
+    rates = scenario_rates(tax_scenario)
+    years = np.asarray(years, dtype=float)
+
+    if account_type == "PEA":
+        early_rate = rates["CTO"] if pea_early_penalty else 0.0
+        return np.where(years >= PEA_MIN_YEARS, rates["PEA"], early_rate)
+    return np.full(years.shape, rates["CTO"])
+
+
+def total_invested(initial_investment=0.0, contributions=None):
+    """Capital versé : apport initial + somme d'un échéancier de versements
+
+    contributions est un échéancier commun (périodes,) ou propre à chaque
+    simulation (simulations x périodes) ; None si aucun versement.
+    """
+    if contributions is None:
+        return np.asarray(initial_investment, dtype=float)
+    return initial_investment + np.asarray(contributions, dtype=float).sum(axis=-1)
+
+
+def tax_analysis_batch(terminal_values, invested, years, tax_scenario="current", pea_early_penalty=True):
+    """Impôt et valeur nette PEA/CTO pour tout un tableau de valeurs finales
+
+    invested et years sont des scalaires ou des tableaux compatibles (broadcast).
+    Avant 5 ans, la clôture du PEA impose les gains au taux du CTO si
+    pea_early_penalty=True (0 % sinon, comme apply_taxation).
+    Renvoie des tableaux : 'gain', 'PEA'/'CTO' ({'tax', 'net', 'rate'}) et
+    'advantage' (valeur nette PEA - CTO).
+    """
+    terminal_values = np.asarray(terminal_values, dtype=float)
+    gain = terminal_values - invested
+
+    result = {'gain': gain}
+    for account in ("PEA", "CTO"):
+        rate = tax_rates(account, years, tax_scenario, pea_early_penalty)
+        tax = tax_on_gains(gain, rate)
+        result[account] = {'tax': tax, 'net': terminal_values - tax, 'rate': rate}
+
+    result['advantage'] = result['PEA']['net'] - result['CTO']['net']
+    return result
+
+
+def summarize_tax_analysis(analysis, percentiles=(5, 25, 50, 75, 95)):
+    """Moyenne et percentiles des impôts, valeurs nettes et avantage PEA"""
+    series = {
+        'pea_tax': analysis['PEA']['tax'],
+        'cto_tax': analysis['CTO']['tax'],
+        'pea_net': analysis['PEA']['net'],
+        'cto_net': analysis['CTO']['net'],
+        'advantage': analysis['advantage']
+    }
+
+    summary = {}
+    for name, values in series.items():
+        values = np.ravel(values)
+        summary[name] = {'mean': values.mean(),
+                         **dict(zip(percentiles, np.percentile(values, percentiles)))}
+    summary['prob_pea_better'] = np.mean(analysis['advantage'] > 0)
+    return summary
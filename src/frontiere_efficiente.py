@@ -0,0 +1,144 @@
+"""
+Frontière efficiente exacte
+Chaque point résout le programme quadratique
+    min w' Σ w   sous   1'w = 1,  μ'w = cible,  bornes ≤ w ≤ bornes
+avec gradients analytiques, chaque résolution partant de la solution précédente.
+"""
+
+import numpy as np
+from scipy.optimize import minimize
+
+from portefeuille import RISK_FREE_RATE, portfolio_metrics_batch
+
+
+def _bounds(bounds, n_assets):
+    """Bornes par actif : un couple (min, max) commun ou une liste de couples"""
+    if bounds is None:
+        bounds = (0.0, 1.0)
+    if np.ndim(bounds) == 1:
+        return [tuple(bounds)] * n_assets
+    if len(bounds) != n_assets:
+        raise ValueError(f"{len(bounds)} bornes fournies pour {n_assets} actifs")
+    return [tuple(b) for b in bounds]
+
+
+def _solve(cov_matrix, bounds, x0, annual_returns=None, target_return=None):
+    """Variance minimale, avec contrainte de rendement cible facultative"""
+    n_assets = len(cov_matrix)
+
+    constraints = [{'type': 'eq', 'fun': lambda w: np.sum(w) - 1, 'jac': lambda w: np.ones(n_assets)}]
+    if target_return is not None:
+        constraints.append({'type': 'eq', 'fun': lambda w: annual_returns @ w - target_return,
+                            'jac': lambda w: annual_returns})
+
+    result = minimize(
+        lambda w: w @ cov_matrix @ w, x0,
+        jac=lambda w: 2 * cov_matrix @ w,
+        method='SLSQP', bounds=bounds, constraints=constraints,
+        options={'ftol': 1e-12, 'maxiter': 500}
+    )
+    return result
+
+
+def min_variance_portfolio(cov_matrix, bounds=(0.0, 1.0), x0=None):
+    """Portefeuille de variance minimale (None si l'optimisation échoue)"""
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    n_assets = len(cov_matrix)
+    x0 = np.ones(n_assets) / n_assets if x0 is None else x0
+
+    result = _solve(cov_matrix, _bounds(bounds, n_assets), x0)
+    return result.x if result.success else None
+
+
+def max_return_portfolio(annual_returns, bounds=(0.0, 1.0)):
+    """Rendement maximal sous contraintes de bornes (solution gloutonne exacte)"""
+    annual_returns = np.asarray(annual_returns, dtype=float)
+    bounds = _bounds(bounds, len(annual_returns))
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+
+    # Chaque actif reçoit son minimum, le reste va aux meilleurs rendements
+    weights = lower.copy()
+    remaining = 1 - weights.sum()
+    for i in np.argsort(annual_returns)[::-1]:
+        add = min(upper[i] - lower[i], remaining)
+        weights[i] += add
+        remaining -= add
+        if remaining <= 0:
+            break
+    return weights
+
+
+def max_sharpe_portfolio(annual_returns, cov_matrix, bounds=(0.0, 1.0), risk_free=RISK_FREE_RATE, x0=None):
+    """Portefeuille de ratio de Sharpe maximal (None si l'optimisation échoue)
+
+    Gradient analytique de -(μ'w - rf) / σ(w) ; x0 sert de démarrage à chaud,
+    typiquement le meilleur point d'une frontière déjà tracée (sinon le
+    portefeuille de variance minimale).
+    """
+    annual_returns = np.asarray(annual_returns, dtype=float)
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    n_assets = len(annual_returns)
+    bounds = _bounds(bounds, n_assets)
+    if x0 is None:
+        x0 = min_variance_portfolio(cov_matrix, bounds)
+        if x0 is None:
+            return None
+
+    def objective(w):
+        cov_w = cov_matrix @ w
+        vol = np.sqrt(w @ cov_w)
+        excess = annual_returns @ w - risk_free
+        return -excess / vol, -(annual_returns / vol - excess * cov_w / vol ** 3)
+
+    result = minimize(
+        objective, x0, jac=True,
+        method='SLSQP', bounds=bounds,
+        constraints=[{'type': 'eq', 'fun': lambda w: np.sum(w) - 1, 'jac': lambda w: np.ones(n_assets)}],
+        options={'ftol': 1e-12, 'maxiter': 500}
+    )
+    return result.x if result.success else None
+
+
+def efficient_frontier(annual_returns, cov_matrix, n_points=50, bounds=(0.0, 1.0),
+                       risk_free=RISK_FREE_RATE):
+    """Trace n_points de la frontière, du portefeuille de variance minimale au rendement maximal
+
+    Renvoie un dict de tableaux : 'returns', 'volatilities', 'sharpe' (n_points)
+    et 'weights' (n_points x n_actifs). Les cibles non atteintes sont ignorées.
+    """
+    annual_returns = np.asarray(annual_returns, dtype=float)
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+    n_assets = len(annual_returns)
+    bounds = _bounds(bounds, n_assets)
+
+    lower = np.array([b[0] for b in bounds], dtype=float)
+    upper = np.array([b[1] for b in bounds], dtype=float)
+    if lower.sum() > 1 or upper.sum() < 1:
+        raise ValueError("Bornes incompatibles avec des poids de somme 1")
+
+    w_min = min_variance_portfolio(cov_matrix, bounds)
+    if w_min is None:
+        raise RuntimeError("Échec du calcul du portefeuille de variance minimale")
+    w_max = max_return_portfolio(annual_returns, bounds)
+
+    targets = np.linspace(annual_returns @ w_min, annual_returns @ w_max, n_points)
+
+    weights = [w_min]
+    x0 = w_min
+    for target in targets[1:]:
+        # Démarrage à chaud depuis la solution précédente
+        result = _solve(cov_matrix, bounds, x0, annual_returns, target)
+        if result.success:
+            x0 = np.clip(result.x, lower, upper)
+            weights.append(x0)
+
+    weights = np.array(weights)
+    rets, vols, sharpe = portfolio_metrics_batch(weights, annual_returns, cov_matrix, risk_free)
+
+    return {
+        'returns': rets,
+        'volatilities': vols,
+        'sharpe': sharpe,
+        'weights': weights
+    }
@@ -0,0 +1,257 @@
+"""
+Graphiques Tk à artistes persistants
+Chaque graphique crée ses artistes matplotlib une seule fois puis met à jour
+leurs données en place ; le rafraîchissement passe par canvas.draw_idle()
+au lieu de ax.clear() + tight_layout() + canvas.draw() à chaque simulation.
+"""
+
+import numpy as np
+from matplotlib.patches import Polygon
+from matplotlib.ticker import FuncFormatter
+
+from instrumentation import instrumented
+
+PLACEHOLDER_TEXT = "Aucune donnée disponible\n\nExécutez une simulation"
+
+euro_formatter = FuncFormatter(lambda x, p: f'{x:,.0f} €')
+
+
+def band_vertices(x, lower, upper):
+    """Sommets du polygone compris entre deux courbes"""
+    x = np.asarray(x)
+    return np.column_stack([np.concatenate([x, x[::-1]]),
+                            np.concatenate([lower, np.asarray(upper)[::-1]])])
+
+
+class PersistentChart:
+    """Base : artistes créés au premier affichage, puis mis à jour en place"""
+
+    def __init__(self, ax, canvas, colors):
+        self.ax = ax
+        self.canvas = canvas
+        self.colors = colors
+        self.artists = []
+        self.created = False
+        self.placeholder = ax.text(0.5, 0.5, PLACEHOLDER_TEXT, ha='center', va='center',
+                                   transform=ax.transAxes, fontsize=12, color='gray',
+                                   visible=False)
+
+    def create(self):
+        """Crée les artistes (à surcharger) et les enregistre dans self.artists"""
+        raise NotImplementedError
+
+    def set_data(self, *args, **kwargs):
+        """Met à jour les données des artistes (à surcharger)"""
+        raise NotImplementedError
+
+    @instrumented("plot")
+    def update(self, *args, **kwargs):
+        """Affiche de nouvelles données sans recréer les artistes"""
+        first = not self.created
+        if first:
+            self.create()
+            self.created = True
+
+        self.placeholder.set_visible(False)
+        for artist in self.artists:
+            artist.set_visible(True)
+
+        self.set_data(*args, **kwargs)
+
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+
+        # La mise en page n'est calculée qu'à la création des artistes
+        if first:
+            self.ax.figure.tight_layout()
+        self.canvas.draw_idle()
+
+    def reset(self):
+        """Masque les données et affiche le message d'attente"""
+        for artist in self.artists:
+            artist.set_visible(False)
+        self.placeholder.set_visible(True)
+        self.canvas.draw_idle()
+
+
+class SimpleChart(PersistentChart):
+    """Évolution de la valeur du portefeuille (simulation simple)"""
+
+    def create(self):
+        ax = self.ax
+        self.value_line, = ax.plot([], [], label='PEA', color=self.colors['pea'], linewidth=2)
+        self.invested_line = ax.axhline(y=0, color='gray', linestyle='--', alpha=0.5, label="Investissement")
+
+        ax.set_xlabel("Années")
+        ax.set_ylabel("Valeur (€)")
+        ax.grid(True, alpha=0.3)
+        ax.yaxis.set_major_formatter(euro_formatter)
+        self.legend = ax.legend()
+
+        self.artists = [self.value_line, self.invested_line, self.legend]
+
+    def set_data(self, time_axis, values, total_invested, title):
+        self.value_line.set_data(time_axis, values)
+        self.invested_line.set_ydata([total_invested, total_invested])
+        self.legend.get_texts()[1].set_text(f"Investissement: {total_invested:,.0f} €")
+        self.ax.set_title(title)
+
+
+class MonteCarloChart(PersistentChart):
+    """Éventail des trajectoires et boîtes à moustaches PEA/CTO"""
+
+    def __init__(self, ax_paths, ax_box, canvas, colors, n_samples=20):
+        super().__init__(ax_paths, canvas, colors)
+        self.ax_box = ax_box
+        self.n_samples = n_samples
+        self.box_placeholder = ax_box.text(0.5, 0.5, PLACEHOLDER_TEXT, ha='center', va='center',
+                                           transform=ax_box.transAxes, fontsize=12, color='gray',
+                                           visible=False)
+
+    def create(self):
+        ax, ax_box = self.ax, self.ax_box
+        color = self.colors['chart_1']
+
+        # Éventail des trajectoires
+        self.sample_lines = [ax.plot([], [], color='gray', linewidth=0.5, alpha=0.4)[0]
+                             for _ in range(self.n_samples)]
+        self.outer_band = ax.add_patch(Polygon(np.zeros((1, 2)), closed=True, color=color,
+                                               alpha=0.15, linewidth=0, label='5e-95e percentile'))
+        self.inner_band = ax.add_patch(Polygon(np.zeros((1, 2)), closed=True, color=color,
+                                               alpha=0.3, linewidth=0, label='25e-75e percentile'))
+        self.median_line, = ax.plot([], [], color=color, linewidth=2, label='Médiane')
+
+        ax.set_xlabel("Années")
+        ax.set_ylabel("Prix de l'action (€)")
+        ax.grid(True, alpha=0.3)
+        path_legend = ax.legend(loc='upper left', fontsize=8)
+
+        # Boîtes à moustaches (rectangles + moustaches + médianes)
+        positions = np.array([1, 2])
+        self.boxes = ax_box.bar(positions, [0, 0], width=0.5, bottom=[0, 0],
+                                color=[self.colors['pea'], self.colors['cto']], edgecolor='black')
+        self.whiskers = [ax_box.plot([], [], color='black', linewidth=1)[0] for _ in positions]
+        self.medians = [ax_box.plot([], [], color='black', linewidth=2)[0] for _ in positions]
+        self.median_texts = [ax_box.text(p, 0, "", ha='center', va='bottom', fontweight='bold')
+                             for p in positions]
+
+        ax_box.set_xticks(positions)
+        ax_box.set_xticklabels(['PEA', 'CTO'])
+        ax_box.set_xlim(0.5, 2.5)
+        ax_box.set_ylabel("Valeur finale nette (€)")
+        ax_box.set_title("Distribution des résultats - Monte Carlo")
+        ax_box.grid(True, alpha=0.3)
+
+        self.artists = (self.sample_lines + [self.outer_band, self.inner_band, self.median_line, path_legend]
+                        + list(self.boxes) + self.whiskers + self.medians + self.median_texts)
+
+    def set_data(self, paths, box_stats):
+        bands = paths['bands']
+        time_axis = np.arange(bands.shape[1]) / 12
+
+        # Trajectoires échantillonnées (les lignes inutilisées restent vides)
+        sample = paths['sample']
+        for i, line in enumerate(self.sample_lines):
+            if i < len(sample):
+                line.set_data(time_axis, sample[i])
+            else:
+                line.set_data([], [])
+
+        self.outer_band.set_xy(band_vertices(time_axis, bands[0], bands[4]))
+        self.inner_band.set_xy(band_vertices(time_axis, bands[1], bands[3]))
+        self.median_line.set_data(time_axis, bands[2])
+        self.ax.set_title(f"Trajectoires simulées ({paths['n_paths']:,})")
+
+        # Boîtes : rectangle q1-q3, moustaches 5e-95e, médiane annotée
+        for i, stats in enumerate(box_stats):
+            position = i + 1
+            half = 0.125
+            self.boxes[i].set_y(stats['q1'])
+            self.boxes[i].set_height(stats['q3'] - stats['q1'])
+            self.whiskers[i].set_data(
+                [position, position, np.nan, position, position, np.nan,
+                 position - half, position + half, np.nan, position - half, position + half],
+                [stats['whislo'], stats['q1'], np.nan, stats['q3'], stats['whishi'], np.nan,
+                 stats['whislo'], stats['whislo'], np.nan, stats['whishi'], stats['whishi']]
+            )
+            self.medians[i].set_data([position - 0.25, position + 0.25], [stats['med'], stats['med']])
+            self.median_texts[i].set_position((position, stats['med']))
+            self.median_texts[i].set_text(f"{stats['med']:,.0f} €")
+
+        self.ax_box.relim(visible_only=True)
+        self.ax_box.autoscale_view(scalex=False)
+
+    def reset(self):
+        self.box_placeholder.set_visible(True)
+        super().reset()
+
+    def update(self, *args, **kwargs):
+        self.box_placeholder.set_visible(False)
+        super().update(*args, **kwargs)
+
+
+class ComparisonChart(PersistentChart):
+    """Barres PEA/CTO par métrique"""
+
+    categories = ['Valeur finale', 'Gain net', 'Impôts payés', 'CAGR']
+    percent_categories = {'CAGR'}  # Métriques affichées en %, les autres en euros
+
+    def create(self):
+        ax = self.ax
+        x = np.arange(len(self.categories))
+        width = 0.35
+        zeros = np.zeros(len(self.categories))
+
+        self.pea_bars = ax.bar(x - width/2, zeros, width, label='PEA', color=self.colors['pea'])
+        self.cto_bars = ax.bar(x + width/2, zeros, width, label='CTO', color=self.colors['cto'])
+        self.labels = [ax.text(bar.get_x() + bar.get_width()/2., 0, "", ha='center', va='bottom')
+                       for bars in [self.pea_bars, self.cto_bars] for bar in bars]
+
+        ax.set_xlabel("Métriques")
+        ax.set_ylabel("Valeur")
+        ax.set_title("Comparaison PEA vs CTO")
+        ax.set_xticks(x)
+        ax.set_xticklabels(self.categories)
+        legend = ax.legend()
+        ax.grid(True, alpha=0.3, axis='y')
+
+        self.artists = list(self.pea_bars) + list(self.cto_bars) + self.labels + [legend]
+
+    def set_data(self, pea_values, cto_values):
+        bars = list(self.pea_bars) + list(self.cto_bars)
+        categories = self.categories * 2
+        for bar, label, category, height in zip(bars, self.labels, categories, list(pea_values) + list(cto_values)):
+            bar.set_height(height)
+            label.set_y(height)
+            if category in self.percent_categories:
+                label.set_text(f'{height:.1f}%')
+            else:
+                label.set_text(f'{height:,.0f}')
+
+
+class DistributionChart(PersistentChart):
+    """Histogramme pré-agrégé des valeurs finales"""
+
+    def create(self):
+        ax = self.ax
+        self.steps = ax.stairs([0], [0, 1], fill=True, alpha=0.7,
+                               color=self.colors['chart_1'], edgecolor='black')
+        self.mean_line = ax.axvline(0, color='red', linestyle='--', linewidth=2, label='Moyenne')
+        self.median_line = ax.axvline(0, color='green', linestyle='--', linewidth=2, label='Médiane')
+
+        ax.set_xlabel("Valeur finale nette (€)")
+        ax.set_ylabel("Fréquence")
+        ax.set_title("Distribution des résultats - PEA")
+        self.legend = ax.legend()
+        ax.grid(True, alpha=0.3)
+
+        self.artists = [self.steps, self.mean_line, self.median_line, self.legend]
+
+    def set_data(self, counts, edges, mean_val, median_val):
+        self.steps.set_data(counts, edges)
+        self.mean_line.set_xdata([mean_val, mean_val])
+        self.median_line.set_xdata([median_val, median_val])
+
+        texts = self.legend.get_texts()
+        texts[0].set_text(f'Moyenne: {mean_val:,.0f} €')
+        texts[1].set_text(f'Médiane: {median_val:,.0f} €')
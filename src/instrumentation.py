@@ -0,0 +1,231 @@
+"""
+Instrumentation des étapes (récupération, simulation, fiscalité, statistiques,
+graphiques, export) : temps réel, nombre d'appels et pic mémoire par étape.
+
+    with stage("simulate"): ...          # gestionnaire de contexte
+    @instrumented("tax")                  # décorateur
+
+Variables d'environnement :
+- STOCK_PROFILE : "tracemalloc" (pic mémoire Python par étape), "cprofile"
+  (profil des étapes de premier niveau, écrit en sortie de programme) ou "all"
+- STOCK_PROFILE_LOG : fichier JSON lines recevant un événement par étape
+
+Le profileur cProfile et le pic tracemalloc sont propres au processus : le
+profil couvre les périodes où au moins une étape de premier niveau est en
+cours (tous threads confondus), et le pic mémoire d'une étape n'est pas
+attribué (None) si elle a chevauché une étape d'un autre thread.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_ENV = "STOCK_PROFILE"
+LOG_ENV = "STOCK_PROFILE_LOG"
+PROFILE_DIR = os.path.join("outputs", "profils")
+
+STAGES = ("fetch", "simulate", "tax", "stats", "plot", "export")
+
+
+def _max_rss_mb():
+    """Pic de mémoire résidente du processus (Mo), None si indisponible"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, kilo-octets sous Linux
+    return rss / 2 ** 20 if sys.platform == "darwin" else rss / 2 ** 10
+
+
+class StageStats:
+    """Statistiques cumulées d'une étape"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.peak_memory = None  # Pic Python (Mo), mode tracemalloc uniquement
+
+    def add(self, elapsed, peak_memory=None):
+        self.calls += 1
+        self.total += elapsed
+        self.min = min(self.min, elapsed)
+        self.max = max(self.max, elapsed)
+        if peak_memory is not None:
+            self.peak_memory = max(self.peak_memory or 0.0, peak_memory)
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'calls': self.calls,
+            'total_s': self.total,
+            'mean_s': self.total / self.calls if self.calls else 0.0,
+            'min_s': self.min if self.calls else 0.0,
+            'max_s': self.max,
+            'peak_memory_mb': self.peak_memory
+        }
+
+
+class Recorder:
+    """Collecte les mesures par étape ; thread-safe, étapes imbriquées autorisées"""
+
+    def __init__(self, mode=None, log_path=None):
+        mode = (mode or "").lower()
+        self.trace_memory = mode in ("tracemalloc", "all")
+        self.profile = mode in ("cprofile", "all")
+        self.log_path = log_path
+
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiler = None
+        self._active = 0    # Étapes de premier niveau en cours, tous threads confondus
+        self._overlaps = 0  # Nombre de fois où deux threads ont eu une étape en cours
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            atexit.register(self.dump_profile)
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name, **details):
+        """Mesure le bloc sous le nom d'étape `name` ; details est ajouté au journal"""
+        stack = self._stack()
+        outermost = not stack
+        frame = {'name': name, **self._enter(outermost)}
+
+        # Pic mémoire du processus : mesuré seulement quand ce thread est seul à avoir une étape en cours
+        if self.trace_memory and not frame['shared']:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Le pic du parent est conservé avant la remise à zéro
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame.update(start_memory=current, peak=current)
+
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield frame
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            shared = self._exit(frame, outermost)
+
+            peak_memory = None
+            if self.trace_memory and not shared:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                peak_memory = (peak - frame['start_memory']) / 2 ** 20
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+
+            with self._lock:
+                self.stats.setdefault(name, StageStats(name)).add(elapsed, peak_memory)
+            if self.log_path:
+                self._log({'time': datetime.now().isoformat(timespec="milliseconds"), 'stage': name,
+                           'elapsed_s': elapsed, 'depth': len(stack), 'peak_memory_mb': peak_memory,
+                           'max_rss_mb': _max_rss_mb(), **details})
+
+    def _enter(self, outermost):
+        # Profileur et pic tracemalloc partagés par les threads (inutile sans l'un ni l'autre)
+        if not (self.trace_memory or self._profiler is not None):
+            return {'shared': False, 'overlaps': 0}
+        with self._lock:
+            if outermost:
+                self._active += 1
+                if self._active > 1:
+                    self._overlaps += 1
+                elif self._profiler is not None:
+                    self._profiler.enable()  # Première étape en cours, tous threads confondus
+            return {'shared': self._active > 1, 'overlaps': self._overlaps}
+
+    def _exit(self, frame, outermost):
+        # Vrai si l'étape a chevauché une étape d'un autre thread
+        if not (self.trace_memory or self._profiler is not None):
+            return False
+        with self._lock:
+            if outermost:
+                self._active -= 1
+                if self._active == 0 and self._profiler is not None:
+                    self._profiler.disable()
+            return frame['shared'] or self._overlaps != frame['overlaps']
+
+    def _log(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def report(self):
+        """Statistiques par étape (liste de dicts, étapes les plus coûteuses d'abord)"""
+        with self._lock:
+            rows = [stats.as_dict() for stats in self.stats.values()]
+        return sorted(rows, key=lambda row: row['total_s'], reverse=True)
+
+    def write_jsonl(self, path):
+        """Écrit le rapport courant, une ligne JSON par étape"""
+        with open(path, "w", encoding="utf-8") as f:
+            for row in self.report():
+                f.write(json.dumps(row) + "\n")
+
+    def format_report(self):
+        """Rapport texte aligné"""
+        lines = [f"{'Étape':<12}{'Appels':>8}{'Total (ms)':>12}{'Moyen (ms)':>12}{'Max (ms)':>10}{'Pic (Mo)':>10}"]
+        for row in self.report():
+            peak = f"{row['peak_memory_mb']:.1f}" if row['peak_memory_mb'] is not None else "-"
+            lines.append(f"{row['stage']:<12}{row['calls']:>8}{row['total_s'] * 1e3:>12.1f}"
+                         f"{row['mean_s'] * 1e3:>12.2f}{row['max_s'] * 1e3:>10.1f}{peak:>10}")
+        rss = _max_rss_mb()
+        if rss is not None:
+            lines.append(f"Pic mémoire du processus : {rss:.0f} Mo")
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+    def dump_profile(self, path=None):
+        """Écrit le profil cProfile (.prof, lisible avec pstats/snakeviz)"""
+        if self._profiler is None:
+            return None
+        if path is None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"profil_{datetime.now():%Y%m%d_%H%M%S}.prof")
+        self._profiler.dump_stats(path)
+        return path
+
+
+recorder = Recorder(os.environ.get(PROFILE_ENV), os.environ.get(LOG_ENV))
+
+
+def stage(name, **details):
+    """Gestionnaire de contexte mesurant une étape avec l'enregistreur global"""
+    return recorder.stage(name, **details)
+
+
+def instrumented(name):
+    """Décorateur : chaque appel de la fonction est mesuré comme l'étape `name`"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with recorder.stage(name, function=func.__qualname__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 """
 Script de lancement du simulateur d'actions
+Les dépendances sont détectées sans être importées (importlib.util.find_spec) :
+les modules lourds ne sont chargés qu'à leur première utilisation.
 """
 
+import importlib.util
 import subprocess
 import sys
 import os
@@ -19,14 +22,14 @@ def check_requirements():
     print("🔍 Vérification des dépendances...")
     
     for package in requirements:
-        try:
-            __import__(package.replace("-", "_"))
+        if importlib.util.find_spec(package.replace("-", "_")) is not None:
             print(f"✅ {package} est installé")
-        except ImportError:
+        else:
             print(f"⚠️  {package} n'est pas installé")
             install = input(f"Installer {package}? (o/n): ")
             if install.lower() == 'o':
                 subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+                importlib.invalidate_caches()
                 print(f"✅ {package} installé avec succès")
     
     print("\n✅ Toutes les dépendances sont vérifiées!")
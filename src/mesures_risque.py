@@ -0,0 +1,162 @@
+"""
+Mesures de risque dépendant de la trajectoire, calculées en lot
+Chaque trajectoire de valeur du portefeuille (trajectoires x mois) est réduite
+à quelques indicateurs, par blocs de trajectoires parcourus mois par mois :
+- drawdown maximal et durée sous l'eau, sur l'indice de performance (hors versements)
+- nombre de mois sous le capital versé
+- ratio de Sortino annualisé
+- sommets atteints à intervalles réguliers (probabilité d'atteindre un objectif)
+puis résumée en distributions et tableaux (VaR / CVaR des valeurs finales).
+"""
+
+import numpy as np
+
+RISK_FREE_RATE = 2.0  # Taux sans risque annuel (%)
+
+# Indicateurs par trajectoire, dans l'ordre des tableaux de synthèse
+PATH_METRICS = {
+    'max_drawdown': "Drawdown maximal (%)",
+    'underwater_months': "Durée sous l'eau max (mois)",
+    'months_below_invested': "Mois sous le capital versé",
+    'sortino': "Ratio de Sortino"
+}
+
+
+class PathRiskTracker:
+    """Indicateurs de risque par trajectoire, alimentés bloc par bloc
+
+    add a la signature du rappel on_block de simulate_gross ; les blocs
+    peuvent arriver dans n'importe quel ordre. Les sommets de valeur sont
+    relevés tous les peak_step mois (12 : fin de chaque année).
+    """
+
+    def __init__(self, n_paths, months, initial_investment, monthly_investment,
+                 risk_free_rate=RISK_FREE_RATE, peak_step=12):
+        self.initial_investment = float(initial_investment)
+        self.monthly_investment = max(float(monthly_investment), 0.0)
+        self.monthly_risk_free = risk_free_rate / 100 / 12
+        self.peak_step = peak_step
+        self.metrics = {name: np.empty(n_paths) for name in PATH_METRICS}
+        self.peak_months = np.arange(peak_step, months + 1, peak_step)
+        self.peaks = np.empty((n_paths, len(self.peak_months)), np.float32)
+
+    def add(self, start, stop, paths, values):
+        """Ajoute les valeurs mensuelles (stop-start x mois, à partir du mois 1) d'un bloc
+
+        Parcours mois par mois avec un état par trajectoire (indice, sommet,
+        série sous l'eau...) : chaque opération porte sur un vecteur de
+        trajectoires, bien plus rapide que les cumuls NumPy le long d'un axe.
+        """
+        values = np.array(np.asarray(values).T, dtype=np.float64, order="C")  # mois x trajectoires
+        months, n = values.shape
+        contribution = self.monthly_investment
+
+        previous = np.full(n, self.initial_investment)
+        index = np.ones(n)            # Indice de performance hors versements
+        peak = np.ones(n)             # Sommet de l'indice
+        max_drawdown = np.zeros(n)
+        streak = np.zeros(n)          # Mois consécutifs sous le sommet
+        max_streak = np.zeros(n)
+        below_invested = np.zeros(n)
+        excess_sum = np.zeros(n)
+        downside_sum = np.zeros(n)
+        growth = np.empty(n)
+        drawdown = np.empty(n)
+        peak_rows = {month - 1: i for i, month in enumerate(self.peak_months)}
+        peaks = np.empty((len(peak_rows), n))
+        value_peak = np.zeros(n)
+
+        for t in range(months):
+            value = values[t]
+
+            # Rendement mensuel hors versement : (V_t - versement) / V_{t-1}
+            np.subtract(value, contribution, out=growth)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.divide(growth, previous, out=growth, where=previous > 0)
+            growth[previous <= 0] = 1.0
+            previous = value
+
+            index *= growth
+            np.maximum(peak, index, out=peak)
+            np.divide(index, peak, out=drawdown)
+            drawdown -= 1
+            np.minimum(max_drawdown, drawdown, out=max_drawdown)
+
+            underwater = drawdown < -1e-12
+            streak += 1
+            streak[~underwater] = 0
+            np.maximum(max_streak, streak, out=max_streak)
+
+            below_invested += value < self.initial_investment + contribution * (t + 1)
+
+            growth -= 1 + self.monthly_risk_free
+            excess_sum += growth
+            np.minimum(growth, 0, out=growth)
+            downside_sum += growth * growth
+
+            np.maximum(value_peak, value, out=value_peak)
+            if t in peak_rows:
+                peaks[peak_rows[t]] = value_peak
+
+        self.metrics['max_drawdown'][start:stop] = max_drawdown * 100
+        self.metrics['underwater_months'][start:stop] = max_streak
+        self.metrics['months_below_invested'][start:stop] = below_invested
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Sortino annualisé : excès de rendement moyen / écart à la baisse
+            self.metrics['sortino'][start:stop] = excess_sum / np.sqrt(downside_sum) * np.sqrt(12 / months)
+        self.peaks[start:stop] = peaks.T
+
+    def results(self):
+        """Indicateurs par trajectoire, plus 'peaks' (trajectoires x relevés) et 'peak_months'"""
+        return {**self.metrics, 'peaks': self.peaks, 'peak_months': self.peak_months}
+
+
+def path_risk_metrics(value_history, initial_investment, monthly_investment,
+                      risk_free_rate=RISK_FREE_RATE, peak_step=12, block_size=10_000):
+    """Indicateurs de risque d'une matrice de valeurs existante (ndarray ou memmap), par blocs"""
+    n_paths, months = value_history.shape
+    tracker = PathRiskTracker(n_paths, months, initial_investment, monthly_investment,
+                              risk_free_rate, peak_step)
+    for start in range(0, n_paths, block_size):
+        stop = min(start + block_size, n_paths)
+        tracker.add(start, stop, None, value_history[start:stop])
+    return tracker.results()
+
+
+def expected_shortfall(values, confidence=95.0):
+    """VaR et CVaR (moyenne des valeurs sous la VaR) au niveau de confiance donné (%)"""
+    values = np.asarray(values, dtype=float)
+    var = np.percentile(values, 100 - confidence)
+    tail = values[values <= var]
+    return float(var), float(tail.mean() if len(tail) else var)
+
+
+def goal_probability(peaks, goal):
+    """Probabilité (%) d'avoir atteint goal au moins une fois à chaque relevé de peaks"""
+    return (np.asarray(peaks) >= goal).mean(axis=0) * 100
+
+
+def distribution_summary(values, percentiles=(5, 25, 50, 75, 95)):
+    """Moyenne et percentiles d'une distribution (valeurs non finies ignorées)"""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {'mean': np.nan, **{f'p{p}': np.nan for p in percentiles}}
+    return {'mean': float(values.mean()),
+            **{f'p{p}': float(q) for p, q in zip(percentiles, np.percentile(values, percentiles))}}
+
+
+def summarize_risk(metrics, terminal_values, confidence=95.0):
+    """Tableaux de synthèse
+
+    metrics : indicateurs par trajectoire (PathRiskTracker.results) ;
+    terminal_values : dict compte -> valeurs finales nettes. Renvoie
+    'paths' (une ligne par indicateur) et 'tail' (VaR / CVaR par compte).
+    """
+    paths = [{'metric': name, 'label': label, **distribution_summary(metrics[name])}
+             for name, label in PATH_METRICS.items() if name in metrics]
+    tail = []
+    for account, values in terminal_values.items():
+        var, cvar = expected_shortfall(values, confidence)
+        tail.append({'account': account, 'confidence': confidence, 'var': var, 'cvar': cvar})
+    return {'paths': paths, 'tail': tail}
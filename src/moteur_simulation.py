@@ -0,0 +1,285 @@
+"""
+Moteur de simulation vectorisé en deux étapes
+- simulate_gross : trajectoires de prix et valeur du portefeuille avant impôts,
+  toutes les trajectoires en un passage (tableaux trajectoires x mois)
+- evaluate_scenarios : scénarios fiscaux, types de compte et taux d'inflation
+  appliqués comme transformations vectorisées de la distribution brute,
+  calculée une seule fois ; l'inflation (déterministe ou stochastique) donne
+  les valeurs, versements, CAGR et VaR en euros d'aujourd'hui
+"""
+
+import threading
+
+import numpy as np
+
+from fiscalite import TAX_RATES, tax_rate
+
+# À incrémenter dès que les trajectoires ou la valeur avant impôts changent
+ENGINE_VERSION = 3
+
+ACCOUNTS = ("PEA", "CTO")
+
+# Mode compact : trajectoires et valeurs en float32 (moitié de la mémoire par trajectoire)
+COMPACT_DTYPE = np.float32
+COMPACT_THRESHOLD = 50_000  # Nombre de trajectoires à partir duquel le simulateur passe en compact
+
+
+# Générateur historique (MT19937) par thread : le réensemencer coûte bien moins que le créer
+_generators = threading.local()
+
+
+def _legacy_generator():
+    if not hasattr(_generators, "generator"):
+        _generators.generator = np.random.RandomState()
+    return _generators.generator
+
+
+def legacy_normals(seeds, mean, std, size, out=None):
+    """Tirages normaux (len(seeds) x size), ligne i identique à np.random.seed(seeds[i]) + normal
+
+    out : tableau préalloué (éventuellement float32) rempli ligne par ligne.
+    """
+    draws = np.empty((len(seeds), size)) if out is None else out
+    generator = _legacy_generator()
+    for row, seed in zip(draws, seeds):
+        generator.seed(seed)
+        row[:] = generator.normal(mean, std, size)
+    return draws
+
+
+def simulate_price_paths(initial_price, years, annual_return, volatility, dividend_yield, seeds,
+                         dtype=np.float64, out=None):
+    """Trajectoires de prix mensuelles (len(seeds) x mois+1), dividendes réinvestis
+
+    Même modèle et mêmes tirages que AdvancedStockSimulator.simulate_price_path
+    (une seed par trajectoire) : p_{t+1} = p_t * (1 + r_t + dividende mensuel).
+    Calcul en place dans out (ou un tableau de type dtype), sans temporaire.
+    """
+    months = int(years * 12)
+    monthly_return = annual_return / 100 / 12
+    monthly_vol = volatility / 100 / np.sqrt(12)
+    monthly_dividend = dividend_yield / 100 / 12
+
+    paths = np.empty((len(seeds), months + 1), dtype) if out is None else out
+    paths[:, 0] = initial_price
+
+    growth = legacy_normals(seeds, monthly_return, monthly_vol, months, out=paths[:, 1:])
+    growth += 1 + monthly_dividend
+    np.cumprod(growth, axis=1, out=growth)
+    growth *= initial_price
+    return paths
+
+
+def portfolio_values(price_paths, initial_investment, monthly_investment, out=None):
+    """Valeur mensuelle du portefeuille (trajectoires x mois) et capital versé
+
+    Apport initial au premier prix puis versement mensuel au prix de chaque
+    mois, comme calculate_portfolio_value. Calcul en place dans out (ou un
+    tableau du type de price_paths).
+    """
+    months = price_paths.shape[1] - 1
+    prices = price_paths[:, 1:]
+    values = np.empty(prices.shape, price_paths.dtype) if out is None else out
+
+    # Nombre de parts détenues chaque mois, puis valeur
+    if monthly_investment > 0:
+        np.divide(monthly_investment, prices, out=values)
+        np.cumsum(values, axis=1, out=values)
+        values += (initial_investment / price_paths[:, :1]).astype(values.dtype)
+    else:
+        values[:] = initial_investment / price_paths[:, :1]
+    values *= prices
+
+    invested = initial_investment + (monthly_investment * months if monthly_investment > 0 else 0.0)
+    return values, float(invested)
+
+
+def simulate_gross(params, n_paths, first_seed=0, keep_paths=True, dtype=np.float64, block_size=10_000,
+                   price_out=None, value_out=None, on_block=None):
+    """Étape avant impôts pour les paramètres de get_simulation_params
+
+    Trajectoire i tirée avec la seed first_seed + i, par blocs de block_size
+    trajectoires (les temporaires d'un bloc restent en cache). Renvoie
+    'final_values' et 'invested' (float64, un par trajectoire) et, si keep_paths,
+    'price_paths' (trajectoires x mois+1) et 'value_history' (trajectoires x mois)
+    de type dtype : COMPACT_DTYPE divise par deux la mémoire par trajectoire.
+    price_out / value_out (optionnel) : destinations fournies par l'appelant
+    (ex. numpy.memmap sur disque, ordre quelconque), remplies bloc par bloc
+    depuis des tampons en mémoire ; elles ne sont pas renvoyées.
+    on_block(start, stop, paths, values) : appelé après chaque bloc (ex.
+    PathRiskTracker.add), pendant que ses trajectoires sont en mémoire.
+    """
+    months = int(params['years'] * 12)
+    block_size = min(block_size, max(n_paths, 1))
+    final_values = np.empty(n_paths)
+
+    if price_out is not None:
+        keep_paths = False
+        dtype = price_out.dtype
+
+    if keep_paths:
+        price_paths = np.empty((n_paths, months + 1), dtype)
+        value_history = np.empty((n_paths, months), dtype)
+    else:
+        # Tampons réutilisés d'un bloc à l'autre
+        price_buffer = np.empty((block_size, months + 1), dtype)
+        value_buffer = np.empty((block_size, months), dtype)
+
+    invested = float(params['initial_investment'])
+    for start in range(0, n_paths, block_size):
+        stop = min(start + block_size, n_paths)
+        if keep_paths:
+            paths_out, values_out = price_paths[start:stop], value_history[start:stop]
+        else:
+            paths_out, values_out = price_buffer[:stop - start], value_buffer[:stop - start]
+
+        seeds = range(first_seed + start, first_seed + stop)
+        paths = simulate_price_paths(params['initial_price'], params['years'], params['annual_return'],
+                                     params['volatility'], params['dividend_yield'], seeds, out=paths_out)
+        values, invested = portfolio_values(paths, params['initial_investment'],
+                                            params['monthly_investment'], out=values_out)
+        final_values[start:stop] = values[:, -1]
+
+        if price_out is not None:
+            price_out[start:stop] = paths
+            if value_out is not None:
+                value_out[start:stop] = values
+        if on_block is not None:
+            on_block(start, stop, paths, values)
+
+    result = {
+        'final_values': final_values,
+        'invested': np.full(n_paths, invested)
+    }
+    if keep_paths:
+        result['price_paths'] = price_paths
+        result['value_history'] = value_history
+    return result
+
+
+def inflation_index(inflation_rate, years, n_paths=1, volatility=0.0, seed=None):
+    """Indice des prix mensuel, 1 au départ : (1 ou n_paths) x mois+1
+
+    inflation_rate et volatility en % annuel. Sans volatilité, une seule
+    trajectoire déterministe (diffusée sur toutes les trajectoires de prix) ;
+    sinon inflation mensuelle ~ N(taux/12, volatilité/sqrt(12)), tirée d'un
+    flux propre (seed) qui ne modifie pas les tirages des prix.
+    """
+    months = int(years * 12)
+    monthly_rate = inflation_rate / 100 / 12
+
+    if volatility:
+        rng = np.random.default_rng(seed)
+        growth = rng.normal(monthly_rate, volatility / 100 / np.sqrt(12), (n_paths, months))
+    else:
+        growth = np.full((1, months), monthly_rate)
+    growth += 1
+
+    index = np.ones((len(growth), months + 1))
+    np.cumprod(growth, axis=1, out=index[:, 1:])
+    return index
+
+
+def deflate(values, index):
+    """Valeurs mensuelles (trajectoires x mois, à partir du mois 1) en euros d'aujourd'hui"""
+    return values / index[:, 1:values.shape[-1] + 1]
+
+
+def real_contributions(invested, monthly_investment, index):
+    """Capital versé en euros d'aujourd'hui : chaque versement mensuel divisé par l'indice de son mois"""
+    months = index.shape[1] - 1
+    if monthly_investment <= 0:
+        return np.asarray(invested, dtype=float) + np.zeros(len(index))
+    initial = np.asarray(invested, dtype=float) - monthly_investment * months
+    return initial + monthly_investment * (1 / index[:, 1:]).sum(axis=1)
+
+
+def evaluate_scenarios(final_values, invested, years, tax_scenarios=tuple(TAX_RATES), accounts=ACCOUNTS,
+                       inflation_rates=(0.0,), pea_early_penalty=False, monthly_investment=0.0,
+                       inflation_volatility=0.0, seed=None):
+    """Valeurs nettes pour toutes les combinaisons scénario fiscal x compte x inflation
+
+    L'impôt porte sur la plus-value nominale ; les valeurs réelles sont ensuite
+    déflatées par l'indice des prix de chaque trajectoire (inflation_index,
+    taux et volatilité en % annuel). Les versements mensuels sont déflatés
+    mois par mois pour le capital versé réel. Renvoie :
+    - 'rates' (scénarios x comptes), 'tax' et 'net' (scénarios x comptes x trajectoires)
+    - 'real_invested' (inflations x trajectoires)
+    - 'real_net' : scénarios x inflations x comptes x trajectoires (CAGR réel : real_cagr)
+    """
+    final_values = np.asarray(final_values, dtype=float)
+    gain = np.maximum(final_values - invested, 0)
+
+    rates = np.array([[tax_rate(account, years, scenario, pea_early_penalty) for account in accounts]
+                      for scenario in tax_scenarios])
+    tax = rates[:, :, None] * gain
+    net = final_values - tax
+
+    inflation_rates = np.asarray(inflation_rates, dtype=float)
+    n_paths = len(final_values)
+    deflators = np.empty((len(inflation_rates), n_paths))
+    real_invested = np.empty((len(inflation_rates), n_paths))
+    for i, rate in enumerate(inflation_rates):
+        index = inflation_index(rate, years, n_paths, inflation_volatility, seed)
+        deflators[i] = 1 / index[:, -1]
+        real_invested[i] = real_contributions(invested, monthly_investment, index)
+
+    return {
+        'tax_scenarios': tuple(tax_scenarios),
+        'accounts': tuple(accounts),
+        'inflation_rates': inflation_rates,
+        'rates': rates,
+        'tax': tax,
+        'net': net,
+        'years': years,
+        'real_invested': real_invested,
+        'real_net': net[:, None] * deflators[None, :, None, :]
+    }
+
+
+def _cagr(ratio, years):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (ratio ** (1 / years) - 1) * 100
+
+
+def real_cagr(evaluation):
+    """CAGR réel (% annuel) par trajectoire, même forme que 'real_net'"""
+    return _cagr(evaluation['real_net'] / evaluation['real_invested'][None, :, None, :], evaluation['years'])
+
+
+def select(evaluation, tax_scenario, account, inflation_rate=None):
+    """Valeurs nettes d'une combinaison (réelles si inflation_rate est donné)"""
+    s = evaluation['tax_scenarios'].index(tax_scenario)
+    a = evaluation['accounts'].index(account)
+    if inflation_rate is None:
+        return evaluation['net'][s, a]
+    i = int(np.flatnonzero(np.isclose(evaluation['inflation_rates'], inflation_rate))[0])
+    return evaluation['real_net'][s, i, a]
+
+
+def summarize_scenarios(evaluation, percentiles=(5, 50, 95)):
+    """Une ligne par combinaison : statistiques des valeurs nettes réelles
+
+    'var_95' : 5e percentile de la valeur nette réelle ; 'loss_prob' (%) :
+    probabilité de finir sous le capital versé réel ; 'cagr' : CAGR réel médian.
+    """
+    real_net = evaluation['real_net']
+    ratio = real_net / evaluation['real_invested'][None, :, None, :]
+    means = real_net.mean(axis=-1)
+    quantiles = np.percentile(real_net, percentiles, axis=-1)
+    var_95 = np.percentile(real_net, 5, axis=-1)
+    loss_prob = (ratio < 1).mean(axis=-1) * 100
+    # Le CAGR est croissant en ratio : CAGR médian = CAGR du ratio médian
+    cagr = _cagr(np.median(ratio, axis=-1), evaluation['years'])
+
+    rows = []
+    for s, scenario in enumerate(evaluation['tax_scenarios']):
+        for i, inflation in enumerate(evaluation['inflation_rates']):
+            for a, account in enumerate(evaluation['accounts']):
+                rows.append({'tax_scenario': scenario, 'inflation_rate': float(inflation),
+                             'account': account, 'rate': float(evaluation['rates'][s, a]),
+                             'mean': float(means[s, i, a]),
+                             **{f'p{p}': float(q[s, i, a]) for p, q in zip(percentiles, quantiles)},
+                             'var_95': float(var_95[s, i, a]), 'loss_prob': float(loss_prob[s, i, a]),
+                             'cagr': float(cagr[s, i, a])})
+    return rows
@@ -0,0 +1,160 @@
+"""
+Planification par objectif : inversion de la simulation Monte Carlo
+Répond à « combien verser par mois pour avoir 90 % de chances d'atteindre
+200 000 € net en 15 ans sur un PEA ? » (ou quel apport initial, quelle durée).
+
+Les trajectoires de prix sont tirées une seule fois (nombres aléatoires
+communs, mêmes seeds que simulate_gross) pour l'horizon maximal. À prix fixés,
+la valeur finale est linéaire en l'apport et le versement mensuel :
+    V_T = apport * p_T / p_0 + versement * p_T * somme_{k<=T} 1 / p_k
+si bien que chaque étape de la dichotomie n'est qu'une évaluation vectorisée
+sur les trajectoires, sans nouvelle simulation. Les deux matrices conservées
+(prix et somme des inverses) sont construites par blocs, en float32 à partir
+de COMPACT_THRESHOLD trajectoires ; MAX_PATHS borne leur taille.
+
+    solver = GoalSolver(params, n_paths=10_000, max_years=40)
+    solver.solve(200_000, probability=90, variable='monthly_investment', years=15)
+"""
+
+import numpy as np
+
+from fiscalite import tax_rate
+from moteur_simulation import COMPACT_DTYPE, COMPACT_THRESHOLD, inflation_index, simulate_price_paths
+
+# Variables que le solveur sait ajuster
+VARIABLES = {
+    'monthly_investment': "Versement mensuel (€)",
+    'initial_investment': "Apport initial (€)",
+    'years': "Durée (années)"
+}
+
+# Trajectoires maximales du solveur : 2 matrices trajectoires x mois, soit
+# ~385 Mo en float32 sur 40 ans (l'erreur d'échantillonnage y est < 0,1 point)
+MAX_PATHS = 100_000
+
+
+class GoalSolver:
+    """Probabilité d'atteindre un objectif net d'impôt, et son inversion par dichotomie"""
+
+    def __init__(self, params, n_paths=10_000, max_years=None, account="PEA", tax_scenario=None,
+                 pea_early_penalty=True, first_seed=0, block_size=10_000):
+        self.params = params
+        self.account = account
+        self.tax_scenario = tax_scenario or params['tax_scenario']
+        self.pea_early_penalty = pea_early_penalty
+        self.max_years = int(max_years or params['years'])
+        self.evaluations = 0
+
+        if n_paths > MAX_PATHS:
+            raise ValueError(f"Au plus {MAX_PATHS:,} trajectoires pour le solveur ({n_paths:,} demandées)")
+
+        # Seule simulation : prix p_1..p_T pour l'horizon maximal (p_0 est commun)
+        # et somme_{k<=t} 1 / p_k, bloc par bloc sans matrice float64 complète
+        months = self.max_years * 12
+        dtype = COMPACT_DTYPE if n_paths >= COMPACT_THRESHOLD else np.float64
+        self.initial_price = float(params['initial_price'])
+        self.prices = np.empty((n_paths, months), dtype)
+        self.inverse_cumsum = np.empty((n_paths, months), dtype)
+        buffer = np.empty((min(block_size, max(n_paths, 1)), months + 1))
+        for start in range(0, n_paths, block_size):
+            stop = min(start + block_size, n_paths)
+            block = simulate_price_paths(self.initial_price, self.max_years, params['annual_return'],
+                                         params['volatility'], params['dividend_yield'],
+                                         range(first_seed + start, first_seed + stop), out=buffer[:stop - start])
+            self.prices[start:stop] = block[:, 1:]
+            self.inverse_cumsum[start:stop] = np.cumsum(1 / block[:, 1:], axis=1)
+
+    def final_values(self, initial_investment, monthly_investment, years):
+        """Valeurs finales brutes (une par trajectoire) et capital versé, sans resimuler"""
+        months = int(years * 12)
+        if not 1 <= months <= self.prices.shape[1]:
+            raise ValueError(f"Durée hors de l'horizon simulé (1 à {self.max_years} ans)")
+        final_price = self.prices[:, months - 1].astype(np.float64)
+        values = initial_investment * final_price / self.initial_price
+        if monthly_investment > 0:
+            values = values + monthly_investment * final_price * self.inverse_cumsum[:, months - 1]
+        invested = initial_investment + max(monthly_investment, 0) * months
+        return values, invested
+
+    def probability(self, target, initial_investment=None, monthly_investment=None, years=None, real=False):
+        """Probabilité (%) que la valeur nette finale atteigne target
+
+        Les arguments absents reprennent les paramètres de simulation ;
+        real=True exprime target en euros d'aujourd'hui (taux d'inflation des paramètres).
+        """
+        initial_investment = self.params['initial_investment'] if initial_investment is None else initial_investment
+        monthly_investment = self.params['monthly_investment'] if monthly_investment is None else monthly_investment
+        years = self.params['years'] if years is None else years
+        self.evaluations += 1
+
+        values, invested = self.final_values(initial_investment, monthly_investment, years)
+        rate = tax_rate(self.account, years, self.tax_scenario, self.pea_early_penalty)
+        net = values - rate * np.maximum(values - invested, 0)
+        if real:
+            target = target * inflation_index(self.params['inflation_rate'], years)[0, -1]
+        return float(np.mean(net >= target) * 100)
+
+    def solve(self, target, probability=90.0, variable='monthly_investment', low=0.0, high=None,
+              tolerance=1.0, real=False, **fixed):
+        """Plus petite valeur de variable qui atteint target avec la probabilité demandée
+
+        fixed : valeurs imposées des autres variables (sinon celles des
+        paramètres). La probabilité croît avec l'apport, le versement et
+        (en pratique) la durée : dichotomie sur [low, high], high étant
+        doublé jusqu'à encadrer la solution ; la durée est cherchée en
+        années entières dans [1, max_years]. Renvoie un dict avec la valeur
+        trouvée ('value', None si l'objectif est inatteignable), la
+        probabilité obtenue et le nombre d'évaluations.
+        """
+        if variable not in VARIABLES:
+            raise ValueError(f"Variable inconnue : {variable} (choix : {', '.join(VARIABLES)})")
+        self.evaluations = 0
+
+        def success(value):
+            return self.probability(target, real=real, **{**fixed, variable: value})
+
+        if variable == 'years':
+            low, high = 1, self.max_years
+            achieved = success(high)
+            if achieved < probability:
+                return self._result(variable, None, achieved, target, probability)
+            while low < high:
+                middle = (low + high) // 2
+                if success(middle) >= probability:
+                    high = middle
+                else:
+                    low = middle + 1
+            return self._result(variable, high, success(high), target, probability)
+
+        # Encadrement : high doublé jusqu'à atteindre la probabilité
+        achieved = success(low)
+        if achieved >= probability:
+            return self._result(variable, low, achieved, target, probability)
+        high = high or max(target / 100, 1.0)
+        for _ in range(40):
+            achieved = success(high)
+            if achieved >= probability:
+                break
+            low, high = high, high * 2
+        else:
+            return self._result(variable, None, achieved, target, probability)
+
+        while high - low > tolerance:
+            middle = (low + high) / 2
+            if success(middle) >= probability:
+                high = middle
+            else:
+                low = middle
+        return self._result(variable, high, success(high), target, probability)
+
+    def _result(self, variable, value, achieved, target, probability):
+        return {
+            'variable': variable,
+            'value': value,
+            'probability': achieved,
+            'target': target,
+            'target_probability': probability,
+            'account': self.account,
+            'evaluations': self.evaluations,
+            'n_paths': len(self.prices)
+        }
@@ -0,0 +1,116 @@
+"""
+Outils vectorisés d'optimisation de portefeuille
+(utilisés par le notebook 04_Portfolio_Optimization)
+"""
+
+import numpy as np
+
+RISK_FREE_RATE = 0.02
+
+
+def portfolio_metrics_batch(weights, annual_returns, cov_matrix, risk_free=RISK_FREE_RATE):
+    """Rendement, volatilité et Sharpe d'une matrice de poids (n_portefeuilles x n_actifs)"""
+    weights = np.atleast_2d(weights)
+    annual_returns = np.asarray(annual_returns, dtype=float)
+    cov_matrix = np.asarray(cov_matrix, dtype=float)
+
+    port_returns = weights @ annual_returns
+    port_vols = np.sqrt(np.einsum('ij,ij->i', weights @ cov_matrix, weights))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(port_vols > 0, (port_returns - risk_free) / port_vols, 0.0)
+
+    return port_returns, port_vols, sharpe
+
+
+def efficient_hull(vols, rets):
+    """Frontière supérieure : points non dominés puis enveloppe convexe supérieure"""
+    order = np.argsort(vols, kind='stable')
+    vols, rets = vols[order], rets[order]
+
+    # Points efficients : rendement strictement supérieur à tous ceux de volatilité moindre
+    running_max = np.maximum.accumulate(rets)
+    efficient = np.concatenate([[True], rets[1:] > running_max[:-1]])
+    vols, rets = vols[efficient], rets[efficient]
+
+    # Enveloppe convexe supérieure (chaîne monotone)
+    hull = []
+    for point in zip(vols, rets):
+        while len(hull) >= 2:
+            (x1, y1), (x2, y2) = hull[-2], hull[-1]
+            if (x2 - x1) * (point[1] - y1) - (y2 - y1) * (point[0] - x1) >= 0:
+                hull.pop()
+            else:
+                break
+        hull.append(point)
+
+    return np.array(hull).reshape(-1, 2)
+
+
+def generate_random_portfolios(annual_returns, cov_matrix, n_portfolios=2000, chunk_size=100_000,
+                               risk_free=RISK_FREE_RATE, seed=None, keep_weights=True):
+    """Génère des portefeuilles aléatoires par blocs (poids Dirichlet)
+
+    Renvoie (results, weights, frontier) : results est la matrice 3 x n
+    (volatilité, rendement, Sharpe), weights la matrice n x n_actifs (None si
+    keep_weights=False) et frontier l'enveloppe efficiente (volatilité, rendement)
+    mise à jour bloc par bloc.
+    """
+    rng = np.random.default_rng(seed)
+    n_assets = len(annual_returns)
+
+    results = np.empty((3, n_portfolios))
+    weights_record = np.empty((n_portfolios, n_assets)) if keep_weights else None
+    frontier = np.empty((0, 2))
+
+    for start in range(0, n_portfolios, chunk_size):
+        stop = min(start + chunk_size, n_portfolios)
+        weights = rng.dirichlet(np.ones(n_assets), size=stop - start)
+
+        rets, vols, sharpe = portfolio_metrics_batch(weights, annual_returns, cov_matrix, risk_free)
+        results[0, start:stop] = vols
+        results[1, start:stop] = rets
+        results[2, start:stop] = sharpe
+        if keep_weights:
+            weights_record[start:stop] = weights
+
+        # Enveloppe : seuls les points de l'enveloppe précédente et du bloc comptent
+        frontier = efficient_hull(np.concatenate([frontier[:, 0], vols]),
+                                  np.concatenate([frontier[:, 1], rets]))
+
+    return results, weights_record, frontier
+
+
+def simulate_ar1_paths(expected_return, volatility, initial_capital=10000, days=756, n_paths=1000,
+                       phi=0.1, seed=None, block_size=10_000):
+    """Trajectoires de valeur (jours x n_paths) à rendements quotidiens AR(1)
+
+    Rendements r_j = phi * r_{j-1} + (1 - phi) * e_j avec r_0 = e_0 et
+    e ~ N(rendement/252, volatilité/sqrt(252)), filtrés par lfilter le long de
+    l'axe du temps pour toutes les trajectoires d'un bloc à la fois. Chaque
+    bloc de block_size trajectoires tire d'un flux indépendant issu de `seed`
+    (SeedSequence.spawn), les résultats ne dépendent donc que de seed et block_size.
+    """
+    from scipy.signal import lfilter
+
+    daily_return = expected_return / 252
+    daily_vol = volatility / np.sqrt(252)
+
+    # Stockage (trajectoires x jours) : chaque bloc est contigu, la vue transposée est renvoyée
+    storage = np.empty((n_paths, days))
+    n_blocks = -(-n_paths // block_size)
+    streams = np.random.SeedSequence(seed).spawn(n_blocks)
+
+    for stream, start in zip(streams, range(0, n_paths, block_size)):
+        block = storage[start:start + block_size]
+        np.random.default_rng(stream).standard_normal(out=block)
+        block *= daily_vol
+        block += daily_return
+
+        # zi = phi * e_0 donne r_0 = e_0, comme la boucle d'origine
+        block[:], _ = lfilter([1 - phi], [1, -phi], block, axis=1, zi=phi * block[:, :1])
+        block += 1
+        np.cumprod(block, axis=1, out=block)
+        block *= initial_capital
+
+    return storage.T
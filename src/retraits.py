@@ -0,0 +1,203 @@
+"""
+Phase de retraits (décumulation) après l'horizon d'accumulation
+Retraits mensuels vectorisés sur toutes les trajectoires, selon trois règles :
+- 'fixed' : montant annuel net fixe, indexé chaque année sur l'inflation
+- 'percentage' : pourcentage du portefeuille, recalculé chaque année
+- 'guardrail' : garde-fous de Guyton-Klinger (taux initial, baisse ou hausse
+  de 10 % quand le taux courant sort de +/- 20 % du taux initial, pas
+  d'indexation après une année de baisse)
+
+Fiscalité d'un retrait (PEA partiel ou vente sur CTO) : seule la part de
+plus-value du montant retiré est imposée, au prorata du prix de revient moyen
+(PMP) ; le prix de revient restant diminue au même prorata, si bien que le
+rapport prix de revient / valeur n'évolue qu'avec les cours. Une trajectoire
+est ruinée quand le portefeuille ne couvre plus le retrait demandé.
+
+Les trajectoires sont traitées par blocs, en mois x trajectoires : chaque mois
+est une poignée d'opérations sur des vecteurs contigus (40 ans x 100 000
+trajectoires en quelques secondes).
+"""
+
+import numpy as np
+
+from fiscalite import tax_rates
+from moteur_simulation import COMPACT_DTYPE, COMPACT_THRESHOLD, simulate_gross
+
+WITHDRAWAL_STRATEGIES = {
+    'fixed': "Montant fixe (indexé)",
+    'percentage': "Pourcentage du portefeuille",
+    'guardrail': "Garde-fous (Guyton-Klinger)"
+}
+
+INFLATION_RATE = 2.0         # Indexation annuelle par défaut des retraits fixes (%)
+GUARDRAIL_BAND = 0.20        # Écart toléré autour du taux de retrait initial
+GUARDRAIL_ADJUSTMENT = 0.10  # Baisse / hausse du retrait quand un garde-fou est franchi
+
+
+def retirement_returns(params, n_paths, retirement_years, seed=0):
+    """Facteurs de croissance mensuels (mois x trajectoires) pendant les retraits
+
+    Même modèle que simulate_price_paths (rendement normal + dividende
+    réinvesti), tiré d'un générateur vectorisé propre à la phase de retraits.
+    """
+    months = int(retirement_years * 12)
+    rng = np.random.default_rng(seed)
+    growth = rng.normal(params['annual_return'] / 100 / 12, params['volatility'] / 100 / np.sqrt(12),
+                        (months, n_paths))
+    growth += 1 + params['dividend_yield'] / 100 / 12
+    return growth
+
+
+def decumulate(start_values, cost_basis, growth, strategy="fixed", annual_amount=0.0, withdrawal_rate=4.0,
+               account="PEA", holding_years=0, tax_scenario="current", inflation_rate=0.0,
+               pea_early_penalty=True):
+    """Retraits mensuels sur des portefeuilles (un par trajectoire)
+
+    start_values / cost_basis : valeur et prix de revient au début des
+    retraits ; growth : facteurs de croissance (mois x trajectoires) ;
+    annual_amount (net, 'fixed') et withdrawal_rate (% annuel, 'percentage'
+    et 'guardrail') ; holding_years : ancienneté du compte au début des
+    retraits (taux PEA après 5 ans). Renvoie par trajectoire 'ruin_month'
+    (-1 si jamais ruinée), 'final_values', 'net_withdrawn', 'tax_paid', et
+    'yearly_values' / 'yearly_income' (années x trajectoires).
+    """
+    if strategy not in WITHDRAWAL_STRATEGIES:
+        raise ValueError(f"Règle de retrait inconnue : {strategy} (choix : {', '.join(WITHDRAWAL_STRATEGIES)})")
+    months, n = growth.shape
+    n_years = -(-months // 12)
+    rate = withdrawal_rate / 100
+    inflation = inflation_rate / 100
+
+    value = np.array(start_values, dtype=np.float64) * np.ones(n)
+    alive = value > 0
+    # Prix de revient / valeur : inchangé par un retrait, divisé par la croissance des cours
+    with np.errstate(divide='ignore', invalid='ignore'):
+        basis_ratio = np.where(alive, np.asarray(cost_basis, dtype=np.float64) / value, 1.0)
+    ruin_month = np.where(alive, -1, 0)
+    net_withdrawn = np.zeros(n)
+    tax_paid = np.zeros(n)
+    yearly_values = np.empty((n_years, n), np.float32)
+    yearly_income = np.zeros((n_years, n), np.float32)
+
+    # Taux d'imposition des plus-values selon l'ancienneté du compte, mois par mois
+    monthly_tax = tax_rates(account, holding_years + np.arange(months) / 12, tax_scenario, pea_early_penalty)
+
+    annual = np.zeros(n)  # Retrait annuel : net ('fixed', 'guardrail') ou brut ('percentage')
+    year_start_value = value.copy()
+    gain_fraction = np.empty(n)
+    gross = np.empty(n)
+
+    for t in range(months):
+        year, month = divmod(t, 12)
+        value *= growth[t]
+        basis_ratio /= growth[t]
+
+        if month == 0:
+            if strategy == "fixed":
+                annual[:] = annual_amount * (1 + inflation) ** year
+            elif strategy == "percentage":
+                annual = rate * value
+            elif year == 0:
+                annual = rate * value
+            else:
+                # Indexation, sauf après une année de baisse, puis garde-fous
+                annual *= np.where(value >= year_start_value, 1 + inflation, 1.0)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    current_rate = annual / value
+                annual *= np.where(current_rate > rate * (1 + GUARDRAIL_BAND), 1 - GUARDRAIL_ADJUSTMENT,
+                                   np.where(current_rate < rate * (1 - GUARDRAIL_BAND),
+                                            1 + GUARDRAIL_ADJUSTMENT, 1.0))
+            year_start_value = value.copy()
+
+        # Part de plus-value du portefeuille (prix de revient moyen)
+        np.subtract(1, basis_ratio, out=gain_fraction)
+        np.maximum(gain_fraction, 0, out=gain_fraction)
+        tax_rate = monthly_tax[t]
+
+        # Montant brut à vendre : le retrait net est majoré de l'impôt sur sa part de plus-value
+        if strategy == "percentage":
+            gross[:] = annual / 12
+        else:
+            np.divide(annual / 12, 1 - tax_rate * gain_fraction, out=gross)
+        gross *= alive
+
+        # Un pourcentage du portefeuille est toujours couvert (plafonné à sa valeur)
+        short = alive & (gross > value * (1 + 1e-12)) & (strategy != "percentage")
+        np.minimum(gross, value, out=gross)
+
+        tax = gross * gain_fraction * tax_rate
+        net = gross - tax
+        value -= gross
+        net_withdrawn += net
+        tax_paid += tax
+        yearly_income[year] += net
+
+        # Ruine : retrait demandé non couvert, ou portefeuille vidé
+        ruined = short | (alive & (value <= 1e-9))
+        if ruined.any():
+            ruin_month[ruined] = t + 1
+            alive &= ~ruined
+            value[~alive] = 0.0
+
+        if month == 11 or t == months - 1:
+            yearly_values[year] = value
+
+    return {
+        'ruin_month': ruin_month,
+        'final_values': value,
+        'net_withdrawn': net_withdrawn,
+        'tax_paid': tax_paid,
+        'yearly_values': yearly_values,
+        'yearly_income': yearly_income
+    }
+
+
+def simulate_retirement(params, n_paths, retirement_years, strategy="fixed", annual_amount=0.0,
+                        withdrawal_rate=4.0, account="PEA", tax_scenario=None, pea_early_penalty=True,
+                        seed=0, block_size=10_000, start_values=None, cost_basis=None):
+    """Accumulation (simulate_gross, mêmes seeds que le Monte Carlo) puis retraits, par blocs
+
+    start_values / cost_basis : point de départ des retraits déjà calculé,
+    par trajectoire ou commun (sinon accumulation selon params). Renvoie
+    les sorties de decumulate pour toutes les trajectoires, plus
+    'start_values', 'cost_basis' et 'ruin_probability' (%).
+    """
+    if start_values is None:
+        dtype = COMPACT_DTYPE if n_paths >= COMPACT_THRESHOLD else np.float64
+        gross = simulate_gross(params, n_paths, keep_paths=False, dtype=dtype)
+        start_values, cost_basis = gross['final_values'], gross['invested']
+    start_values = np.asarray(start_values, dtype=np.float64) * np.ones(n_paths)
+    cost_basis = np.asarray(cost_basis, dtype=np.float64) * np.ones(n_paths)
+
+    blocks = []
+    for start in range(0, n_paths, block_size):
+        stop = min(start + block_size, n_paths)
+        growth = retirement_returns(params, stop - start, retirement_years, seed=(seed, start))
+        blocks.append(decumulate(start_values[start:stop], cost_basis[start:stop], growth, strategy,
+                                 annual_amount, withdrawal_rate, account, params['years'],
+                                 tax_scenario or params['tax_scenario'], params['inflation_rate'],
+                                 pea_early_penalty))
+
+    result = {name: np.concatenate([block[name] for block in blocks], axis=-1) for name in blocks[0]}
+    result['start_values'] = start_values
+    result['cost_basis'] = cost_basis
+    result['ruin_probability'] = float(np.mean(result['ruin_month'] >= 0) * 100)
+    return result
+
+
+def summarize_retirement(result, percentiles=(5, 50, 95)):
+    """Synthèse : probabilité de ruine, année médiane de ruine, revenus et patrimoine final"""
+    ruined = result['ruin_month'] >= 0
+    income = result['yearly_income']
+    ruin_month = np.where(ruined, result['ruin_month'], np.inf)
+    year_ends = 12 * np.arange(1, len(income) + 1)
+    return {
+        'ruin_probability': float(ruined.mean() * 100),
+        'median_ruin_year': float(np.median(result['ruin_month'][ruined]) / 12) if ruined.any() else None,
+        'survival_by_year': (ruin_month[None, :] > year_ends[:, None]).mean(axis=1) * 100,
+        'first_year_income': dict(zip(percentiles, np.percentile(income[0], percentiles))),
+        'lowest_income': dict(zip(percentiles, np.percentile(income.min(axis=0), percentiles))),
+        'net_withdrawn': dict(zip(percentiles, np.percentile(result['net_withdrawn'], percentiles))),
+        'tax_paid': dict(zip(percentiles, np.percentile(result['tax_paid'], percentiles))),
+        'final_values': dict(zip(percentiles, np.percentile(result['final_values'], percentiles)))
+    }
@@ -0,0 +1,199 @@
+"""
+Surfaces de sensibilité PEA vs CTO
+Calcule en un seul lot vectorisé l'écart de valeur nette PEA - CTO sur une
+grille (rendement x volatilité x durée x versement mensuel), le met en cache
+sur disque et sert ensuite heatmaps et courbes de point mort sans simulation.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from fiscalite import scenario_rates, tax_on_gains, tax_rate
+
+CACHE_DIR = os.path.join("outputs", "sensibilite")
+
+# À incrémenter si le modèle de calcul ou le format du fichier change (invalide le cache)
+SURFACE_VERSION = 2
+
+DEFAULT_GRID = {
+    'returns': np.round(np.arange(0.01, 0.151, 0.005), 4),
+    'volatilities': np.array([0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30]),
+    'horizons': np.arange(1, 31),
+    'contributions': np.array([0, 50, 100, 200, 300, 500, 1000])
+}
+
+
+class SensitivitySurface:
+    """Grille d'écarts PEA - CTO indexée par (rendement, volatilité, durée, versement)"""
+
+    def __init__(self, returns, volatilities, horizons, contributions, pea_net, cto_net, meta=None):
+        self.returns = np.asarray(returns, dtype=float)
+        self.volatilities = np.asarray(volatilities, dtype=float)
+        self.horizons = np.asarray(horizons, dtype=int)
+        self.contributions = np.asarray(contributions, dtype=float)
+        self.pea_net = pea_net
+        self.cto_net = cto_net
+        self.diff = pea_net - cto_net
+        self.meta = meta or {}
+
+    def save(self, path):
+        """Sauvegarde la grille au format .npz"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path,
+            returns=self.returns, volatilities=self.volatilities,
+            horizons=self.horizons, contributions=self.contributions,
+            pea_net=self.pea_net, cto_net=self.cto_net,
+            meta=np.array(json.dumps(self.meta))
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Recharge une grille sauvegardée"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['returns'], data['volatilities'], data['horizons'], data['contributions'],
+                       data['pea_net'], data['cto_net'], json.loads(data['meta'].item()))
+
+    def slice(self, volatility, contribution):
+        """Coupe (rendement x durée) au point de grille le plus proche"""
+        i_vol = int(np.abs(self.volatilities - volatility).argmin())
+        i_contrib = int(np.abs(self.contributions - contribution).argmin())
+        return self.diff[:, i_vol, :, i_contrib]
+
+    def break_even_horizons(self, volatility, contribution):
+        """Première durée (années) où le PEA dépasse le CTO, pour chaque rendement (NaN si jamais)"""
+        pea_better = self.slice(volatility, contribution) > 0
+        first = pea_better.argmax(axis=1)
+        return np.where(pea_better.any(axis=1), self.horizons[first], np.nan)
+
+    def plot_heatmap(self, volatility, contribution, ax=None):
+        """Heatmap de l'écart PEA - CTO avec la courbe de point mort"""
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import CenteredNorm
+
+        if ax is None:
+            _, ax = plt.subplots(figsize=(10, 6))
+
+        diff = self.slice(volatility, contribution)
+        mesh = ax.pcolormesh(self.horizons, self.returns * 100, diff,
+                             cmap='RdYlGn', norm=CenteredNorm(), shading='nearest')
+        ax.figure.colorbar(mesh, ax=ax, label="Avantage PEA (€)")
+
+        # Courbe de point mort (écart nul)
+        if diff.min() < 0 < diff.max():
+            contour = ax.contour(self.horizons, self.returns * 100, diff, levels=[0], colors='black')
+            ax.clabel(contour, fmt="point mort")
+
+        ax.set_xlabel("Durée (années)")
+        ax.set_ylabel("Rendement annuel (%)")
+        ax.set_title(f"PEA - CTO : volatilité {volatility:.0%}, versement {contribution:,.0f} €/mois")
+        return ax
+
+
+def compute_surface(returns, volatilities, horizons, contributions, initial=2000,
+                    tax_scenario="current", cto_mode="annual"):
+    """Calcule toute la grille en un seul passage vectorisé
+
+    Chaque point suit la trajectoire médiane (rendement géométrique diminué de
+    la traînée de volatilité sigma²/2). cto_mode="annual" impose chaque année
+    au PFU le gain de l'année (valeur fin d'année - valeur début d'année -
+    versements de l'année) ; "exit" impose les gains à la sortie.
+
+    Les résultats "annual" diffèrent volontairement de simulation3/simulation4 :
+    ces scripts calculent le gain annuel depuis la valeur du mois précédent
+    (un seul mois de croissance, moins douze versements), si bien que le CTO
+    n'y est presque jamais imposé (17 528 € contre 16 387 € ici à 5 ans pour
+    8 %, 200 €/mois et 2 000 € initiaux).
+    """
+    returns = np.asarray(returns, dtype=float)
+    volatilities = np.asarray(volatilities, dtype=float)
+    horizons = np.unique(np.asarray(horizons, dtype=int))
+    contributions = np.asarray(contributions, dtype=float)
+
+    r = returns[:, None, None]
+    v = volatilities[None, :, None]
+    c = contributions[None, None, :]
+    growth = np.exp((np.log1p(r) - 0.5 * v ** 2) / 12)
+
+    shape = np.broadcast_shapes(growth.shape, c.shape)
+    pea_value = np.full(shape, float(initial))
+    cto_value = pea_value.copy()
+    cto_year_start = cto_value.copy()
+
+    cto_rate = scenario_rates(tax_scenario)["CTO"]
+    pea_net = np.empty((len(returns), len(volatilities), len(horizons), len(contributions)))
+    cto_net = np.empty_like(pea_net)
+    horizon_index = {h: i for i, h in enumerate(horizons)}
+
+    for month in range(1, 12 * horizons.max() + 1):
+        pea_value = pea_value * growth + c
+        cto_value = cto_value * growth + c
+
+        if month % 12:
+            continue
+
+        # Imposition annuelle des gains du CTO
+        if cto_mode == "annual":
+            cto_value = cto_value - tax_on_gains(cto_value - cto_year_start - 12 * c, cto_rate)
+            cto_year_start = cto_value.copy()
+
+        year = month // 12
+        if year in horizon_index:
+            i = horizon_index[year]
+            invested = initial + c * month
+            pea_rate = tax_rate("PEA", year, tax_scenario)
+            pea_net[:, :, i, :] = pea_value - tax_on_gains(pea_value - invested, pea_rate)
+            if cto_mode == "annual":
+                cto_net[:, :, i, :] = cto_value
+            else:
+                cto_net[:, :, i, :] = cto_value - tax_on_gains(cto_value - invested, cto_rate)
+
+    meta = {'initial': initial, 'tax_scenario': tax_scenario, 'cto_mode': cto_mode,
+            'version': SURFACE_VERSION}
+    return SensitivitySurface(returns, volatilities, horizons, contributions, pea_net, cto_net, meta)
+
+
+def surface_cache_path(returns, volatilities, horizons, contributions, initial=2000,
+                       tax_scenario="current", cto_mode="annual", cache_dir=CACHE_DIR):
+    """Chemin du cache, dérivé d'une empreinte des paramètres de la grille"""
+    key = repr((np.round(returns, 6).tolist(), np.round(volatilities, 6).tolist(),
+                np.asarray(horizons).tolist(), np.round(contributions, 2).tolist(),
+                initial, tax_scenario, cto_mode, SURFACE_VERSION))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"surface_{digest}.npz")
+
+
+def load_or_compute(returns=None, volatilities=None, horizons=None, contributions=None,
+                    initial=2000, tax_scenario="current", cto_mode="annual", cache_dir=CACHE_DIR):
+    """Renvoie la grille depuis le cache disque, en la calculant au premier appel"""
+    grid = {
+        'returns': DEFAULT_GRID['returns'] if returns is None else returns,
+        'volatilities': DEFAULT_GRID['volatilities'] if volatilities is None else volatilities,
+        'horizons': DEFAULT_GRID['horizons'] if horizons is None else horizons,
+        'contributions': DEFAULT_GRID['contributions'] if contributions is None else contributions
+    }
+    path = surface_cache_path(**grid, initial=initial, tax_scenario=tax_scenario,
+                              cto_mode=cto_mode, cache_dir=cache_dir)
+    if os.path.exists(path):
+        return SensitivitySurface.load(path)
+
+    surface = compute_surface(**grid, initial=initial, tax_scenario=tax_scenario, cto_mode=cto_mode)
+    surface.save(path)
+    return surface
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    surface = load_or_compute()
+    for ret, horizon in zip(surface.returns, surface.break_even_horizons(0.15, 200)):
+        print(f"Rendement {ret:.1%} : PEA gagnant dès {horizon:.0f} ans" if not np.isnan(horizon)
+              else f"Rendement {ret:.1%} : CTO toujours gagnant")
+
+    surface.plot_heatmap(0.15, 200)
+    plt.tight_layout()
+    plt.savefig(os.path.join(CACHE_DIR, "pea_cto_heatmap.png"), dpi=150)
+    plt.show()
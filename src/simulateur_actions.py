@@ -2,19 +2,23 @@
 Simulateur d'actions avec interface graphique
 Permet de simuler l'évolution d'une action sur différentes périodes
 avec gestion de la fiscalité PEA/CTO
+
+matplotlib, pandas et la couche de données de marché sont importés à la
+première utilisation : la fenêtre s'affiche avant leur chargement.
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
-import pandas as pd
 from datetime import datetime
-import yfinance as yf
 import warnings
 warnings.filterwarnings('ignore')
 
+from retraits import INFLATION_RATE, WITHDRAWAL_STRATEGIES, retirement_returns, decumulate, summarize_retirement
+
+# Trajectoires de marché simulées pendant la phase de retraits
+RETIREMENT_PATHS = 10_000
+
 class ActionSimulatorGUI:
     def __init__(self, root):
         self.root = root
@@ -25,6 +29,10 @@ class ActionSimulatorGUI:
         self.setup_variables()
         self.setup_ui()
         
+        # Premier affichage de la fenêtre avant le chargement de matplotlib
+        self.root.update()
+        self.create_chart()
+        
     def setup_variables(self):
         """Initialise les variables de simulation"""
         self.ticker_var = tk.StringVar(value="AAPL")
@@ -37,8 +45,15 @@ class ActionSimulatorGUI:
         self.monthly_investment_var = tk.DoubleVar(value=100.0)
         self.dividend_yield_var = tk.DoubleVar(value=1.5)
         
+        # Phase de retraits (0 an : désactivée)
+        self.retirement_years_var = tk.IntVar(value=0)
+        self.withdrawal_strategy_var = tk.StringVar(value="fixed")
+        self.withdrawal_amount_var = tk.DoubleVar(value=3000.0)
+        self.withdrawal_rate_var = tk.DoubleVar(value=4.0)
+        
         # Pour stocker les résultats
         self.simulation_results = None
+        self.retirement_results = None
         
     def setup_ui(self):
         """Configure l'interface utilisateur"""
@@ -81,6 +96,12 @@ class ActionSimulatorGUI:
         
         self.create_tax_section(tax_frame)
         
+        # Section Retraits
+        withdrawal_frame = ttk.LabelFrame(left_panel, text="Retraits", padding="10")
+        withdrawal_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.create_withdrawal_section(withdrawal_frame)
+        
         # Boutons
         button_frame = ttk.Frame(left_panel)
         button_frame.pack(fill=tk.X, pady=20)
@@ -98,10 +119,7 @@ class ActionSimulatorGUI:
         graph_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
         graph_frame.columnconfigure(0, weight=1)
         graph_frame.rowconfigure(0, weight=1)
-        
-        self.fig, self.ax = plt.subplots(figsize=(10, 6), facecolor='#f8f9fa')
-        self.canvas = FigureCanvasTkAgg(self.fig, master=graph_frame)
-        self.canvas.get_tk_widget().grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.graph_frame = graph_frame
         
         # Résultats détaillés
         results_frame = ttk.LabelFrame(right_panel, text="Résultats détaillés", padding="10")
@@ -109,6 +127,16 @@ class ActionSimulatorGUI:
         
         self.create_results_section(results_frame)
         
+    def create_chart(self):
+        """Crée le graphique matplotlib (import différé du backend TkAgg)"""
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        
+        self.fig = Figure(figsize=(10, 6), facecolor='#f8f9fa')
+        self.ax = self.fig.add_subplot(111)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.graph_frame)
+        self.canvas.get_tk_widget().grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
     def setup_styles(self):
         """Configure les styles de l'interface"""
         style = ttk.Style()
@@ -234,6 +262,27 @@ class ActionSimulatorGUI:
         ttk.Label(parent, text=info_text, font=('Arial', 9), 
                  foreground='#666666').grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=5)
         
+    def create_withdrawal_section(self, parent):
+        """Crée la section de la phase de retraits"""
+        # Durée des retraits
+        ttk.Label(parent, text="Durée des retraits (ans, 0 = aucun):").grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(parent, textvariable=self.retirement_years_var, width=8).grid(row=0, column=1, sticky=tk.W, pady=5)
+        
+        # Règle de retrait
+        strategy_frame = ttk.Frame(parent)
+        strategy_frame.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=5)
+        
+        for value, text in WITHDRAWAL_STRATEGIES.items():
+            ttk.Radiobutton(strategy_frame, text=text, 
+                          variable=self.withdrawal_strategy_var, value=value).pack(side=tk.LEFT, padx=2)
+        
+        # Montant ou taux
+        ttk.Label(parent, text="Retrait annuel net (€):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(parent, textvariable=self.withdrawal_amount_var, width=8).grid(row=2, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(parent, text="Taux de retrait (%/an):").grid(row=3, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(parent, textvariable=self.withdrawal_rate_var, width=8).grid(row=3, column=1, sticky=tk.W, pady=5)
+        
     def create_buttons(self, parent):
         """Crée les boutons d'action"""
         ttk.Button(parent, text="🎯 Lancer la Simulation", 
@@ -327,21 +376,24 @@ class ActionSimulatorGUI:
             return
         
         try:
+            from donnees_marche import get_provider
+            
+            provider = get_provider()
+            
             # Ajouter .PA pour les actions françaises si nécessaire
             if not any(ext in ticker for ext in ['.PA', '.DE', '.AS', '.MI']):
                 # Essayer différentes bourses
                 for exchange in ['', '.PA', '.DE']:
                     try:
                         full_ticker = ticker + exchange
-                        stock = yf.Ticker(full_ticker)
-                        hist = stock.history(period="1d")
+                        hist = provider.history(full_ticker, period="1d")
                         
                         if not hist.empty:
                             current_price = hist['Close'].iloc[-1]
                             self.initial_price_var.set(round(float(current_price), 2))
                             
                             # Afficher aussi des infos sur l'action
-                            info = stock.info
+                            info = provider.info(full_ticker)
                             company_name = info.get('longName', ticker)
                             dividend_yield = info.get('dividendYield', 0) * 100 if info.get('dividendYield') else 1.5
                             self.dividend_yield_var.set(round(dividend_yield, 2))
@@ -357,8 +409,7 @@ class ActionSimulatorGUI:
                     messagebox.showerror("Erreur", f"Impossible de récupérer le prix pour {ticker}")
             else:
                 # Ticker avec extension déjà présente
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="1d")
+                hist = provider.history(ticker, period="1d")
                 
                 if not hist.empty:
                     current_price = hist['Close'].iloc[-1]
@@ -517,6 +568,12 @@ class ActionSimulatorGUI:
                 monthly_investment, account_type, years
             )
             
+            # Phase de retraits sur des marchés simulés, à partir de la valeur finale
+            self.retirement_results = None
+            if self.retirement_years_var.get() > 0:
+                self.retirement_results = self.simulate_withdrawals(account_type, years, annual_return,
+                                                                    volatility, dividend_yield)
+            
             # Mise à jour de l'interface
             self.update_chart(ticker, account_type, years)
             self.update_summary()
@@ -527,6 +584,19 @@ class ActionSimulatorGUI:
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de la simulation:\n{str(e)}")
     
+    def simulate_withdrawals(self, account_type, years, annual_return, volatility, dividend_yield):
+        """Simule les retraits sur RETIREMENT_PATHS marchés à partir du résultat de l'accumulation"""
+        results = self.simulation_results
+        growth = retirement_returns({'annual_return': annual_return, 'volatility': volatility,
+                                     'dividend_yield': dividend_yield},
+                                    RETIREMENT_PATHS, self.retirement_years_var.get())
+        # PEA : même règle que l'accumulation (pas d'impôt avant 5 ans)
+        withdrawals = decumulate(results['final_value_brut'], results['total_invested'], growth,
+                                 self.withdrawal_strategy_var.get(), self.withdrawal_amount_var.get(),
+                                 self.withdrawal_rate_var.get(), account_type, years,
+                                 inflation_rate=INFLATION_RATE, pea_early_penalty=False)
+        return summarize_retirement(withdrawals)
+    
     def update_chart(self, ticker, account_type, years):
         """Met à jour le graphique"""
         if not self.simulation_results:
@@ -579,7 +649,8 @@ class ActionSimulatorGUI:
         self.ax.legend(loc='upper left', fontsize=9)
         
         # Formater l'axe Y
-        self.ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f} €'))
+        from matplotlib.ticker import FuncFormatter
+        self.ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: f'{x:,.0f} €'))
         
         # Ajouter une zone colorée pour les gains/pertes
         invest_line = self.simulation_results['total_invested']
@@ -714,6 +785,30 @@ ANALYSE:
         if results['total_dividends'] > 0:
             details += f"• 💵 Dividendes: {results['total_dividends']/results['total_invested']*100:.1f}% du capital investi\n"
         
+        # Phase de retraits
+        retirement = self.retirement_results
+        if retirement:
+            strategy = self.withdrawal_strategy_var.get()
+            if strategy == "fixed":
+                rule = f"{self.withdrawal_amount_var.get():,.0f} €/an net, indexé de {INFLATION_RATE:.0f}%/an"
+            else:
+                rule = f"{self.withdrawal_rate_var.get():.1f}%/an"
+            ruin_year = retirement['median_ruin_year']
+            details += f"""
+{'='*60}
+PHASE DE RETRAITS ({self.retirement_years_var.get()} ans, {RETIREMENT_PATHS:,} marchés simulés):
+{'='*60}
+
+• Règle: {WITHDRAWAL_STRATEGIES[strategy]} ({rule})
+• Probabilité de ruine: {retirement['ruin_probability']:.1f}%
+• Année médiane de ruine: {f"{ruin_year:.1f}" if ruin_year is not None else "-"}
+• Revenu net 1re année (médian): {retirement['first_year_income'][50]:,.2f} €
+• Revenu net annuel le plus bas (médian): {retirement['lowest_income'][50]:,.2f} €
+• Total retiré net (médian): {retirement['net_withdrawn'][50]:,.2f} €
+• Impôts sur les retraits (médian): {retirement['tax_paid'][50]:,.2f} €
+• Capital restant (P5 / médian / P95): {retirement['final_values'][5]:,.0f} / {retirement['final_values'][50]:,.0f} / {retirement['final_values'][95]:,.0f} €
+"""
+        
         # Effacer et insérer le texte
         self.details_text.delete(1.0, tk.END)
         self.details_text.insert(1.0, details)
@@ -733,6 +828,10 @@ ANALYSE:
         self.volatility_var.set(20.0)
         self.account_type_var.set("PEA")
         self.dividend_yield_var.set(1.5)
+        self.retirement_years_var.set(0)
+        self.withdrawal_strategy_var.set("fixed")
+        self.withdrawal_amount_var.set(3000.0)
+        self.withdrawal_rate_var.set(4.0)
         
         # Réinitialiser le graphique
         self.ax.clear()
@@ -751,6 +850,7 @@ ANALYSE:
         self.details_text.delete(1.0, tk.END)
         
         self.simulation_results = None
+        self.retirement_results = None
     
     def export_results(self):
         """Exporte les résultats au format CSV"""
@@ -759,6 +859,8 @@ ANALYSE:
             return
         
         try:
+            import pandas as pd
+            
             # Demander le fichier de destination
             filename = filedialog.asksaveasfilename(
                 defaultextension=".csv",
@@ -1,19 +1,29 @@
 """
 Simulateur d'actions avancé avec Monte Carlo et comparaison PEA/CTO
 Version complète avec interface graphique professionnelle
+
+Démarrage rapide : matplotlib (backend TkAgg), pandas et la couche de données
+de marché sont importés à la première utilisation, après l'affichage de la fenêtre.
 """
 
+import os
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
 import numpy as np
-import pandas as pd
 from datetime import datetime, timedelta
-import yfinance as yf
-from scipy import stats
 import warnings
+from cache_simulations import CACHE_DIR_ENV, SimulationCache
+from donnees_graphiques import box_stats, histogram_counts, summarize_paths
+from fiscalite import summarize_tax_analysis, tax_analysis_batch, tax_rate as fiscal_tax_rate
+from instrumentation import instrumented, recorder, stage
+from mesures_risque import PATH_METRICS, PathRiskTracker, goal_probability, summarize_risk
+from moteur_simulation import (COMPACT_DTYPE, COMPACT_THRESHOLD, ENGINE_VERSION, deflate, evaluate_scenarios,
+                               inflation_index, portfolio_values, real_cagr, simulate_gross,
+                               simulate_price_paths, summarize_scenarios)
+from objectifs import MAX_PATHS as GOAL_MAX_PATHS, VARIABLES as GOAL_VARIABLES, GoalSolver
+from retraits import WITHDRAWAL_STRATEGIES, simulate_retirement, summarize_retirement
+from stockage_resultats import ResultStore, param_hash, run_statistics
+from trajectoires_disque import ARCHIVE_DIR, PathArchive, simulate_to_archive
 warnings.filterwarnings('ignore')
 
 class AdvancedStockSimulator:
@@ -28,10 +38,21 @@ class AdvancedStockSimulator:
         # Variables globales
         self.simulation_results = {}
         self.monte_carlo_results = None
+        self.decumulation_results = None
+        
+        # Historique persistant des exécutions Monte Carlo
+        self.result_store = ResultStore()
+        
+        # Cache des simulations avant impôts (disque si SIMULATION_CACHE_DIR est définie)
+        self.simulation_cache = SimulationCache(disk_dir=os.environ.get(CACHE_DIR_ENV))
         
         # Initialisation de l'interface
         self.setup_ui()
         
+        # Premier affichage de la fenêtre avant le chargement de matplotlib
+        self.root.update()
+        self.create_charts()
+        
     def setup_colors(self):
         """Configuration du thème couleur"""
         self.colors = {
@@ -82,6 +103,7 @@ class AdvancedStockSimulator:
         self.create_header(scrollable_frame)
         self.create_input_section(scrollable_frame)
         self.create_advanced_section(scrollable_frame)
+        self.create_decumulation_section(scrollable_frame)
         self.create_visualization_section(scrollable_frame)
         self.create_results_section(scrollable_frame)
         
@@ -228,6 +250,8 @@ class AdvancedStockSimulator:
         self.scenarios_var = tk.IntVar(value=3)
         self.inflation_rate_var = tk.DoubleVar(value=2.0)
         self.tax_scenario_var = tk.StringVar(value="current")
+        self.goal_amount_var = tk.DoubleVar(value=100000.0)
+        self.archive_paths_var = tk.BooleanVar(value=False)
         
         # Grille pour paramètres avancés
         row = 0
@@ -273,6 +297,49 @@ class AdvancedStockSimulator:
             ttk.Radiobutton(tax_frame, text=text, 
                           variable=self.tax_scenario_var, value=value).pack(side=tk.LEFT, padx=10)
         
+        row += 1
+        
+        # Objectif de capital (probabilité de l'atteindre, rapport Monte Carlo)
+        ttk.Label(advanced_frame, text="Objectif de capital (€):").grid(row=row, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(advanced_frame, textvariable=self.goal_amount_var, width=10).grid(row=row, column=1, sticky=tk.W, pady=5)
+        
+        row += 1
+        
+        # Trajectoires complètes sur disque (simulations de stress)
+        ttk.Checkbutton(advanced_frame, text="Archiver les trajectoires complètes sur disque",
+                        variable=self.archive_paths_var).grid(row=row, column=0, columnspan=4, sticky=tk.W, pady=5)
+        
+    def create_decumulation_section(self, parent):
+        """Crée la section de la phase de retraits"""
+        decumulation_frame = ttk.LabelFrame(parent, text="🏖️ Phase de Retraits", padding="15")
+        decumulation_frame.pack(fill=tk.X, padx=20, pady=(0, 20))
+        
+        self.retirement_years_var = tk.IntVar(value=30)
+        self.withdrawal_strategy_var = tk.StringVar(value="fixed")
+        self.withdrawal_amount_var = tk.DoubleVar(value=24000.0)
+        self.withdrawal_rate_var = tk.DoubleVar(value=4.0)
+        
+        ttk.Label(decumulation_frame, text="Durée des retraits (années):").grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(decumulation_frame, textvariable=self.retirement_years_var, width=10).grid(row=0, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(decumulation_frame, text="Retrait annuel net (€):").grid(row=0, column=2, sticky=tk.W, padx=20, pady=5)
+        ttk.Entry(decumulation_frame, textvariable=self.withdrawal_amount_var, width=10).grid(row=0, column=3, sticky=tk.W, pady=5)
+        
+        ttk.Label(decumulation_frame, text="Règle de retrait:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        
+        strategy_frame = ttk.Frame(decumulation_frame)
+        strategy_frame.grid(row=1, column=1, columnspan=3, sticky=tk.W, pady=5)
+        
+        for value, text in WITHDRAWAL_STRATEGIES.items():
+            ttk.Radiobutton(strategy_frame, text=text, 
+                          variable=self.withdrawal_strategy_var, value=value).pack(side=tk.LEFT, padx=10)
+        
+        ttk.Label(decumulation_frame, text="Taux de retrait (%/an):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(decumulation_frame, textvariable=self.withdrawal_rate_var, width=10).grid(row=2, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(decumulation_frame, text="Montant fixe : retrait annuel net ; pourcentage et garde-fous : taux de retrait",
+                 font=('Arial', 9), foreground='#666666').grid(row=2, column=2, columnspan=2, sticky=tk.W, padx=20, pady=5)
+        
     def create_visualization_section(self, parent):
         """Crée la section de visualisation"""
         viz_frame = ttk.Frame(parent)
@@ -282,42 +349,56 @@ class AdvancedStockSimulator:
         self.viz_notebook = ttk.Notebook(viz_frame)
         self.viz_notebook.pack(fill=tk.BOTH, expand=True)
         
-        # Onglet 1: Simulation simple
+        # Onglets (les graphiques sont créés par create_charts)
         self.simple_tab = ttk.Frame(self.viz_notebook)
         self.viz_notebook.add(self.simple_tab, text="Simulation Simple")
         
+        self.monte_tab = ttk.Frame(self.viz_notebook)
+        self.viz_notebook.add(self.monte_tab, text="Monte Carlo")
+        
+        self.comparison_tab = ttk.Frame(self.viz_notebook)
+        self.viz_notebook.add(self.comparison_tab, text="Comparaison PEA/CTO")
+        
+        self.distribution_tab = ttk.Frame(self.viz_notebook)
+        self.viz_notebook.add(self.distribution_tab, text="Distribution")
+        
+    def create_charts(self):
+        """Crée les graphiques matplotlib (import différé du backend TkAgg)"""
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from graphiques_persistants import ComparisonChart, DistributionChart, MonteCarloChart, SimpleChart
+        
+        # Onglet 1: Simulation simple
         self.fig_simple = Figure(figsize=(10, 6), facecolor=self.colors['bg_light'])
         self.ax_simple = self.fig_simple.add_subplot(111)
         self.canvas_simple = FigureCanvasTkAgg(self.fig_simple, self.simple_tab)
         self.canvas_simple.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
         # Onglet 2: Monte Carlo
-        self.monte_tab = ttk.Frame(self.viz_notebook)
-        self.viz_notebook.add(self.monte_tab, text="Monte Carlo")
-        
         self.fig_monte = Figure(figsize=(10, 6), facecolor=self.colors['bg_light'])
-        self.ax_monte = self.fig_monte.add_subplot(111)
+        self.ax_monte_paths = self.fig_monte.add_subplot(121)
+        self.ax_monte = self.fig_monte.add_subplot(122)
         self.canvas_monte = FigureCanvasTkAgg(self.fig_monte, self.monte_tab)
         self.canvas_monte.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
         # Onglet 3: Comparaison PEA/CTO
-        self.comparison_tab = ttk.Frame(self.viz_notebook)
-        self.viz_notebook.add(self.comparison_tab, text="Comparaison PEA/CTO")
-        
         self.fig_comp = Figure(figsize=(10, 6), facecolor=self.colors['bg_light'])
         self.ax_comp = self.fig_comp.add_subplot(111)
         self.canvas_comp = FigureCanvasTkAgg(self.fig_comp, self.comparison_tab)
         self.canvas_comp.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
         # Onglet 4: Distribution des résultats
-        self.distribution_tab = ttk.Frame(self.viz_notebook)
-        self.viz_notebook.add(self.distribution_tab, text="Distribution")
-        
         self.fig_dist = Figure(figsize=(10, 6), facecolor=self.colors['bg_light'])
         self.ax_dist = self.fig_dist.add_subplot(111)
         self.canvas_dist = FigureCanvasTkAgg(self.fig_dist, self.distribution_tab)
         self.canvas_dist.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
+        # Graphiques à artistes persistants (mis à jour en place)
+        self.chart_simple = SimpleChart(self.ax_simple, self.canvas_simple, self.colors)
+        self.chart_monte = MonteCarloChart(self.ax_monte_paths, self.ax_monte, self.canvas_monte, self.colors)
+        self.chart_comp = ComparisonChart(self.ax_comp, self.canvas_comp, self.colors)
+        self.chart_dist = DistributionChart(self.ax_dist, self.canvas_dist, self.colors)
+        
     def create_results_section(self, parent):
         """Crée la section des résultats"""
         results_frame = ttk.LabelFrame(parent, text="📈 Résultats", padding="15")
@@ -371,6 +452,19 @@ class AdvancedStockSimulator:
         ttk.Button(action_frame, text="🔄 Réinitialiser", 
                   command=self.reset_all).pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(action_frame, text="⏱️ Performances", 
+                  command=self.show_instrumentation).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(action_frame, text="🗄️ Historique", 
+                  command=self.show_history).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(action_frame, text="🎯 Objectif", 
+                  command=self.show_goal_solver).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(action_frame, text="🏖️ Retraits", 
+                  command=self.run_decumulation).pack(side=tk.LEFT, padx=5)
+        
+    @instrumented("fetch")
     def fetch_current_price(self):
         """Récupère le prix actuel de l'action"""
         ticker = self.ticker_var.get().strip().upper()
@@ -380,21 +474,23 @@ class AdvancedStockSimulator:
             return
         
         try:
+            from donnees_marche import get_provider
+            
             # Essayer différentes bourses
+            provider = get_provider()
             exchanges = ['', '.PA', '.DE', '.AS', '.MI', '.BR']
             
             for exchange in exchanges:
                 try:
                     full_ticker = ticker + exchange
-                    stock = yf.Ticker(full_ticker)
-                    hist = stock.history(period="5d")
+                    hist = provider.history(full_ticker, period="5d")
                     
                     if not hist.empty and len(hist) > 0:
                         current_price = hist['Close'].iloc[-1]
                         self.initial_price_var.set(round(float(current_price), 2))
                         
                         # Récupérer des infos supplémentaires
-                        info = stock.info
+                        info = provider.info(full_ticker)
                         
                         # Dividende
                         if 'dividendYield' in info and info['dividendYield']:
@@ -423,64 +519,24 @@ class AdvancedStockSimulator:
             messagebox.showerror("Erreur", f"Erreur lors de la récupération: {str(e)}")
     
     def simulate_price_path(self, initial_price, years, annual_return, volatility, dividend_yield, random_seed=None):
-        """Simule un chemin de prix avec marche aléatoire"""
-        if random_seed is not None:
-            np.random.seed(random_seed)
-        
-        months = years * 12
-        
-        # Paramètres mensuels
-        monthly_return = annual_return / 100 / 12
-        monthly_vol = volatility / 100 / np.sqrt(12)
-        monthly_dividend = dividend_yield / 100 / 12
-        
-        # Génération des rendements
-        returns = np.random.normal(monthly_return, monthly_vol, months)
-        
-        # Simulation des prix
-        prices = [initial_price]
-        
-        for i in range(months):
-            new_price = prices[-1] * (1 + returns[i])
-            
-            # Ajout des dividendes (réinvestis)
-            dividend_amount = prices[-1] * monthly_dividend
-            new_price += dividend_amount
-            
-            prices.append(new_price)
-        
-        return np.array(prices)
+        """Simule un chemin de prix avec marche aléatoire (tableau préalloué du moteur vectorisé)"""
+        return simulate_price_paths(initial_price, years, annual_return, volatility, dividend_yield,
+                                    [random_seed])[0]
     
     def calculate_portfolio_value(self, price_path, initial_investment, monthly_investment, years):
         """Calcule la valeur du portefeuille"""
         months = years * 12
+        values, total_invested = portfolio_values(np.asarray(price_path)[None, :months + 1],
+                                                  initial_investment, monthly_investment)
+        values = values[0]
         
-        # Actions initiales
-        initial_shares = initial_investment / price_path[0]
-        
-        # Simulation mois par mois
-        shares = initial_shares
-        total_invested = initial_investment
-        values = []
-        
-        for month in range(1, months + 1):
-            # Investissement mensuel
-            if monthly_investment > 0:
-                monthly_shares = monthly_investment / price_path[month]
-                shares += monthly_shares
-                total_invested += monthly_investment
-            
-            # Valeur courante
-            current_value = shares * price_path[month]
-            values.append(current_value)
-        
-        final_value = values[-1] if values else 0
+        final_value = float(values[-1]) if len(values) else 0
         
         return {
             'final_value': final_value,
             'total_invested': total_invested,
             'total_gain': final_value - total_invested,
-            'final_shares': shares,
+            'final_shares': final_value / price_path[months] if months else initial_investment / price_path[0],
             'value_history': values,
             'price_history': price_path[1:]
         }
@@ -489,25 +545,8 @@ class AdvancedStockSimulator:
         """Applique la fiscalité selon le type de compte"""
         gain = portfolio_results['total_gain']
         
-        # Détermination des taux selon le scénario
-        if tax_scenario == "optimistic":
-            pea_rate = 0.15  # Baisse hypothétique
-            cto_rate = 0.25
-        elif tax_scenario == "pessimistic":
-            pea_rate = 0.20  # Hausse hypothétique
-            cto_rate = 0.35
-        else:  # current
-            pea_rate = 0.172
-            cto_rate = 0.30
-        
-        # Application de la fiscalité
-        if account_type == "PEA":
-            if years >= 5:
-                tax_rate = pea_rate
-            else:
-                tax_rate = 0.0
-        else:  # CTO
-            tax_rate = cto_rate
+        # Taux selon le scénario et la durée (règles partagées dans fiscalite)
+        tax_rate = fiscal_tax_rate(account_type, years, tax_scenario, pea_early_penalty=False)
         
         # Calcul des impôts
         tax_paid = max(gain, 0) * tax_rate
@@ -538,33 +577,43 @@ class AdvancedStockSimulator:
             # Récupération des paramètres
             params = self.get_simulation_params()
             
-            # Simulation du prix
-            price_path = self.simulate_price_path(
-                params['initial_price'],
-                params['years'],
-                params['annual_return'],
-                params['volatility'],
-                params['dividend_yield'],
-                random_seed=42  # Seed fixe pour la reproductibilité
-            )
-            
-            # Calcul du portefeuille
-            portfolio = self.calculate_portfolio_value(
-                price_path,
-                params['initial_investment'],
-                params['monthly_investment'],
-                params['years']
-            )
-            
-            # Application de la fiscalité PEA
-            self.simulation_results['PEA'] = self.apply_taxation(
-                portfolio, "PEA", params['years'], params['tax_scenario']
-            )
+            # Seed fixe : résultat avant impôts déterministe, réutilisé depuis le cache
+            cache_key = self.simulation_cache.key(params, seed=42)
+            portfolio = self.simulation_cache.get(cache_key)
+            if portfolio is None:
+                with stage("simulate"):
+                    # Simulation du prix
+                    price_path = self.simulate_price_path(
+                        params['initial_price'],
+                        params['years'],
+                        params['annual_return'],
+                        params['volatility'],
+                        params['dividend_yield'],
+                        random_seed=42  # Seed fixe pour la reproductibilité
+                    )
+                    
+                    # Calcul du portefeuille
+                    portfolio = self.calculate_portfolio_value(
+                        price_path,
+                        params['initial_investment'],
+                        params['monthly_investment'],
+                        params['years']
+                    )
+                self.simulation_cache.put(cache_key, portfolio)
             
-            # Application de la fiscalité CTO
-            self.simulation_results['CTO'] = self.apply_taxation(
-                portfolio, "CTO", params['years'], params['tax_scenario']
-            )
+            with stage("tax"):
+                # Application de la fiscalité PEA
+                self.simulation_results['PEA'] = self.apply_taxation(
+                    portfolio, "PEA", params['years'], params['tax_scenario']
+                )
+                
+                # Application de la fiscalité CTO
+                self.simulation_results['CTO'] = self.apply_taxation(
+                    portfolio, "CTO", params['years'], params['tax_scenario']
+                )
+                
+                # Valeurs en euros d'aujourd'hui (taux d'inflation saisi)
+                self.add_real_terms(params)
             
             # Mise à jour des visualisations
             self.update_simple_chart()
@@ -575,74 +624,284 @@ class AdvancedStockSimulator:
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de la simulation:\n{str(e)}")
     
+    def add_real_terms(self, params):
+        """Ajoute aux résultats PEA/CTO la valeur nette, le capital versé et le CAGR réels"""
+        portfolio = self.simulation_results['PEA']
+        real = evaluate_scenarios([portfolio['final_value']], [portfolio['total_invested']], params['years'],
+                                  tax_scenarios=(params['tax_scenario'],), inflation_rates=(params['inflation_rate'],),
+                                  monthly_investment=params['monthly_investment'])
+        index = inflation_index(params['inflation_rate'], params['years'])
+        value_history_real = deflate(np.asarray(portfolio['value_history'])[None, :], index)[0]
+        
+        for a, account in enumerate(real['accounts']):
+            self.simulation_results[account].update({
+                'inflation_rate': params['inflation_rate'],
+                'final_value_net_real': float(real['real_net'][0, 0, a, 0]),
+                'total_invested_real': float(real['real_invested'][0, 0]),
+                'cagr_real': float(real_cagr(real)[0, 0, a, 0]),
+                'value_history_real': value_history_real
+            })
+    
     def run_monte_carlo(self):
         """Exécute une simulation Monte Carlo"""
         try:
             params = self.get_simulation_params()
             n_simulations = self.monte_carlo_sims_var.get()
             
-            # Stockage des résultats
-            pea_results = []
-            cto_results = []
-            all_simulations = []
+            # Archive demandée mais absente du disque : la simulation doit être refaite
+            cache_key = self.simulation_cache.key(params, seed=0, n_simulations=n_simulations)
+            archive_dir = os.path.join(ARCHIVE_DIR, cache_key) if self.archive_paths_var.get() else None
+            archive_missing = archive_dir is not None and not PathArchive.exists(archive_dir)
             
-            # Barre de progression
-            progress_window = self.show_progress("Simulation Monte Carlo en cours...", n_simulations)
+            # Exécution déjà enregistrée (seeds déterministes) : rechargement sans resimuler
+            key = self.run_key(params, n_simulations)
+            if not archive_missing and self.result_store.exists(key):
+                self.monte_carlo_results = self.load_monte_carlo(key)
+                self.attach_path_archive(self.monte_carlo_results, params, n_simulations)
+                self.refresh_monte_carlo_views()
+                messagebox.showinfo("Succès", "Monte Carlo rechargé depuis l'historique.")
+                return
             
-            # Exécution des simulations
-            for i in range(n_simulations):
-                # Simulation du prix
-                price_path = self.simulate_price_path(
-                    params['initial_price'],
-                    params['years'],
-                    params['annual_return'],
-                    params['volatility'],
-                    params['dividend_yield'],
-                    random_seed=i  # Seed différente pour chaque simulation
-                )
-                
-                # Calcul du portefeuille
-                portfolio = self.calculate_portfolio_value(
-                    price_path,
-                    params['initial_investment'],
-                    params['monthly_investment'],
-                    params['years']
-                )
+            # Trajectoires en cache (ex. seul le scénario fiscal a changé) : seule la fiscalité est refaite
+            pre_tax = self.simulation_cache.get(cache_key)
+            if pre_tax is None or archive_missing:
+                # Barre de progression
+                progress_window = self.show_progress("Simulation Monte Carlo en cours...", n_simulations)
                 
-                # Application des fiscalités
-                pea_result = self.apply_taxation(portfolio, "PEA", params['years'], params['tax_scenario'])
-                cto_result = self.apply_taxation(portfolio, "CTO", params['years'], params['tax_scenario'])
+                pre_tax = self.simulate_monte_carlo(params, n_simulations, progress_window, archive_dir)
+                self.simulation_cache.put(cache_key, {name: value for name, value in pre_tax.items()
+                                                      if name != 'all_simulations'})
                 
-                pea_results.append(pea_result['final_value_net'])
-                cto_results.append(cto_result['final_value_net'])
-                all_simulations.append(price_path)
-                
-                # Mise à jour de la barre de progression
-                if progress_window and i % 10 == 0:
-                    progress_window.update_progress(i + 1)
+                # Fermeture de la fenêtre de progression
+                if progress_window:
+                    progress_window.destroy()
             
-            # Fermeture de la fenêtre de progression
-            if progress_window:
-                progress_window.destroy()
-            
-            # Calcul des statistiques
-            self.monte_carlo_results = {
-                'pea_results': np.array(pea_results),
-                'cto_results': np.array(cto_results),
-                'all_simulations': all_simulations,
-                'params': params
-            }
+            self.monte_carlo_results = self.evaluate_monte_carlo(params, pre_tax)
+            self.attach_path_archive(self.monte_carlo_results, params, n_simulations)
+            self.save_monte_carlo(self.monte_carlo_results, n_simulations)
             
             # Mise à jour des visualisations
-            self.update_monte_carlo_chart()
-            self.update_distribution_chart()
-            self.update_monte_carlo_results()
+            self.refresh_monte_carlo_views()
             
-            messagebox.showinfo("Succès", f"Monte Carlo terminé!\n{len(pea_results)} simulations effectuées.")
+            n_done = len(self.monte_carlo_results['pea_results'])
+            messagebox.showinfo("Succès", f"Monte Carlo terminé!\n{n_done} simulations effectuées.")
             
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de Monte Carlo:\n{str(e)}")
     
+    def run_decumulation(self):
+        """Simule la phase de retraits après l'accumulation, pour le PEA et le CTO"""
+        try:
+            params = self.get_simulation_params()
+            n_simulations = self.monte_carlo_sims_var.get()
+            self.decumulation_results = self.compute_decumulation(params, n_simulations)
+            
+            lines = [f"{account} : probabilité de ruine {result['ruin_probability']:.1f}%, "
+                     f"revenu net médian 1re année {result['first_year_income'][50]:,.0f} €"
+                     for account, result in self.decumulation_results['accounts'].items()]
+            messagebox.showinfo("Phase de retraits", "\n".join(lines))
+            
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Erreur lors de la simulation des retraits:\n{str(e)}")
+    
+    def compute_decumulation(self, params, n_simulations):
+        """Retraits sur chaque compte à partir des mêmes valeurs de fin d'accumulation
+        
+        Les valeurs finales du dernier Monte Carlo sont réutilisées s'il porte
+        sur les mêmes paramètres et le même nombre de simulations.
+        """
+        settings = {
+            'retirement_years': self.retirement_years_var.get(),
+            'strategy': self.withdrawal_strategy_var.get(),
+            'annual_amount': self.withdrawal_amount_var.get(),
+            'withdrawal_rate': self.withdrawal_rate_var.get()
+        }
+        
+        mc = self.monte_carlo_results
+        start_values = cost_basis = None
+        if mc and mc['params'] == params and len(mc['final_values']) == n_simulations:
+            start_values, cost_basis = mc['final_values'], mc['invested']
+        
+        accounts = {}
+        with stage("simulate", n_simulations=n_simulations):
+            for account in ("PEA", "CTO"):
+                result = simulate_retirement(params, n_simulations, settings['retirement_years'],
+                                             settings['strategy'], settings['annual_amount'],
+                                             settings['withdrawal_rate'], account, pea_early_penalty=False,
+                                             start_values=start_values, cost_basis=cost_basis)
+                # Même point de départ pour le second compte (accumulation commune)
+                start_values, cost_basis = result['start_values'], result['cost_basis']
+                accounts[account] = summarize_retirement(result)
+        
+        return {'settings': settings, 'accounts': accounts, 'n_simulations': n_simulations}
+    
+    def compute_monte_carlo(self, params, n_simulations, progress_window=None):
+        """Calcul Monte Carlo pur (sans interface) : simulations, fiscalité et données de tracé"""
+        pre_tax = self.simulate_monte_carlo(params, n_simulations, progress_window)
+        return self.evaluate_monte_carlo(params, pre_tax)
+    
+    def simulate_monte_carlo(self, params, n_simulations, progress_window=None, archive_dir=None):
+        """Partie avant impôts : valeurs terminales, montants investis et résumé des trajectoires
+        
+        Toutes les trajectoires sont générées en un passage par le moteur vectorisé,
+        avec les mêmes seeds (0 à n-1) que simulate_price_path ; au-delà de
+        COMPACT_THRESHOLD simulations, les trajectoires sont stockées en float32.
+        Avec archive_dir, elles sont écrites par blocs dans une archive mappée
+        sur disque (réutilisée si elle existe) au lieu d'être gardées en mémoire.
+        """
+        dtype = COMPACT_DTYPE if n_simulations >= COMPACT_THRESHOLD else np.float64
+        # Indicateurs de risque par trajectoire, calculés bloc par bloc pendant la simulation
+        risk = PathRiskTracker(n_simulations, int(params['years'] * 12), params['initial_investment'],
+                               params['monthly_investment'])
+        with stage("simulate", n_simulations=n_simulations):
+            if archive_dir:
+                if PathArchive.exists(archive_dir):
+                    archive = PathArchive.open(archive_dir)
+                    for block in archive.blocks():
+                        risk.add(*block)
+                else:
+                    archive = simulate_to_archive(params, n_simulations, archive_dir, dtype=dtype,
+                                                  on_block=risk.add)
+                gross = {'final_values': np.asarray(archive.final_values),
+                         'invested': np.full(n_simulations, archive.meta['invested']),
+                         'price_paths': archive.price_paths}
+                paths = archive.summarize()
+            else:
+                gross = simulate_gross(params, n_simulations, dtype=dtype, on_block=risk.add)
+                paths = summarize_paths(gross['price_paths'])
+        
+        if progress_window:
+            progress_window.update_progress(n_simulations)
+        
+        return {
+            'final_values': gross['final_values'],
+            'invested': gross['invested'],
+            'path_percentiles': np.asarray(paths['percentiles']),
+            'path_bands': paths['bands'],
+            'path_sample': paths['sample'],
+            **{f'risk_{name}': value for name, value in risk.results().items()},
+            'all_simulations': gross['price_paths']
+        }
+    
+    def evaluate_monte_carlo(self, params, pre_tax):
+        """Partie après impôts : fiscalité (scénario de params), statistiques et données de tracé"""
+        final_values = pre_tax['final_values']
+        n_simulations = len(final_values)
+        
+        # Fiscalité appliquée en un lot à toutes les simulations (mêmes règles que apply_taxation)
+        with stage("tax", n_simulations=n_simulations):
+            tax_analysis = tax_analysis_batch(final_values, pre_tax['invested'], params['years'],
+                                              params['tax_scenario'], pea_early_penalty=False)
+            
+            # Tous les scénarios fiscaux et comptes, en nominal et en euros d'aujourd'hui
+            scenarios = evaluate_scenarios(final_values, pre_tax['invested'], params['years'],
+                                           inflation_rates=(0.0, params['inflation_rate']),
+                                           monthly_investment=params['monthly_investment'])
+        pea_results = tax_analysis['PEA']['net']
+        cto_results = tax_analysis['CTO']['net']
+        
+        # Données de tracé pré-agrégées (indépendantes du nombre de simulations)
+        with stage("stats", n_simulations=n_simulations):
+            paths_summary = {
+                'percentiles': tuple(pre_tax['path_percentiles']),
+                'bands': pre_tax['path_bands'],
+                'sample': pre_tax['path_sample'],
+                'n_paths': n_simulations
+            }
+            plot_data = self.monte_carlo_plot_data(pea_results, cto_results, paths_summary)
+            tax_summary = summarize_tax_analysis(tax_analysis)
+            scenario_summary = summarize_scenarios(scenarios)
+        
+        return {
+            'pea_results': pea_results,
+            'cto_results': cto_results,
+            'final_values': final_values,
+            'invested': pre_tax['invested'],
+            'all_simulations': pre_tax.get('all_simulations'),  # None si issues du cache ou de l'historique
+            'plot_data': plot_data,
+            'tax_summary': tax_summary,
+            'scenarios': scenario_summary,
+            'path_risk': self.path_risk(pre_tax),
+            'params': params
+        }
+    
+    @staticmethod
+    def path_risk(pre_tax):
+        """Indicateurs de risque par trajectoire ('risk_*' de la partie avant impôts), ou None"""
+        if 'risk_max_drawdown' not in pre_tax:
+            return None  # Exécution enregistrée avant le calcul des indicateurs
+        return {name[len('risk_'):]: value for name, value in pre_tax.items() if name.startswith('risk_')}
+    
+    def monte_carlo_plot_data(self, pea_results, cto_results, paths_summary):
+        """Données de tracé Monte Carlo à partir des valeurs nettes et du résumé des trajectoires"""
+        n_bins = max(1, min(50, len(pea_results) // 10))
+        return {
+            'paths': paths_summary,
+            'pea_box': box_stats(pea_results, 'PEA'),
+            'cto_box': box_stats(cto_results, 'CTO'),
+            'pea_hist': histogram_counts(pea_results, n_bins)
+        }
+    
+    def save_monte_carlo(self, results, n_simulations):
+        """Enregistre une exécution Monte Carlo dans l'historique ; renvoie sa clé"""
+        paths = results['plot_data']['paths']
+        arrays = {
+            'final_values': results['final_values'],
+            'pea_net': results['pea_results'],
+            'cto_net': results['cto_results'],
+            'invested': np.float64(results['invested'][0]),  # Identique pour tous les chemins
+            'path_percentiles': np.asarray(paths['percentiles']),
+            'path_bands': paths['bands'],
+            'path_sample': paths['sample']
+        }
+        if results.get('path_risk'):
+            arrays.update({f'risk_{name}': value for name, value in results['path_risk'].items()})
+        stats = run_statistics(results['final_values'], results['pea_results'],
+                               results['cto_results'], results['invested'])
+        return self.result_store.save(results['params'], arrays, n_simulations, stats,
+                                      key=self.run_key(results['params'], n_simulations))
+    
+    @staticmethod
+    def run_key(params, n_simulations):
+        """Clé d'historique : paramètres, nombre de chemins et version du moteur
+        
+        Une exécution produite par une autre version du moteur n'est pas
+        rechargée automatiquement, comme pour le cache de simulation.
+        """
+        return param_hash(params, n_simulations=n_simulations, engine_version=ENGINE_VERSION)
+    
+    def load_monte_carlo(self, key):
+        """Reconstruit les résultats Monte Carlo d'une exécution enregistrée"""
+        record = self.result_store.load(key, names=['final_values', 'invested', 'path_percentiles',
+                                                    'path_bands', 'path_sample', 'risk_peaks',
+                                                    'risk_peak_months',
+                                                    *(f'risk_{name}' for name in PATH_METRICS)])
+        if record is None:
+            raise KeyError(f"Exécution introuvable : {key}")
+        
+        # Capital versé stocké en scalaire (un par chemin dans les anciennes exécutions)
+        arrays = record['arrays']
+        arrays['invested'] = np.full(len(arrays['final_values']), arrays['invested'], dtype=np.float64)
+        
+        results = self.evaluate_monte_carlo(record['params'], arrays)
+        results['key'] = record['key']
+        return results
+    
+    def attach_path_archive(self, results, params, n_simulations):
+        """Rattache (sans lecture) les trajectoires archivées sur disque, si elles existent"""
+        if results.get('all_simulations') is not None:
+            return
+        archive_dir = os.path.join(ARCHIVE_DIR, self.simulation_cache.key(params, seed=0,
+                                                                           n_simulations=n_simulations))
+        if PathArchive.exists(archive_dir):
+            results['all_simulations'] = PathArchive.open(archive_dir).price_paths
+    
+    def refresh_monte_carlo_views(self):
+        """Met à jour graphiques et indicateurs Monte Carlo"""
+        self.update_monte_carlo_chart()
+        self.update_distribution_chart()
+        self.update_monte_carlo_results()
+    
     def compare_pea_cto(self):
         """Compare les performances PEA vs CTO"""
         if not self.simulation_results:
@@ -710,90 +969,57 @@ class AdvancedStockSimulator:
             'inflation_rate': self.inflation_rate_var.get()
         }
     
+    def set_simulation_params(self, params):
+        """Remplit le formulaire avec des paramètres de simulation (inverse de get_simulation_params)"""
+        variables = {
+            'ticker': self.ticker_var,
+            'initial_price': self.initial_price_var,
+            'initial_investment': self.investment_var,
+            'monthly_investment': self.monthly_investment_var,
+            'years': self.years_var,
+            'annual_return': self.annual_return_var,
+            'volatility': self.volatility_var,
+            'dividend_yield': self.dividend_yield_var,
+            'tax_scenario': self.tax_scenario_var,
+            'inflation_rate': self.inflation_rate_var
+        }
+        for name, variable in variables.items():
+            if name in params:
+                variable.set(params[name])
+    
     def update_simple_chart(self):
         """Met à jour le graphique de simulation simple"""
         if not self.simulation_results:
             return
         
-        self.ax_simple.clear()
-        
         pea_result = self.simulation_results['PEA']
         months = self.years_var.get() * 12
         time_axis = np.arange(months) / 12
         
-        # Courbe PEA
-        if 'value_history' in pea_result:
-            self.ax_simple.plot(time_axis, pea_result['value_history'], 
-                              label='PEA', color=self.colors['pea'], linewidth=2)
-        
-        # Ligne d'investissement total
-        self.ax_simple.axhline(y=pea_result['total_invested'], 
-                             color='gray', linestyle='--', alpha=0.5,
-                             label=f"Investissement: {pea_result['total_invested']:,.0f} €")
-        
-        # Configuration
-        self.ax_simple.set_xlabel("Années")
-        self.ax_simple.set_ylabel("Valeur (€)")
-        self.ax_simple.set_title(f"Simulation: {self.ticker_var.get()} - {self.years_var.get()} ans")
-        self.ax_simple.legend()
-        self.ax_simple.grid(True, alpha=0.3)
-        
-        # Format de l'axe Y
-        self.ax_simple.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:,.0f} €'))
-        
-        self.fig_simple.tight_layout()
-        self.canvas_simple.draw()
+        self.chart_simple.update(
+            time_axis,
+            pea_result['value_history'],
+            pea_result['total_invested'],
+            f"Simulation: {self.ticker_var.get()} - {self.years_var.get()} ans"
+        )
     
     def update_monte_carlo_chart(self):
         """Met à jour le graphique Monte Carlo"""
         if not self.monte_carlo_results:
             return
         
-        self.ax_monte.clear()
-        
-        pea_results = self.monte_carlo_results['pea_results']
-        cto_results = self.monte_carlo_results['cto_results']
-        
-        # Calcul des percentiles
-        percentiles = [5, 25, 50, 75, 95]
-        pea_percentiles = np.percentile(pea_results, percentiles)
-        cto_percentiles = np.percentile(cto_results, percentiles)
-        
-        # Box plot
-        bp_data = [pea_results, cto_results]
-        bp = self.ax_monte.boxplot(bp_data, patch_artist=True, labels=['PEA', 'CTO'])
-        
-        # Couleurs
-        bp['boxes'][0].set_facecolor(self.colors['pea'])
-        bp['boxes'][1].set_facecolor(self.colors['cto'])
-        
-        # Configuration
-        self.ax_monte.set_ylabel("Valeur finale nette (€)")
-        self.ax_monte.set_title("Distribution des résultats - Monte Carlo")
-        self.ax_monte.grid(True, alpha=0.3)
-        
-        # Ajouter des annotations pour les percentiles
-        for i, (label, values) in enumerate([('PEA', pea_percentiles), ('CTO', cto_percentiles)]):
-            for j, (p, val) in enumerate(zip(percentiles, values)):
-                if j == 2:  # Médiane
-                    self.ax_monte.text(i + 1, val, f'{val:,.0f} €', 
-                                     ha='center', va='bottom', fontweight='bold')
-        
-        self.fig_monte.tight_layout()
-        self.canvas_monte.draw()
+        plot_data = self.monte_carlo_results['plot_data']
+        self.chart_monte.update(plot_data['paths'], [plot_data['pea_box'], plot_data['cto_box']])
     
     def update_comparison_chart(self):
         """Met à jour le graphique de comparaison"""
         if not self.simulation_results:
             return
         
-        self.ax_comp.clear()
-        
         pea_result = self.simulation_results['PEA']
         cto_result = self.simulation_results['CTO']
         
         # Données pour le graphique à barres
-        categories = ['Valeur finale', 'Gain net', 'Impôts payés', 'CAGR']
         pea_values = [
             pea_result['final_value_net'],
             pea_result['total_gain_net'],
@@ -807,66 +1033,17 @@ class AdvancedStockSimulator:
             cto_result['cagr']
         ]
         
-        x = np.arange(len(categories))
-        width = 0.35
-        
-        # Barres
-        bars1 = self.ax_comp.bar(x - width/2, pea_values, width, label='PEA', color=self.colors['pea'])
-        bars2 = self.ax_comp.bar(x + width/2, cto_values, width, label='CTO', color=self.colors['cto'])
-        
-        # Configuration
-        self.ax_comp.set_xlabel("Métriques")
-        self.ax_comp.set_ylabel("Valeur")
-        self.ax_comp.set_title("Comparaison PEA vs CTO")
-        self.ax_comp.set_xticks(x)
-        self.ax_comp.set_xticklabels(categories)
-        self.ax_comp.legend()
-        self.ax_comp.grid(True, alpha=0.3, axis='y')
-        
-        # Ajouter les valeurs sur les barres
-        for bars in [bars1, bars2]:
-            for bar in bars:
-                height = bar.get_height()
-                if bar.get_x() < 3:  # Pour les valeurs monétaires
-                    self.ax_comp.text(bar.get_x() + bar.get_width()/2., height,
-                                    f'{height:,.0f}', ha='center', va='bottom')
-                else:  # Pour le CAGR
-                    self.ax_comp.text(bar.get_x() + bar.get_width()/2., height,
-                                    f'{height:.1f}%', ha='center', va='bottom')
-        
-        self.fig_comp.tight_layout()
-        self.canvas_comp.draw()
+        self.chart_comp.update(pea_values, cto_values)
     
     def update_distribution_chart(self):
         """Met à jour le graphique de distribution"""
         if not self.monte_carlo_results:
             return
         
-        self.ax_dist.clear()
-        
-        pea_results = self.monte_carlo_results['pea_results']
-        
-        # Histogramme
-        n_bins = min(50, len(pea_results) // 10)
-        self.ax_dist.hist(pea_results, bins=n_bins, alpha=0.7, 
-                         color=self.colors['chart_1'], edgecolor='black')
-        
-        # Lignes pour les indicateurs
-        mean_val = np.mean(pea_results)
-        median_val = np.median(pea_results)
-        
-        self.ax_dist.axvline(mean_val, color='red', linestyle='--', linewidth=2, label=f'Moyenne: {mean_val:,.0f} €')
-        self.ax_dist.axvline(median_val, color='green', linestyle='--', linewidth=2, label=f'Médiane: {median_val:,.0f} €')
-        
-        # Configuration
-        self.ax_dist.set_xlabel("Valeur finale nette (€)")
-        self.ax_dist.set_ylabel("Fréquence")
-        self.ax_dist.set_title("Distribution des résultats - PEA")
-        self.ax_dist.legend()
-        self.ax_dist.grid(True, alpha=0.3)
+        plot_data = self.monte_carlo_results['plot_data']
+        counts, edges = plot_data['pea_hist']
         
-        self.fig_dist.tight_layout()
-        self.canvas_dist.draw()
+        self.chart_dist.update(counts, edges, plot_data['pea_box']['mean'], plot_data['pea_box']['med'])
     
     def update_results_display(self):
         """Met à jour l'affichage des résultats"""
@@ -898,12 +1075,15 @@ class AdvancedStockSimulator:
                 else:
                     widget.config(foreground='red')
     
+    @instrumented("stats")
     def update_monte_carlo_results(self):
         """Met à jour les résultats Monte Carlo"""
         if not self.monte_carlo_results:
             return
         
         pea_results = self.monte_carlo_results['pea_results']
+        # Paramètres de l'exécution affichée (éventuellement rechargée de l'historique), pas du formulaire
+        params = self.monte_carlo_results['params']
         
         # Calcul des statistiques
         mean_val = np.mean(pea_results)
@@ -911,14 +1091,14 @@ class AdvancedStockSimulator:
         
         # Sharpe ratio (simplifié)
         risk_free_rate = 2.0  # Taux sans risque estimé
-        excess_return = (mean_val / self.investment_var.get()) ** (1/self.years_var.get()) - 1 - risk_free_rate/100
+        excess_return = (mean_val / params['initial_investment']) ** (1/params['years']) - 1 - risk_free_rate/100
         sharpe_ratio = excess_return / (std_val / mean_val) if std_val > 0 else 0
         
         # VaR 95%
         var_95 = np.percentile(pea_results, 5)
         
         # Probabilité de perte
-        initial_investment = self.investment_var.get()
+        initial_investment = params['initial_investment']
         loss_prob = np.sum(pea_results < initial_investment) / len(pea_results) * 100
         
         # Mise à jour des widgets
@@ -1010,6 +1190,8 @@ RÉSULTATS DÉTAILLÉS
 • Taux d'imposition: {pea_result.get('tax_rate', 0)*100:.1f}%
 • Rendement annualisé (CAGR): {pea_result.get('cagr', 0):.2f}%
 • Investissement total: {pea_result.get('total_invested', 0):,.2f} €
+• Valeur finale nette réelle (inflation {pea_result.get('inflation_rate', 0):.1f}%): {pea_result.get('final_value_net_real', 0):,.2f} €
+• CAGR réel: {pea_result.get('cagr_real', 0):.2f}%
 
 [CTO - Compte Titres Ordinaire]
 {'─'*40}
@@ -1020,6 +1202,8 @@ RÉSULTATS DÉTAILLÉS
 • Impôts payés: {cto_result.get('tax_paid', 0):,.2f} €
 • Taux d'imposition: {cto_result.get('tax_rate', 0)*100:.1f}%
 • Rendement annualisé (CAGR): {cto_result.get('cagr', 0):.2f}%
+• Valeur finale nette réelle (inflation {cto_result.get('inflation_rate', 0):.1f}%): {cto_result.get('final_value_net_real', 0):,.2f} €
+• CAGR réel: {cto_result.get('cagr_real', 0):.2f}%
 
 {'='*70}
 ANALYSE COMPARATIVE
@@ -1056,6 +1240,72 @@ RECOMMANDATIONS
         else:
             content += "⏳ Durée insuffisante pour l'avantage fiscal PEA\n"
         
+        # Scénarios Monte Carlo : tous les régimes fiscaux sur la même distribution brute
+        if self.monte_carlo_results and self.monte_carlo_results.get('scenarios'):
+            content += f"\n{'='*70}\nSCÉNARIOS MONTE CARLO (valeur nette, euros d'aujourd'hui)\n{'='*70}\n\n"
+            content += (f"{'Scénario':<12}{'Infl.':>6}{'Compte':>7}{'Taux':>7}{'VaR 95%':>11}{'Médiane':>11}"
+                        f"{'P95':>11}{'CAGR':>7}{'Perte':>7}\n")
+            for row in self.monte_carlo_results['scenarios']:
+                content += (f"{row['tax_scenario']:<12}{row['inflation_rate']:>5.1f}%{row['account']:>7}"
+                            f"{row['rate'] * 100:>6.1f}%{row['var_95']:>11,.0f}{row['p50']:>11,.0f}"
+                            f"{row['p95']:>11,.0f}{row['cagr']:>6.2f}%{row['loss_prob']:>6.1f}%\n")
+        
+        # Risque de trajectoire : distributions par chemin et queue des valeurs finales
+        path_risk = self.monte_carlo_results.get('path_risk') if self.monte_carlo_results else None
+        if path_risk:
+            mc = self.monte_carlo_results
+            confidence = self.confidence_level_var.get()
+            risk = summarize_risk(path_risk, {'PEA': mc['pea_results'], 'CTO': mc['cto_results']}, confidence)
+            content += f"\n{'='*70}\nRISQUE DE TRAJECTOIRE (Monte Carlo, {len(mc['pea_results'])} chemins)\n{'='*70}\n\n"
+            content += f"{'Indicateur':<30}{'Moyenne':>10}{'P5':>10}{'Médiane':>10}{'P95':>10}\n"
+            for row in risk['paths']:
+                content += (f"{row['label']:<30}{row['mean']:>10.2f}{row['p5']:>10.2f}"
+                            f"{row['p50']:>10.2f}{row['p95']:>10.2f}\n")
+            content += "\n"
+            for row in risk['tail']:
+                content += (f"{row['account']} : VaR {confidence:.0f}% {row['var']:,.0f} € — "
+                            f"CVaR (moyenne des {100 - confidence:.0f}% pires) {row['cvar']:,.0f} €\n")
+            
+            goal = self.goal_amount_var.get()
+            if len(path_risk['peak_months']):
+                probabilities = goal_probability(path_risk['peaks'], goal)
+                content += f"\nProbabilité d'avoir atteint {goal:,.0f} € (valeur brute) :\n"
+                cells = [f"{month // 12:>2} an(s) : {p:5.1f}%"
+                         for month, p in zip(path_risk['peak_months'], probabilities)]
+                for start in range(0, len(cells), 5):
+                    content += "  " + "   ".join(cells[start:start + 5]) + "\n"
+        
+        # Phase de retraits : ruine et revenus nets après l'accumulation
+        if self.decumulation_results:
+            settings = self.decumulation_results['settings']
+            content += (f"\n{'='*70}\nPHASE DE RETRAITS ({settings['retirement_years']} ans, "
+                        f"{self.decumulation_results['n_simulations']} chemins)\n{'='*70}\n\n")
+            content += f"Règle: {WITHDRAWAL_STRATEGIES[settings['strategy']]}"
+            if settings['strategy'] == "fixed":
+                content += f" — {settings['annual_amount']:,.0f} €/an net, indexé sur l'inflation\n\n"
+            else:
+                content += f" — {settings['withdrawal_rate']:.1f}%/an\n\n"
+            content += f"{'Indicateur':<30}{'PEA':>15}{'CTO':>15}\n"
+            accounts = self.decumulation_results['accounts']
+            rows = [
+                ("Probabilité de ruine", lambda r: f"{r['ruin_probability']:.1f}%"),
+                ("Année médiane de ruine",
+                 lambda r: f"{r['median_ruin_year']:.1f}" if r['median_ruin_year'] is not None else "-"),
+                ("Revenu net 1re année (méd.)", lambda r: f"{r['first_year_income'][50]:,.0f} €"),
+                ("Revenu net annuel min (P5)", lambda r: f"{r['lowest_income'][5]:,.0f} €"),
+                ("Total retiré net (méd.)", lambda r: f"{r['net_withdrawn'][50]:,.0f} €"),
+                ("Impôt payé (méd.)", lambda r: f"{r['tax_paid'][50]:,.0f} €"),
+                ("Capital restant (méd.)", lambda r: f"{r['final_values'][50]:,.0f} €"),
+            ]
+            for label, cell in rows:
+                content += f"{label:<30}{cell(accounts['PEA']):>15}{cell(accounts['CTO']):>15}\n"
+            
+            survival = accounts['PEA']['survival_by_year']
+            content += "\nPortefeuille encore en vie (PEA) :\n"
+            cells = [f"{year:>2} an(s) : {p:5.1f}%" for year, p in enumerate(survival, 1) if year % 5 == 0]
+            for start in range(0, len(cells), 5):
+                content += "  " + "   ".join(cells[start:start + 5]) + "\n"
+        
         content += f"\n{'='*70}\n"
         content += "NOTE: Ces résultats sont basés sur des simulations et des hypothèses.\n"
         content += "Les performances passées ne préjugent pas des performances futures.\n"
@@ -1088,8 +1338,11 @@ RECOMMANDATIONS
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de l'export:\n{str(e)}")
     
+    @instrumented("export")
     def export_to_excel(self, filename):
         """Exporte les données vers Excel"""
+        import pandas as pd
+        
         with pd.ExcelWriter(filename, engine='openpyxl') as writer:
             # Paramètres
             params_df = pd.DataFrame([
@@ -1121,9 +1374,29 @@ RECOMMANDATIONS
                 
                 results_df = pd.DataFrame(results_data)
                 results_df.to_excel(writer, sheet_name='Résultats', index=False)
+            
+            # Distribution Monte Carlo : une ligne par chemin, puis statistiques
+            if self.monte_carlo_results:
+                mc = self.monte_carlo_results
+                pd.DataFrame({
+                    "Simulation": np.arange(1, len(mc['pea_results']) + 1),
+                    "Valeur finale brute": mc['final_values'],
+                    "Valeur nette PEA": mc['pea_results'],
+                    "Valeur nette CTO": mc['cto_results'],
+                    **({label: mc['path_risk'][name] for name, label in PATH_METRICS.items()}
+                       if mc.get('path_risk') else {})
+                }).to_excel(writer, sheet_name='Monte Carlo', index=False)
+                
+                stats = run_statistics(mc['final_values'], mc['pea_results'],
+                                       mc['cto_results'], mc['invested'])
+                pd.DataFrame(list(stats.items()), columns=["Statistique", "Valeur"]).to_excel(
+                    writer, sheet_name='Statistiques MC', index=False)
     
+    @instrumented("export")
     def export_to_csv(self, filename):
         """Exporte les données vers CSV"""
+        import pandas as pd
+        
         if self.simulation_results:
             data = []
             for account, result in self.simulation_results.items():
@@ -1165,21 +1438,11 @@ RECOMMANDATIONS
         """Réinitialise toutes les simulations"""
         self.simulation_results = {}
         self.monte_carlo_results = None
+        self.decumulation_results = None
         
-        # Réinitialiser les graphiques
-        for ax in [self.ax_simple, self.ax_monte, self.ax_comp, self.ax_dist]:
-            ax.clear()
-            ax.text(0.5, 0.5, "Aucune donnée disponible\n\nExécutez une simulation", 
-                   ha='center', va='center', transform=ax.transAxes, fontsize=12, color='gray')
-            ax.set_title("")
-            ax.set_xticks([])
-            ax.set_yticks([])
-        
-        # Redessiner les canvas
-        self.canvas_simple.draw()
-        self.canvas_monte.draw()
-        self.canvas_comp.draw()
-        self.canvas_dist.draw()
+        # Réinitialiser les graphiques (les artistes sont masqués, pas détruits)
+        for chart in [self.chart_simple, self.chart_monte, self.chart_comp, self.chart_dist]:
+            chart.reset()
         
         # Réinitialiser les résultats
         for widget in self.results_widgets.values():
@@ -1187,6 +1450,218 @@ RECOMMANDATIONS
         
         messagebox.showinfo("Réinitialisation", "Toutes les simulations ont été réinitialisées.")
     
+    def show_instrumentation(self):
+        """Affiche le temps, le nombre d'appels et le pic mémoire de chaque étape"""
+        window = tk.Toplevel(self.root)
+        window.title("Performances par étape")
+        window.geometry("720x320")
+        
+        columns = ('calls', 'total', 'mean', 'max', 'memory')
+        headings = ["Appels", "Total (ms)", "Moyen (ms)", "Max (ms)", "Pic mémoire (Mo)"]
+        tree = ttk.Treeview(window, columns=columns, height=8)
+        tree.heading('#0', text="Étape")
+        tree.column('#0', width=120)
+        for column, heading in zip(columns, headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=110, anchor=tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        def refresh():
+            tree.delete(*tree.get_children())
+            for row in recorder.report():
+                memory = f"{row['peak_memory_mb']:.1f}" if row['peak_memory_mb'] is not None else "-"
+                tree.insert('', tk.END, text=row['stage'], values=(
+                    row['calls'], f"{row['total_s'] * 1e3:,.1f}", f"{row['mean_s'] * 1e3:,.2f}",
+                    f"{row['max_s'] * 1e3:,.1f}", memory))
+        
+        def reset():
+            recorder.reset()
+            refresh()
+        
+        def export():
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".jsonl",
+                filetypes=[("JSON lines", "*.jsonl"), ("Tous les fichiers", "*.*")],
+                initialfile=f"performances_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            )
+            if filename:
+                recorder.write_jsonl(filename)
+        
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(button_frame, text="Rafraîchir", command=refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Remettre à zéro", command=reset).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Exporter (JSON lines)", command=export).pack(side=tk.LEFT, padx=5)
+        
+        refresh()
+
+    def show_history(self):
+        """Historique des exécutions Monte Carlo : rechargement, comparaison, suppression"""
+        window = tk.Toplevel(self.root)
+        window.title("Historique des simulations")
+        window.geometry("980x380")
+
+        columns = ('created', 'ticker', 'years', 'n_simulations', 'tax_scenario',
+                   'pea_median', 'cto_median', 'prob_pea_better')
+        headings = ["Date", "Ticker", "Durée", "Simulations", "Scénario",
+                    "PEA médian", "CTO médian", "PEA > CTO (%)"]
+        tree = ttk.Treeview(window, columns=columns, show='headings', height=10)
+        for column, heading in zip(columns, headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=115, anchor=tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        def refresh():
+            tree.delete(*tree.get_children())
+            for run in self.result_store.query():
+                tree.insert('', tk.END, iid=run['key'], values=(
+                    run['created'].replace('T', ' '), run['ticker'], run['years'], run['n_simulations'],
+                    run['tax_scenario'], f"{run['pea_median']:,.0f}", f"{run['cto_median']:,.0f}",
+                    f"{run['prob_pea_better']:.1f}"))
+
+        def reload():
+            selection = tree.selection()
+            if not selection:
+                return
+            self.monte_carlo_results = self.load_monte_carlo(selection[0])
+            # Le formulaire reprend les paramètres de l'exécution (rapport, export, relances)
+            self.set_simulation_params(self.monte_carlo_results['params'])
+            self.monte_carlo_sims_var.set(len(self.monte_carlo_results['pea_results']))
+            self.refresh_monte_carlo_views()
+
+        def compare():
+            selection = tree.selection()
+            if len(selection) < 2:
+                messagebox.showwarning("Avertissement", "Sélectionnez au moins deux exécutions")
+                return
+            comparison = self.result_store.compare(list(selection))
+
+            rows = ['created', *comparison['varying_params'], 'pea_mean', 'pea_median', 'pea_p5',
+                    'pea_loss_prob', 'cto_mean', 'cto_median', 'cto_p5', 'cto_loss_prob', 'prob_pea_better']
+            lines = []
+            for name in rows:
+                values = [run[name] for run in comparison['runs']]
+                cells = [f"{value:>16,.2f}" if isinstance(value, float) else f"{str(value):>16}"
+                         for value in values]
+                lines.append(f"{name:<18}" + "".join(cells))
+
+            compare_window = tk.Toplevel(window)
+            compare_window.title("Comparaison des exécutions")
+            text = tk.Text(compare_window, wrap=tk.NONE, font=('Courier', 10), height=len(lines) + 1)
+            text.insert(1.0, "\n".join(lines))
+            text.config(state=tk.DISABLED)
+            text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        def delete():
+            for key in tree.selection():
+                self.result_store.delete(key)
+            refresh()
+
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(button_frame, text="Recharger", command=reload).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Comparer", command=compare).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Supprimer", command=delete).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Rafraîchir", command=refresh).pack(side=tk.LEFT, padx=5)
+
+        refresh()
+
+    def goal_solver(self, params, n_paths, max_years, account):
+        """Solveur d'objectif ; réutilisé (mêmes tirages) tant que les trajectoires sont identiques"""
+        key = param_hash({name: params[name] for name in
+                          ('initial_price', 'annual_return', 'volatility', 'dividend_yield')},
+                         n_paths=n_paths, max_years=max_years, account=account,
+                         tax_scenario=params['tax_scenario'], pea_early_penalty=False)
+        solver = getattr(self, '_goal_solver', None)
+        if solver is None or self._goal_solver_key != key:
+            with stage("simulate", n_simulations=n_paths):
+                # Même règle PEA que le Monte Carlo (pas d'impôt avant 5 ans)
+                solver = GoalSolver(params, n_paths, max_years, account, pea_early_penalty=False)
+            self._goal_solver, self._goal_solver_key = solver, key
+        solver.params = params
+        return solver
+
+    def show_goal_solver(self):
+        """Planification par objectif : versement, apport ou durée pour atteindre un capital net"""
+        window = tk.Toplevel(self.root)
+        window.title("Planification par objectif")
+        window.geometry("560x330")
+
+        probability_var = tk.DoubleVar(value=90.0)
+        variable_var = tk.StringVar(value='monthly_investment')
+        account_var = tk.StringVar(value="PEA")
+        max_years_var = tk.IntVar(value=max(40, self.years_var.get()))
+        real_var = tk.BooleanVar(value=False)
+
+        form = ttk.Frame(window, padding="15")
+        form.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(form, text="Objectif net (€):").grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(form, textvariable=self.goal_amount_var, width=12).grid(row=0, column=1, sticky=tk.W, pady=5)
+        ttk.Label(form, text="Probabilité visée (%):").grid(row=0, column=2, sticky=tk.W, padx=20, pady=5)
+        ttk.Entry(form, textvariable=probability_var, width=8).grid(row=0, column=3, sticky=tk.W, pady=5)
+
+        ttk.Label(form, text="Paramètre à ajuster:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        variables_frame = ttk.Frame(form)
+        variables_frame.grid(row=1, column=1, columnspan=3, sticky=tk.W, pady=5)
+        for value, text in GOAL_VARIABLES.items():
+            ttk.Radiobutton(variables_frame, text=text, variable=variable_var, value=value).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(form, text="Compte:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        accounts_frame = ttk.Frame(form)
+        accounts_frame.grid(row=2, column=1, sticky=tk.W, pady=5)
+        for account in ("PEA", "CTO"):
+            ttk.Radiobutton(accounts_frame, text=account, variable=account_var, value=account).pack(side=tk.LEFT, padx=5)
+        ttk.Label(form, text="Horizon max (années):").grid(row=2, column=2, sticky=tk.W, padx=20, pady=5)
+        ttk.Entry(form, textvariable=max_years_var, width=8).grid(row=2, column=3, sticky=tk.W, pady=5)
+
+        ttk.Checkbutton(form, text="Objectif en euros d'aujourd'hui (inflation)",
+                        variable=real_var).grid(row=3, column=0, columnspan=4, sticky=tk.W, pady=5)
+
+        result_label = ttk.Label(form, text="", font=('Arial', 11, 'bold'), wraplength=500)
+        result_label.grid(row=5, column=0, columnspan=4, sticky=tk.W, pady=10)
+        solution = {}
+
+        targets = {'monthly_investment': self.monthly_investment_var,
+                   'initial_investment': self.investment_var,
+                   'years': self.years_var}
+
+        def solve():
+            try:
+                params = self.get_simulation_params()
+                max_years = max(max_years_var.get(), params['years'])
+                # Nombre de chemins du Monte Carlo, borné pour la mémoire du solveur
+                n_paths = min(self.monte_carlo_sims_var.get(), GOAL_MAX_PATHS)
+                solver = self.goal_solver(params, n_paths, max_years, account_var.get())
+                variable = variable_var.get()
+                result = solver.solve(self.goal_amount_var.get(), probability_var.get(), variable,
+                                      real=real_var.get())
+            except Exception as e:
+                messagebox.showerror("Erreur", f"Erreur lors de la résolution:\n{str(e)}")
+                return
+
+            solution.clear()
+            if result['value'] is None:
+                result_label.config(text=f"Objectif inatteignable : {result['probability']:.1f}% au mieux "
+                                         f"({GOAL_VARIABLES[variable].lower()} dans les bornes).",
+                                    foreground='red')
+                return
+            value = result['value']
+            text = f"{value} ans" if variable == 'years' else f"{value:,.0f} €"
+            result_label.config(text=f"{GOAL_VARIABLES[variable]} : {text} → probabilité {result['probability']:.1f}% "
+                                     f"({result['n_paths']} trajectoires, {result['evaluations']} évaluations)",
+                                foreground='green')
+            solution[variable] = value
+
+        def apply():
+            for variable, value in solution.items():
+                targets[variable].set(value if variable == 'years' else round(value, 2))
+
+        button_frame = ttk.Frame(form)
+        button_frame.grid(row=4, column=0, columnspan=4, sticky=tk.W, pady=10)
+        ttk.Button(button_frame, text="Résoudre", command=solve).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Appliquer aux paramètres", command=apply).pack(side=tk.LEFT, padx=5)
+
     def show_progress(self, title, max_value):
         """Affiche une fenêtre de progression"""
         progress_window = tk.Toplevel(self.root)
@@ -1,9 +1,15 @@
+import asyncio
+from functools import lru_cache
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import ipywidgets as widgets
 from ipywidgets import interact
-from IPython.display import display
+from IPython.display import clear_output, display
+
+# Mode réactif : une seule figure mise à jour en place, calculs mémoïsés
+MODE_REACTIF = True
+DELAI_DEBOUNCE = 0.15  # secondes d'inactivité avant recalcul
 
 # --- Simulation PEA (imposition à la sortie) ---
 def simulate_pea(initial, monthly, rate, months, tax_rate=0.172):
@@ -89,11 +95,118 @@ def simulate(capital_initial=2000, versement_mensuel=200, annual_return=0.08, ye
     plt.tight_layout()
     plt.show()
 
+# --- Calcul mémoïsé par tuple de paramètres ---
+@lru_cache(maxsize=512)
+def simulate_cached(capital_initial, versement_mensuel, annual_return, years):
+    months = years * 12
+    monthly_return = (1 + annual_return) ** (1/12) - 1
+
+    pea_net, pea_invested, pea_gain_net, pea_tax, pea_values, pea_values_net = simulate_pea(
+        capital_initial, versement_mensuel, monthly_return, months
+    )
+    cto_net, cto_invested, cto_gain_net, cto_tax, cto_values = simulate_cto(
+        capital_initial, versement_mensuel, monthly_return, months
+    )
+
+    resume = (
+        (pea_invested, pea_tax, pea_gain_net, pea_net),
+        (cto_invested, cto_tax, cto_gain_net, cto_net)
+    )
+    return resume, np.array(pea_values_net), np.array(cto_values)
+
+# --- Anti-rebond des événements de curseur ---
+class Debouncer:
+    """Retarde l'appel jusqu'à ce que les événements cessent pendant `delai` secondes"""
+    def __init__(self, fn, delai=DELAI_DEBOUNCE):
+        self.fn = fn
+        self.delai = delai
+        self.handle = None
+
+    def __call__(self, *args):
+        if self.handle is not None:
+            self.handle.cancel()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Hors boucle d'événements (script) : appel immédiat
+            self.fn()
+            return
+        self.handle = loop.call_later(self.delai, self.fn)
+
+# --- Interface réactive (figure persistante) ---
+def simulate_reactive(**sliders):
+    with plt.ioff():
+        fig, ax = plt.subplots(figsize=(10, 6))
+    pea_line, = ax.plot([], [], label="PEA (net après PS à la sortie)", color="green")
+    cto_line, = ax.plot([], [], label="CTO (imposition annuelle PFU)", color="red")
+    pea_final = ax.axhline(y=0, color="green", linestyle="--", label="PEA net final")
+    cto_final = ax.axhline(y=0, color="red", linestyle="--", label="CTO net final")
+    ax.set_title("Évolution du portefeuille : PEA vs CTO (net après impôts)")
+    ax.set_xlabel("Mois")
+    ax.set_ylabel("Valeur du portefeuille (€)")
+    legend = ax.legend()
+    ax.grid(True)
+    fig.tight_layout()
+
+    table_out = widgets.Output()
+    figure_out = widgets.Output()
+
+    # Backend ipympl : le canvas est lui-même un widget rafraîchi en place
+    canvas_widget = isinstance(fig.canvas, widgets.DOMWidget)
+    if canvas_widget:
+        with figure_out:
+            display(fig.canvas)
+
+    def refresh():
+        params = tuple(sliders[name].value for name in
+                       ("capital_initial", "versement_mensuel", "annual_return", "years"))
+        (pea, cto), pea_values_net, cto_values = simulate_cached(*params)
+
+        df = pd.DataFrame({
+            "Compte": ["PEA", "CTO"],
+            "Capital investi (€)": [pea[0], cto[0]],
+            "Impôt payé (€)": [pea[1], cto[1]],
+            "Gain net (€)": [pea[2], cto[2]],
+            "Valeur nette finale (€)": [pea[3], cto[3]]
+        })
+        with table_out:
+            clear_output(wait=True)
+            display(df)
+
+        months = np.arange(len(pea_values_net))
+        pea_line.set_data(months, pea_values_net)
+        cto_line.set_data(months, cto_values)
+        pea_final.set_ydata([pea[3], pea[3]])
+        cto_final.set_ydata([cto[3], cto[3]])
+        legend.get_texts()[2].set_text(f"PEA net final: {pea[3]:.0f} €")
+        legend.get_texts()[3].set_text(f"CTO net final: {cto[3]:.0f} €")
+        ax.relim()
+        ax.autoscale_view()
+
+        if canvas_widget:
+            fig.canvas.draw_idle()
+        else:
+            with figure_out:
+                clear_output(wait=True)
+                display(fig)
+
+    debounced = Debouncer(refresh)
+    for slider in sliders.values():
+        slider.observe(debounced, names="value")
+
+    refresh()
+    return widgets.VBox([widgets.HBox(list(sliders.values())), table_out, figure_out])
+
 # --- Interface interactive ---
-interact(
-    simulate,
-    capital_initial=widgets.IntSlider(value=2000, min=0, max=20000, step=500, description="Capital initial (€)"),
-    versement_mensuel=widgets.IntSlider(value=200, min=0, max=2000, step=50, description="Versement mensuel (€)"),
-    annual_return=widgets.FloatSlider(value=0.08, min=0.01, max=0.20, step=0.01, description="Rendement annuel"),
-    years=widgets.IntSlider(value=5, min=1, max=30, step=1, description="Durée (années)")
-)
+def make_sliders():
+    return dict(
+        capital_initial=widgets.IntSlider(value=2000, min=0, max=20000, step=500, description="Capital initial (€)"),
+        versement_mensuel=widgets.IntSlider(value=200, min=0, max=2000, step=50, description="Versement mensuel (€)"),
+        annual_return=widgets.FloatSlider(value=0.08, min=0.01, max=0.20, step=0.01, description="Rendement annuel"),
+        years=widgets.IntSlider(value=5, min=1, max=30, step=1, description="Durée (années)")
+    )
+
+if MODE_REACTIF:
+    display(simulate_reactive(**make_sliders()))
+else:
+    interact(simulate, **make_sliders())
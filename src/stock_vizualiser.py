@@ -1,21 +1,20 @@
+"""
+Visualiseur d'actions US (Twelve Data) et EU (Yahoo Finance)
+Module importable sans effet de bord : aucun appel réseau, aucune écriture
+disque ni import lourd tant qu'une fonction n'est pas appelée.
+Usage : python stock_vizualiser.py --us AAPL NVDA --eu TTE.PA --period 1y
+Hors ligne : MARKET_DATA_PROVIDER=replay (voir donnees_marche)
+"""
+
+import argparse
 import os
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from twelvedata import TDClient
-import yfinance as yf
-from datetime import datetime
+
+from instrumentation import instrumented
 
 # ==============================
 # CONFIGURATION
 # ==============================
-API_KEY = "cc409ca76ef040c1b0904d2247707172"  # <-- Ta clé Twelve Data gratuite
-td = TDClient(apikey=API_KEY)
-
-# Créer le dossier outputs si n'existe pas
 OUTPUT_DIR = "outputs"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Actions US via Twelve Data
 US_TICKERS = {
@@ -42,10 +41,12 @@ EU_TICKERS = {
     "BMW.DE": "BMW"
 }
 
-INTERVAL = "1day"
+PERIOD = "6mo"
+INTERVAL = "1d"
 OUTPUTSIZE = 180
 RSI_PERIOD = 14
 
+
 # ==============================
 # INDICATEURS
 # ==============================
@@ -55,63 +56,38 @@ def compute_rsi(prices, period=14):
     loss = -delta.clip(upper=0)
     avg_gain = gain.ewm(alpha=1/period, min_periods=period).mean()
     avg_loss = loss.ewm(alpha=1/period, min_periods=period).mean()
-    rs = avg_gain / avg_loss.replace(0, np.nan)
+    rs = avg_gain / avg_loss.replace(0, float("nan"))
     return 100 - (100 / (1 + rs))
 
 # ==============================
 # Récupération données
 # ==============================
-def get_data_us(ticker):
+@instrumented("fetch")
+def get_data_us(ticker, provider=None, interval=INTERVAL, outputsize=OUTPUTSIZE):
+    from donnees_marche import get_provider
+
     try:
-        ts = td.time_series(symbol=ticker, interval=INTERVAL, outputsize=OUTPUTSIZE)
-        df = ts.as_pandas().sort_index()
-        df = df.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"})
-        return df
+        provider = provider or get_provider("twelvedata")
+        return provider.history(ticker, period=None, interval=interval, outputsize=outputsize)
     except Exception as e:
         print(f"⚠️ Erreur récupération US {ticker}: {e}")
         return None
 
-def get_data_eu(ticker):
+@instrumented("fetch")
+def get_data_eu(ticker, period=PERIOD, interval=INTERVAL, provider=None):
+    from donnees_marche import OHLCV_COLUMNS, get_provider
+
     try:
-        # Téléchargement depuis Yahoo Finance
-        df = yf.download(
-            ticker,
-            period="6mo",
-            interval="1d",
-            group_by="ticker",   # <— corrige le problème d’écrasement des noms de colonnes
-            auto_adjust=False,
-            progress=False
-        )
+        # Yahoo Finance par défaut (colonnes déjà normalisées par le fournisseur)
+        provider = provider or get_provider("yahoo")
+        df = provider.history(ticker, period=period, interval=interval)
 
         if df.empty:
             print(f"⚠️ Aucune donnée trouvée pour {ticker}.")
             return None
 
-        # --- CAS 1 : colonnes normales (Open, Close, etc.)
-        if "Close" in df.columns:
-            pass
-
-        # --- CAS 2 : multi-index (Price / Close)
-        elif isinstance(df.columns, pd.MultiIndex):
-            df.columns = [col[1] if col[1] else col[0] for col in df.columns]
-
-        # --- CAS 3 : colonnes nommées avec le ticker (ex. 'TTE.PA')
-        elif ticker in df.columns:
-            df = df.rename(columns={ticker: "Close"})
-            # yfinance ne renvoie parfois que le prix de clôture, donc on simule le reste si besoin
-            if "Open" not in df.columns:
-                df["Open"] = df["Close"]
-                df["High"] = df["Close"]
-                df["Low"] = df["Close"]
-                df["Volume"] = 0
-
-        else:
-            print(f"⚠️ Format de colonnes inattendu pour {ticker} : {list(df.columns)}")
-            return None
-
         # Vérifie la présence des colonnes essentielles
-        expected_cols = ["Open", "High", "Low", "Close", "Volume"]
-        missing = [c for c in expected_cols if c not in df.columns]
+        missing = [c for c in OHLCV_COLUMNS if c not in df.columns]
         if missing:
             print(f"⚠️ Colonnes manquantes pour {ticker} : {missing}")
             return None
@@ -128,7 +104,11 @@ def get_data_eu(ticker):
 # ==============================
 # Graphique et sauvegarde
 # ==============================
-def plot_chart(df, name, ticker=""):
+@instrumented("plot")
+def plot_chart(df, name, ticker="", output_dir=OUTPUT_DIR, show=True):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     df["MA20"] = df["Close"].rolling(20).mean()
     df["MA50"] = df["Close"].rolling(50).mean()
     df["RSI"] = compute_rsi(df["Close"], RSI_PERIOD)
@@ -164,34 +144,90 @@ def plot_chart(df, name, ticker=""):
     fig.update_layout(height=800, xaxis_rangeslider_visible=False, template="plotly_dark")
 
     # Affichage interactif
-    fig.show()
+    if show:
+        fig.show()
 
-    # Sauvegarde automatique dans outputs/
+    # Sauvegarde automatique dans le dossier de sortie
+    os.makedirs(output_dir, exist_ok=True)
     filename = f"{ticker or name}.html"
-    filepath = os.path.join(OUTPUT_DIR, filename)
+    filepath = os.path.join(output_dir, filename)
     fig.write_html(filepath)
     print(f"💾 Graphique sauvegardé : {filepath}")
+    return filepath
 
 # ==============================
 # EXECUTION
 # ==============================
-# === Marché US ===
-for ticker, name in US_TICKERS.items():
-    print(f"Récupération US {name} ({ticker})...")
-    df = get_data_us(ticker)
-    if df is not None and not df.empty:
-        print(f"→ Dernier cours : {df['Close'].iloc[-1]:.2f}")
-        plot_chart(df, name, ticker)
-    else:
-        print(f"⚠️ Aucune donnée pour {name}.")
-
-# === Marché EU ===
-for ticker, name in EU_TICKERS.items():
-    print(f"Récupération EU {name} ({ticker})...")
-    df = get_data_eu(ticker)
-    if df is not None and not df.empty:
-        print(f"→ Dernier cours : {df['Close'].iloc[-1]:.2f}")
-        print(df.tail())  # 👈 pour vérifier visuellement les données
-        plot_chart(df, name, ticker)
-    else:
-        print(f"⚠️ Aucune donnée pour {name}.")
+def run(us_tickers=None, eu_tickers=None, period=PERIOD, interval=INTERVAL,
+        outputsize=OUTPUTSIZE, output_dir=OUTPUT_DIR, api_key=None, show=True):
+    """Récupère et trace chaque ticker ; renvoie la liste des fichiers créés"""
+    us_tickers = US_TICKERS if us_tickers is None else us_tickers
+    eu_tickers = EU_TICKERS if eu_tickers is None else eu_tickers
+    files = []
+
+    # === Marché US ===
+    if us_tickers:
+        from donnees_marche import get_provider
+
+        try:
+            us_provider = get_provider("twelvedata", api_key=api_key)
+        except RuntimeError as e:
+            print(f"⚠️ Marché US ignoré : {e}")
+            us_tickers = {}
+
+    for ticker, name in us_tickers.items():
+        print(f"Récupération US {name} ({ticker})...")
+        df = get_data_us(ticker, us_provider, interval, outputsize)
+        if df is not None and not df.empty:
+            print(f"→ Dernier cours : {df['Close'].iloc[-1]:.2f}")
+            files.append(plot_chart(df, name, ticker, output_dir, show))
+        else:
+            print(f"⚠️ Aucune donnée pour {name}.")
+
+    # === Marché EU ===
+    for ticker, name in eu_tickers.items():
+        print(f"Récupération EU {name} ({ticker})...")
+        df = get_data_eu(ticker, period, interval)
+        if df is not None and not df.empty:
+            print(f"→ Dernier cours : {df['Close'].iloc[-1]:.2f}")
+            print(df.tail())  # 👈 pour vérifier visuellement les données
+            files.append(plot_chart(df, name, ticker, output_dir, show))
+        else:
+            print(f"⚠️ Aucune donnée pour {name}.")
+
+    return files
+
+def _tickers(symbols, known):
+    """Associe chaque symbole à son nom connu (ou au symbole lui-même)"""
+    if symbols is None:
+        return None
+    return {s: known.get(s, s) for s in symbols}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Graphiques techniques d'actions US et EU")
+    parser.add_argument("--us", nargs="*", metavar="TICKER",
+                        help="Tickers US (Twelve Data) ; défaut : liste intégrée, vide pour ignorer")
+    parser.add_argument("--eu", nargs="*", metavar="TICKER",
+                        help="Tickers EU (Yahoo Finance) ; défaut : liste intégrée, vide pour ignorer")
+    parser.add_argument("--period", default=PERIOD, help=f"Période Yahoo Finance (défaut : {PERIOD})")
+    parser.add_argument("--interval", default=INTERVAL, help=f"Intervalle des bougies (défaut : {INTERVAL})")
+    parser.add_argument("--outputsize", type=int, default=OUTPUTSIZE,
+                        help=f"Nombre de bougies Twelve Data (défaut : {OUTPUTSIZE})")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help=f"Dossier des fichiers HTML (défaut : {OUTPUT_DIR})")
+    parser.add_argument("--no-show", action="store_true", help="Ne pas ouvrir les graphiques dans le navigateur")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    return run(
+        us_tickers=_tickers(args.us, US_TICKERS),
+        eu_tickers=_tickers(args.eu, EU_TICKERS),
+        period=args.period,
+        interval=args.interval,
+        outputsize=args.outputsize,
+        output_dir=args.output_dir,
+        show=not args.no_show
+    )
+
+if __name__ == "__main__":
+    main()
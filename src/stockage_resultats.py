@@ -0,0 +1,262 @@
+"""
+Stockage persistant des simulations Monte Carlo (SQLite, bibliothèque standard)
+Chaque exécution est indexée par l'empreinte de ses paramètres et conserve :
+- une ligne de la table runs : paramètres et statistiques en colonnes (requêtables)
+- les vecteurs par chemin (valeurs terminales brutes, nettes PEA et CTO) et le
+  résumé des trajectoires, stockés en colonnes binaires contiguës (table arrays)
+
+    store = ResultStore()
+    key = store.save(params, arrays, n_simulations)
+    store.load(key)                                  # rechargement sans resimuler
+    store.query(ticker="AAPL", order_by="pea_mean")  # historique filtré
+    store.compare([key_a, key_b])
+
+L'historique est borné (nombre d'exécutions et taille des tableaux) : les
+exécutions les plus anciennes sont supprimées après chaque enregistrement.
+
+Variable d'environnement :
+- RESULT_STORE_PATH : fichier SQLite (par défaut outputs/ à la racine du projet)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+STORE_PATH_ENV = "RESULT_STORE_PATH"
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_PATH = os.path.join(PROJECT_DIR, "outputs", "resultats_simulations.sqlite")
+
+MAX_RUNS = 200                 # Exécutions conservées
+MAX_ARRAY_BYTES = 512 * 2 ** 20  # Taille cumulée des tableaux conservés
+
+# Paramètres de get_simulation_params, un par colonne
+PARAM_COLUMNS = {
+    'ticker': "TEXT",
+    'initial_price': "REAL",
+    'initial_investment': "REAL",
+    'monthly_investment': "REAL",
+    'years': "INTEGER",
+    'annual_return': "REAL",
+    'volatility': "REAL",
+    'dividend_yield': "REAL",
+    'tax_scenario': "TEXT",
+    'inflation_rate': "REAL"
+}
+
+STAT_COLUMNS = (
+    'total_invested', 'gross_mean', 'gross_median',
+    'pea_mean', 'pea_median', 'pea_std', 'pea_p5', 'pea_p95', 'pea_loss_prob',
+    'cto_mean', 'cto_median', 'cto_std', 'cto_p5', 'cto_p95', 'cto_loss_prob',
+    'prob_pea_better'
+)
+
+RUN_COLUMNS = ('key', 'created', 'n_simulations', *PARAM_COLUMNS, *STAT_COLUMNS)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    key TEXT PRIMARY KEY,
+    created TEXT NOT NULL,
+    n_simulations INTEGER NOT NULL,
+    params TEXT NOT NULL,
+    {", ".join(f"{name} {kind}" for name, kind in PARAM_COLUMNS.items())},
+    {", ".join(f"{name} REAL" for name in STAT_COLUMNS)}
+);
+CREATE TABLE IF NOT EXISTS arrays (
+    key TEXT NOT NULL REFERENCES runs(key) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (key, name)
+);
+"""
+
+
+def param_hash(params, **extra):
+    """Empreinte stable (16 caractères hexadécimaux) des paramètres et des options"""
+    payload = json.dumps({**params, **extra}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def run_statistics(final_values, pea_net, cto_net, invested):
+    """Statistiques enregistrées pour une exécution (probabilités en %)"""
+    final_values, pea_net, cto_net = (np.asarray(values, dtype=float)
+                                      for values in (final_values, pea_net, cto_net))
+    invested = float(np.mean(invested))
+
+    stats = {
+        'total_invested': invested,
+        'gross_mean': float(final_values.mean()),
+        'gross_median': float(np.median(final_values))
+    }
+    for account, values in (("pea", pea_net), ("cto", cto_net)):
+        p5, p95 = np.percentile(values, [5, 95])
+        stats.update({
+            f'{account}_mean': float(values.mean()),
+            f'{account}_median': float(np.median(values)),
+            f'{account}_std': float(values.std()),
+            f'{account}_p5': float(p5),
+            f'{account}_p95': float(p95),
+            f'{account}_loss_prob': float(np.mean(values < invested) * 100)
+        })
+    stats['prob_pea_better'] = float(np.mean(pea_net > cto_net) * 100)
+    return stats
+
+
+class ResultStore:
+    """Historique des exécutions Monte Carlo dans une base SQLite"""
+
+    def __init__(self, path=None, max_runs=MAX_RUNS, max_bytes=MAX_ARRAY_BYTES):
+        self.path = path or os.environ.get(STORE_PATH_ENV) or STORE_PATH
+        self.max_runs = max_runs
+        self.max_bytes = max_bytes
+        self._ready = False
+
+    def _connect(self):
+        # La base (et son dossier) n'est créée qu'au premier accès
+        if not self._ready:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        if not self._ready:
+            # Sans effet sur une base existante : le fichier rétrécit après suppression (bases neuves)
+            conn.execute("PRAGMA auto_vacuum = FULL")
+            conn.executescript(_SCHEMA)
+            self._ready = True
+        return conn
+
+    def save(self, params, arrays, n_simulations, stats=None, key=None):
+        """Enregistre (ou remplace) une exécution ; renvoie sa clé
+
+        arrays : dict nom -> tableau NumPy, au minimum 'final_values',
+        'pea_net' et 'cto_net' (une valeur par chemin), plus 'invested'
+        (capital versé, scalaire) si stats n'est pas fourni. Les exécutions
+        les plus anciennes au-delà de max_runs / max_bytes sont supprimées.
+        """
+        key = key or param_hash(params, n_simulations=n_simulations)
+        if stats is None:
+            stats = run_statistics(arrays['final_values'], arrays['pea_net'],
+                                   arrays['cto_net'], arrays['invested'])
+
+        row = {'key': key, 'created': datetime.now().isoformat(timespec="seconds"),
+               'n_simulations': int(n_simulations), 'params': json.dumps(params, default=str)}
+        row.update({name: params.get(name) for name in PARAM_COLUMNS})
+        row.update({name: stats.get(name) for name in STAT_COLUMNS})
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM runs WHERE key = ?", (key,))
+                conn.execute(f"INSERT INTO runs ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                             tuple(row.values()))
+                conn.executemany(
+                    "INSERT INTO arrays (key, name, dtype, shape, data) VALUES (?, ?, ?, ?, ?)",
+                    [(key, name, values.dtype.str, json.dumps(values.shape), values.tobytes())
+                     for name, values in ((name, np.asarray(values, order="C"))
+                                          for name, values in arrays.items())])
+                self._prune(conn, key)
+        finally:
+            conn.close()
+        return key
+
+    def _prune(self, conn, keep):
+        # Des plus récentes aux plus anciennes : supprime celles qui dépassent les limites
+        rows = conn.execute(
+            "SELECT runs.key, COALESCE(SUM(LENGTH(arrays.data)), 0) FROM runs "
+            "LEFT JOIN arrays ON arrays.key = runs.key GROUP BY runs.key "
+            "ORDER BY runs.key = ? DESC, runs.created DESC", (keep,)).fetchall()
+        kept = total = 0
+        expired = []
+        for key, size in rows:
+            if key != keep and (kept >= self.max_runs or total + size > self.max_bytes):
+                expired.append((key,))
+            else:
+                kept += 1
+                total += size
+        conn.executemany("DELETE FROM runs WHERE key = ?", expired)
+
+    def exists(self, key):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM runs WHERE key = ?", (key,)).fetchone() is not None
+        finally:
+            conn.close()
+
+    def load(self, key, names=None):
+        """Recharge une exécution : dict (clé, paramètres, statistiques, tableaux) ou None"""
+        conn = self._connect()
+        try:
+            run = conn.execute("SELECT * FROM runs WHERE key = ?", (key,)).fetchone()
+            if run is None:
+                return None
+            query = "SELECT name, dtype, shape, data FROM arrays WHERE key = ?"
+            args = [key]
+            if names is not None:
+                query += f" AND name IN ({', '.join('?' * len(names))})"
+                args.extend(names)
+            arrays = {
+                name: np.frombuffer(data, dtype=np.dtype(dtype)).reshape(json.loads(shape))
+                for name, dtype, shape, data in conn.execute(query, args)
+            }
+        finally:
+            conn.close()
+
+        return {
+            'key': run['key'],
+            'created': run['created'],
+            'n_simulations': run['n_simulations'],
+            'params': json.loads(run['params']),
+            'stats': {name: run[name] for name in STAT_COLUMNS},
+            'arrays': arrays
+        }
+
+    def query(self, order_by="created", descending=True, limit=None, **filters):
+        """Exécutions (sans tableaux) filtrées par égalité sur les colonnes de runs"""
+        unknown = [name for name in (order_by, *filters) if name not in RUN_COLUMNS]
+        if unknown:
+            raise ValueError(f"Colonne(s) inconnue(s) : {', '.join(unknown)}")
+
+        sql = f"SELECT {', '.join(RUN_COLUMNS)} FROM runs"
+        if filters:
+            sql += " WHERE " + " AND ".join(f"{name} = ?" for name in filters)
+        sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(sql, tuple(filters.values()))]
+        finally:
+            conn.close()
+
+    def compare(self, keys):
+        """Compare plusieurs exécutions : lignes de runs et paramètres qui diffèrent"""
+        conn = self._connect()
+        try:
+            sql = f"SELECT {', '.join(RUN_COLUMNS)} FROM runs WHERE key IN ({', '.join('?' * len(keys))})"
+            rows = {row['key']: dict(row) for row in conn.execute(sql, tuple(keys))}
+        finally:
+            conn.close()
+        missing = [key for key in keys if key not in rows]
+        if missing:
+            raise KeyError(f"Exécution(s) introuvable(s) : {', '.join(missing)}")
+
+        runs = [rows[key] for key in keys]
+        varying = [name for name in ('n_simulations', *PARAM_COLUMNS)
+                   if len({run[name] for run in runs}) > 1]
+        return {'runs': runs, 'varying_params': varying}
+
+    def delete(self, key):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM runs WHERE key = ?", (key,))
+        finally:
+            conn.close()
@@ -0,0 +1,207 @@
+"""
+Archives de trajectoires sur disque (fichiers .npy mappés en mémoire)
+Pour les simulations de stress (ex. 1M trajectoires x 360 mois), la matrice
+complète des prix est écrite bloc par bloc dans un numpy.memmap : la mémoire
+reste bornée par la taille d'un bloc, quelle que soit la taille de la matrice.
+
+- la matrice est stockée en ordre colonne (Fortran) : un mois, ou une plage de
+  mois, est contigu sur disque, si bien que percentiles par mois et drawdowns
+  se calculent en un seul passage séquentiel sur le fichier
+- rouvrir une archive ne lit que ses métadonnées et le résumé déjà calculé
+
+    archive = simulate_to_archive(params, n_paths, directory)
+    archive = PathArchive.open(directory)            # instantané
+    archive.percentile_bands((5, 50, 95))
+    archive.max_drawdowns()
+"""
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from donnees_graphiques import PERCENTILES, ReservoirSampler
+from moteur_simulation import COMPACT_DTYPE, ENGINE_VERSION, portfolio_values, simulate_gross
+
+ARCHIVE_DIR = os.path.join("outputs", "trajectoires")
+
+# Mémoire de travail maximale d'une requête (octets)
+MEMORY_BUDGET = 256 * 2 ** 20
+
+_META = "meta.json"
+_PRICES = "price_paths.npy"
+_FINAL_VALUES = "final_values.npy"
+_SUMMARY = "summary.npz"
+
+
+class PathArchive:
+    """Matrice de trajectoires de prix (trajectoires x mois+1) mappée depuis un dossier"""
+
+    def __init__(self, directory, meta, price_paths, final_values):
+        self.directory = directory
+        self.meta = meta
+        self.price_paths = price_paths
+        self.final_values = final_values
+
+    @classmethod
+    def create(cls, directory, params, n_paths, dtype=COMPACT_DTYPE, first_seed=0):
+        """Crée une archive vide (fichiers alloués sur disque, marquée incomplète)"""
+        os.makedirs(directory, exist_ok=True)
+        months = int(params['years'] * 12)
+        meta = {
+            'params': params,
+            'n_paths': int(n_paths),
+            'months': months,
+            'dtype': np.dtype(dtype).str,
+            'first_seed': int(first_seed),
+            'engine_version': ENGINE_VERSION,
+            'created': datetime.now().isoformat(timespec="seconds"),
+            'complete': False
+        }
+        _write_meta(directory, meta)
+
+        price_paths = np.lib.format.open_memmap(os.path.join(directory, _PRICES), mode="w+", dtype=dtype,
+                                                shape=(n_paths, months + 1), fortran_order=True)
+        final_values = np.lib.format.open_memmap(os.path.join(directory, _FINAL_VALUES), mode="w+",
+                                                 dtype=np.float64, shape=(n_paths,))
+        return cls(directory, meta, price_paths, final_values)
+
+    @classmethod
+    def open(cls, directory, mode="r"):
+        """Rouvre une archive complète sans la lire (mapping mémoire)"""
+        with open(os.path.join(directory, _META), encoding="utf-8") as f:
+            meta = json.load(f)
+        if not meta['complete']:
+            raise ValueError(f"Archive incomplète : {directory}")
+        if meta['engine_version'] != ENGINE_VERSION:
+            raise ValueError(f"Archive produite par une autre version du moteur : {directory}")
+
+        price_paths = np.load(os.path.join(directory, _PRICES), mmap_mode=mode)
+        final_values = np.load(os.path.join(directory, _FINAL_VALUES), mmap_mode=mode)
+        return cls(directory, meta, price_paths, final_values)
+
+    @staticmethod
+    def exists(directory):
+        """Vrai si le dossier contient une archive complète du moteur courant"""
+        try:
+            with open(os.path.join(directory, _META), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return meta.get('complete', False) and meta.get('engine_version') == ENGINE_VERSION
+
+    @property
+    def n_paths(self):
+        return self.meta['n_paths']
+
+    @property
+    def nbytes(self):
+        return self.price_paths.nbytes
+
+    def __len__(self):
+        return self.n_paths
+
+    def finalize(self):
+        """Écrit les données sur disque et marque l'archive complète"""
+        self.price_paths.flush()
+        self.final_values.flush()
+        self.meta['complete'] = True
+        _write_meta(self.directory, self.meta)
+
+    # ==============================
+    # Requêtes
+    # ==============================
+    def path(self, index):
+        """Une trajectoire : prix (mois+1) et valeur du portefeuille (mois), en float64"""
+        prices = np.asarray(self.price_paths[index], dtype=np.float64)[None, :]
+        params = self.meta['params']
+        values, _ = portfolio_values(prices, params['initial_investment'], params['monthly_investment'])
+        return {'prices': prices[0], 'values': values[0]}
+
+    def blocks(self, block_size=10_000):
+        """Blocs (start, stop, prix, valeurs) comme le rappel on_block de simulate_gross"""
+        params = self.meta['params']
+        for start in range(0, self.n_paths, block_size):
+            stop = min(start + block_size, self.n_paths)
+            prices = np.ascontiguousarray(self.price_paths[start:stop])
+            values, _ = portfolio_values(prices, params['initial_investment'], params['monthly_investment'])
+            yield start, stop, prices, values
+
+    def _column_chunks(self, memory_budget):
+        # Plages de mois contiguës sur disque (ordre colonne) tenant dans le budget
+        width = max(1, int(memory_budget // (self.n_paths * 8)))
+        n_columns = self.price_paths.shape[1]
+        for start in range(0, n_columns, width):
+            yield start, min(start + width, n_columns)
+
+    def percentile_bands(self, percentiles=PERCENTILES, memory_budget=MEMORY_BUDGET):
+        """Percentiles par mois (len(percentiles) x mois+1), plage de mois par plage de mois"""
+        bands = np.empty((len(percentiles), self.price_paths.shape[1]), dtype=self.price_paths.dtype)
+        for start, stop in self._column_chunks(memory_budget):
+            bands[:, start:stop] = np.percentile(self.price_paths[:, start:stop], percentiles, axis=0)
+        return bands
+
+    def max_drawdowns(self, memory_budget=MEMORY_BUDGET):
+        """Drawdown maximal (%, négatif) de chaque trajectoire de prix"""
+        running_max = None
+        drawdowns = np.zeros(self.n_paths)
+        for start, stop in self._column_chunks(memory_budget):
+            chunk = np.asarray(self.price_paths[:, start:stop], dtype=np.float64)
+            peaks = np.maximum.accumulate(chunk, axis=1)
+            if running_max is not None:
+                np.maximum(peaks, running_max[:, None], out=peaks)
+            running_max = peaks[:, -1].copy()
+
+            chunk /= peaks
+            np.minimum(drawdowns, chunk.min(axis=1) - 1, out=drawdowns)
+        return drawdowns * 100
+
+    def summarize(self, n_samples=20, percentiles=PERCENTILES, seed=0):
+        """Résumé pour le tracé en éventail (même format que summarize_paths), mis en cache sur disque"""
+        summary_path = os.path.join(self.directory, _SUMMARY)
+        try:
+            with np.load(summary_path, allow_pickle=False) as data:
+                if tuple(data['percentiles']) == tuple(percentiles) and len(data['sample']) == n_samples:
+                    return {'percentiles': tuple(percentiles), 'bands': data['bands'],
+                            'sample': data['sample'], 'n_paths': self.n_paths}
+        except (OSError, KeyError, ValueError):
+            pass
+
+        # Le réservoir ne lit que les lignes retenues
+        sampler = ReservoirSampler(n_samples, seed)
+        sampler.add(self.price_paths)
+        summary = {
+            'percentiles': tuple(percentiles),
+            'bands': self.percentile_bands(percentiles),
+            'sample': np.array(sampler.sample),
+            'n_paths': self.n_paths
+        }
+        np.savez(summary_path, percentiles=np.asarray(percentiles), bands=summary['bands'],
+                 sample=summary['sample'])
+        return summary
+
+
+def _write_meta(directory, meta):
+    path = os.path.join(directory, _META)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def simulate_to_archive(params, n_paths, directory, dtype=COMPACT_DTYPE, first_seed=0, block_size=10_000,
+                        on_block=None):
+    """Simule n_paths trajectoires directement dans une archive sur disque
+
+    Mêmes seeds et mêmes valeurs que simulate_gross ; seul un bloc de
+    block_size trajectoires réside en mémoire à la fois ; on_block est
+    transmis à simulate_gross.
+    """
+    archive = PathArchive.create(directory, params, n_paths, dtype, first_seed)
+    gross = simulate_gross(params, n_paths, first_seed=first_seed, block_size=block_size,
+                           price_out=archive.price_paths, on_block=on_block)
+    archive.final_values[:] = gross['final_values']
+    archive.meta['invested'] = float(gross['invested'][0]) if n_paths else float(params['initial_investment'])
+    archive.finalize()
+    return PathArchive.open(directory)